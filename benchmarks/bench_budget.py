@@ -0,0 +1,118 @@
+"""
+Recall/latency trade-off of budgeted retrieval (--max-queries) against the exhaustive path.
+
+Retrieves the top k parts of a generated fixture repository once with every chunk queried, then
+with each query budget, and reports the queries spent, the retrieve time and the recall: the share
+of the budgeted top k parts that are as close to a training example as the exhaustive k-th part
+(ties included, the fixture repository has many equally close chunks), and the distance of the
+k-th part. Deduplication is off by default, since the fixture repository is made of
+near-duplicates and would leave almost nothing to budget.
+
+    python benchmarks/bench_budget.py --repo-size 2000 --budgets 50,200,800 --k 3
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+
+# Local Imports
+from bench_support import HashEmbeddings, make_fixture_repo, training_documents
+
+from tcm.database.database_numpy import NumpyFlatDB
+from tcm.helper.helper_state import retrieve
+from tcm.helper.helper_trace import Tracer
+from tcm.rag.rag_embeddings import TCMEmbeddings
+
+# Global Imports
+from typing import Any, Dict, List
+
+def run_budget(db: NumpyFlatDB, repo: str, k: int, max_queries: int,
+               dedup: bool) -> Dict[str, Any]:
+    state = {
+        "url": repo,
+        "branch": "main",
+        "folder": "",
+        "loader_backend": "tarball",
+        "k": k,
+        "dedup": dedup,
+        "max_queries": max_queries,
+        "vector_db": db,
+        "retrieval_cache": None
+    }
+    run_id = f"budget-{max_queries}"
+    start = time.time()
+    with Tracer.run(run_id):
+        parts = retrieve(state)["parts"]
+    counters = Tracer.totals(run_id)["counters"]
+    return {
+        "max_queries": max_queries,
+        "retrieve_s": time.time() - start,
+        "queries": counters.get("queries", 0),
+        "skipped": counters.get("chunks_skipped", 0),
+        "escalated": counters.get("escalated_packages", 0),
+        "parts": [part["user_code"] for part in parts]
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Budgeted retrieval benchmark")
+    parser.add_argument("--repo-size", type=int, default=2000,
+                        help="Number of fixture files (default 2000)")
+    parser.add_argument("--budgets", type=str, default="50,200,800",
+                        help="Comma separated --max-queries values (default 50,200,800)")
+    parser.add_argument("--k", type=int, default=3,
+                        help="Number of parts kept (default 3)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Collapse duplicate chunks before querying")
+    parser.add_argument("--output", type=str, default="",
+                        help="(optional) JSON file to write the raw results to")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tcm-budget-bench-")
+    repo = make_fixture_repo(os.path.join(workdir, "repo"), args.repo_size)
+    emb = TCMEmbeddings("hash-256", cache_path="", embeddings=HashEmbeddings(256))
+    db = NumpyFlatDB("bench_tech_credit_code", emb)
+    training = training_documents()
+    db.upsert(training, [str(i) for i in range(len(training))])
+
+    # Keep the pipeline's debug prints out of the benchmark report
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        exhaustive = run_budget(db, repo, args.k, 0, args.dedup)
+        rows: List[Dict[str, Any]] = [exhaustive]
+        for budget in [int(item) for item in args.budgets.split(",") if item]:
+            rows.append(run_budget(db, repo, args.k, budget, args.dedup))
+    finally:
+        sys.stdout = stdout
+
+    def __distances(parts: List[str]) -> List[float]:
+        return [min(score for _, score in results) for results in db.query_batch(parts, 4)]
+
+    kth = max(__distances(exhaustive["parts"]), default=0.0)
+    for row in rows:
+        distances = __distances(row["parts"])
+        hits = sum(1 for distance in distances if distance <= kth + 1e-6)
+        row["kth_distance"] = max(distances, default=0.0)
+        row["recall"] = hits / len(exhaustive["parts"]) if exhaustive["parts"] else 1.0
+
+    header = f"{'budget':>8} | {'queries':>8} | {'skipped':>8} | {'escalated':>9} | " \
+        f"{'retrieve (s)':>12} | {'recall@k':>8} | {'k-th dist':>9}"
+    print("\nQuery Budget Summary:")
+    print("-" * len(header))
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        budget = row["max_queries"] or "all"
+        print(f"{budget:>8} | {row['queries']:>8} | {row['skipped']:>8} | "
+              f"{row['escalated']:>9} | {row['retrieve_s']:>12.3f} | {row['recall']:>8.2f} | "
+              f"{row['kth_distance']:>9.4f}")
+    print("-" * len(header))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=4)
@@ -0,0 +1,210 @@
+"""
+GitHub client benchmark against a local mock of the REST API.
+
+Serves a generated fixture repository over the endpoints the "api" loader uses (tree listing,
+file contents, commit resolution) with ETags and a rate limit quota, then loads it several times
+through the shared GithubClient. Reports, per load, the requests sent, the 304 answers served from
+the response cache, the quota spent, the time spent throttled and the wall time. A quota smaller
+than one load shows the token bucket slowing the load down instead of failing. With `--folder`,
+only that folder's subtree is listed ("listed" counts the tree entries received).
+
+    python benchmarks/bench_github.py --repo-size 200 --runs 2 --quota 5000 --window 60
+"""
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import tempfile
+import threading
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+
+# Local Imports
+from bench_support import make_fixture_repo
+
+from tcm.github.github_client import GithubClient
+from tcm.github.github_loader import GithubLoader
+from tcm.github.github_snapshot_loader import SnapshotLoader
+from tcm.helper.helper_filters import FileFilters
+from tcm.helper.helper_trace import Tracer
+
+# Global Imports
+from typing import Any, Dict, List
+from urllib.parse import unquote, urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO = "bench/fixture"
+
+class MockGithubApi(ThreadingHTTPServer):
+    """
+    Serves a local directory as the GitHub REST API of REPO, with a quota of `quota` requests per
+    `window` seconds. Like GitHub, a 304 answer does not count against the quota.
+    """
+    def __init__(self, root: str, quota: int, window: float) -> None:
+        super().__init__(("127.0.0.1", 0), MockGithubHandler)
+        self.root = root
+        self.quota = quota
+        self.window = window
+        self.used = 0
+        self.spent = 0
+        self.reset = time.time() + window
+        self.lock = threading.Lock()
+
+        self.files: Dict[str, bytes] = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, 'rb') as f:
+                    self.files[os.path.relpath(path, root).replace(os.sep, "/")] = f.read()
+
+    def spend(self, cost: int=1) -> Dict[str, str]:
+        """Counts a request against the quota. Returns the rate limit headers."""
+        with self.lock:
+            if time.time() >= self.reset:
+                self.used, self.reset = 0, time.time() + self.window
+            self.used += cost
+            self.spent += cost
+            return {
+                "X-RateLimit-Limit": str(self.quota),
+                "X-RateLimit-Remaining": str(max(self.quota - self.used, 0)),
+                "X-RateLimit-Reset": str(int(self.reset) + 1)
+            }
+
+class MockGithubHandler(BaseHTTPRequestHandler):
+    server: MockGithubApi
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    def __reply(self, status: int, body: bytes, headers: Dict[str, str]) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        prefix = f"/repos/{REPO}/"
+        route = url.path[len(prefix):] if url.path.startswith(prefix) else ""
+        files = self.server.files
+
+        if route.startswith("contents/") and route[len("contents/"):] in files:
+            content = files[route[len("contents/"):]]
+            sha = SnapshotLoader.git_blob_sha(content)
+            etag = f'"{sha}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.__reply(304, b"", {**self.server.spend(0), "ETag": etag})
+                return
+            body = json.dumps({"sha": sha, "content": base64.b64encode(content).decode()})
+        elif route.startswith("git/trees/"):
+            # "{branch}:{folder}" lists the subtree of a folder, with paths relative to it
+            branch, _, folder = unquote(route[len("git/trees/"):]).partition(":")
+            folder = folder.rstrip("/") + "/" if folder else ""
+            paths = [path[len(folder):] for path in sorted(files) if path.startswith(folder)]
+            # Like GitHub, the folders of a recursive listing are entries too
+            folders = sorted({path[:index] for path in paths
+                              for index, char in enumerate(path) if char == "/"})
+            tree = [{"path": path, "type": "tree", "sha": "0" * 40} for path in folders] + [
+                {"path": path, "type": "blob",
+                 "sha": SnapshotLoader.git_blob_sha(files[folder + path])}
+                for path in paths
+            ]
+            if branch != "main" or not paths:
+                self.__reply(404, b"{}", {})
+                return
+            body = json.dumps({"tree": tree})
+            etag = f'"{hash(body) & 0xffffffff:x}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.__reply(304, b"", {**self.server.spend(0), "ETag": etag})
+                return
+        elif route.startswith("commits/"):
+            body, etag = "0" * 40, '"head"'
+        else:
+            self.__reply(404, b"{}", {})
+            return
+
+        headers = self.server.spend()
+        if headers["X-RateLimit-Remaining"] == "0" and self.server.used > self.server.quota:
+            self.__reply(403, b'{"message": "API rate limit exceeded"}', headers)
+            return
+        self.__reply(200, body.encode("utf-8"), {**headers, "ETag": etag})
+
+def run_load(client: GithubClient, run_id: str, api: MockGithubApi, folder: str) -> Dict[str, Any]:
+    spent_before = api.spent
+    start = time.time()
+    filters = [FileFilters.JAVA_FILES]
+    if folder:
+        filters.insert(0, FileFilters.FOLDER_ONLY(folder))
+    with Tracer.run(run_id):
+        loader = GithubLoader(f"https://github.com/{REPO}", "main")
+        files = sum(1 for _ in loader.iter_repo(*filters))
+    totals = Tracer.totals(run_id)
+    return {
+        "run": run_id,
+        "files": files,
+        "listed": totals["counters"].get("tree_entries_listed", 0),
+        "requests": totals["counters"].get("github_requests", 0),
+        "not_modified": totals["counters"].get("github_not_modified", 0),
+        "rate_limited": totals["counters"].get("github_rate_limited", 0),
+        "quota_used": api.spent - spent_before,
+        # Spans are named after their parents, e.g. "run/fetch_file/github_throttle"
+        "throttled_s": sum(span["time"] for name, span in totals["spans"].items()
+                           if name.endswith("github_throttle")),
+        "wall_s": time.time() - start
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GitHub client benchmark")
+    parser.add_argument("--repo-size", type=int, default=200,
+                        help="Number of fixture files (default 200)")
+    parser.add_argument("--runs", type=int, default=2,
+                        help="Loads of the same repository, the first one is cold (default 2)")
+    parser.add_argument("--quota", type=int, default=5000,
+                        help="Requests allowed per window by the mock API (default 5000)")
+    parser.add_argument("--window", type=float, default=60.0,
+                        help="Seconds before the mock quota resets (default 60)")
+    parser.add_argument("--folder", type=str, default="",
+                        help="(optional) Only load this folder, e.g. \"src/pkg0\", to see the "
+                        "tree listing pushed down to it")
+    parser.add_argument("--output", type=str, default="",
+                        help="(optional) JSON file to write the raw results to")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tcm-github-bench-")
+    repo = make_fixture_repo(os.path.join(workdir, "repo"), args.repo_size)
+    api = MockGithubApi(repo, args.quota, args.window)
+    threading.Thread(target=api.serve_forever, daemon=True).start()
+
+    Tracer.configure("")
+    GithubClient.configure(
+        base_url=f"http://127.0.0.1:{api.server_address[1]}",
+        cache_path=os.path.join(workdir, "github_responses.sqlite")
+    )
+    client = GithubClient.shared()
+
+    rows: List[Dict[str, Any]] = [
+        run_load(client, f"load-{i + 1}", api, args.folder) for i in range(args.runs)
+    ]
+    api.shutdown()
+
+    header = f"{'run':>8} | {'files':>6} | {'listed':>6} | {'requests':>8} | {'304s':>6} | " \
+        f"{'quota used':>10} | {'limited':>7} | {'throttled (s)':>13} | {'wall (s)':>8}"
+    print("\nGitHub Client Summary:")
+    print("-" * len(header))
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['run']:>8} | {row['files']:>6} | {row['listed']:>6} | {row['requests']:>8} | "
+              f"{row['not_modified']:>6} | {row['quota_used']:>10} | {row['rate_limited']:>7} | "
+              f"{row['throttled_s']:>13.2f} | {row['wall_s']:>8.2f}")
+    print("-" * len(header))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=4)
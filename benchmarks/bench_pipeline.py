@@ -0,0 +1,176 @@
+"""
+Offline throughput benchmark of the analysis pipeline.
+
+Runs the real AnalysisService graph, TokenSplitter, ChromaDB and DocumentHelper code against a generated
+fixture repository, with a deterministic hash embedding model and a stub LLM, so no Google,
+Anthropic or GitHub credentials are needed. Every configuration runs in a fresh process so peak
+RSS is measured per configuration.
+
+    python benchmarks/bench_pipeline.py --repo-sizes 50,200 --chunk-sizes 200,400 --ks 3,10
+"""
+import os
+import sys
+import json
+import queue
+import argparse
+import resource
+import tempfile
+import itertools
+import multiprocessing
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+
+# Global Imports
+from typing import Any, Dict, List
+
+def run_once(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds the pipeline from scratch and analyzes one fixture repository."""
+    from bench_support import (
+        HashEmbeddings, make_fixture_repo, stub_chat_model, summarize, training_documents
+    )
+
+    from tcm.helper.helper_taxonomy import TaxonomyProvider
+    from tcm.helper.helper_trace import Tracer
+    from tcm.database.database_chroma import ChromaDB
+    from tcm.database.database_lexical import LexicalIndex
+    from tcm.rag.rag_embeddings import TCMEmbeddings
+    from tcm.rag.rag_llm import LargeLanguageModel
+    from tcm.server.server_service import AnalysisService
+    from tcm.splitter.splitter_token_splitter import TokenSplitter
+
+    # Loaded once per process, before leaving the repository root it is read relative to
+    TaxonomyProvider.categories()
+    workdir = tempfile.mkdtemp(prefix="tcm-bench-")
+    os.chdir(workdir)
+    os.makedirs("logs", exist_ok=True)
+
+    repo = make_fixture_repo(os.path.join(workdir, "repo"), config["repo_size"])
+    TokenSplitter.CHUNK_SIZE = config["chunk_size"]
+    TokenSplitter.CHUNK_OVERLAP = min(TokenSplitter.CHUNK_OVERLAP, config["chunk_size"] // 10)
+
+    emb = TCMEmbeddings("hash-256", cache_path="", embeddings=HashEmbeddings(256))
+    code_db = ChromaDB("bench_tech_credit_code", emb)
+    training = training_documents()
+    code_db.upsert(training, [str(i) for i in range(len(training))])
+    lexical_index = None
+    if config["lexical"]:
+        lexical_index = LexicalIndex()
+        lexical_index.build(training)
+
+    llm = LargeLanguageModel(
+        "stub", "stub", "", chat_model=stub_chat_model(config["llm_latency"]),
+        cache_path=""
+    )
+    service = AnalysisService(
+        code_db, llm=llm, k=config["k"], dedup=config["dedup"], mode=config["mode"],
+        group_size=config["group_size"], lexical_index=lexical_index, retrieval_cache_dir=""
+    )
+
+    _, _, wall, error = service.analyze("bench", repo)
+    if error is not None:
+        raise error
+
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {**config, **summarize(Tracer.totals("bench"), wall, peak_rss_kb)}
+
+def __child(config: Dict[str, Any], results: multiprocessing.Queue) -> None:
+    # Keep the pipeline's debug prints out of the benchmark report
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        results.put(run_once(config))
+    except Exception as e:
+        results.put({"error": repr(e)})
+
+def run_isolated(config: Dict[str, Any]) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=__child, args=(config, results))
+    process.start()
+    # A child killed by the OOM killer or failing before run_once never reports back
+    result = None
+    while result is None:
+        try:
+            result = results.get(timeout=1.0)
+        except queue.Empty:
+            if process.exitcode is None:
+                continue
+            try:
+                # It may have reported just before exiting
+                result = results.get(timeout=1.0)
+            except queue.Empty:
+                raise RuntimeError(f"benchmark {config} failed: the worker exited with code "
+                                   f"{process.exitcode} without a result") from None
+    process.join()
+    if "error" in result:
+        raise RuntimeError(f"benchmark {config} failed: {result['error']}")
+    return result
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    columns = ["retrieve", "retrieve/split", "retrieve/embed", "retrieve/search", "generate"]
+    header = f"{'files':>6} {'chunk':>6} {'k':>4} | {'wall (s)':>9} | " + \
+        " | ".join(f"{column:>15}" for column in columns) + \
+        f" | {'chunks/s':>9} | {'dedup':>6} | {'RSS (MB)':>9}"
+    print("\nBenchmark Summary:")
+    print("-" * len(header))
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        stages = dict(result["stages_s"])
+        # Both generate nodes share a column
+        stages["generate"] = stages.get("generate", 0.0) + stages.get("generate_map_reduce", 0.0)
+        print(
+            f"{result['repo_size']:>6} {result['chunk_size']:>6} {result['k']:>4} | "
+            f"{result['wall_s']:>9.3f} | " +
+            " | ".join(f"{stages.get(column, 0.0):>15.3f}" for column in columns) +
+            f" | {result['chunks_per_s']:>9.1f} | {result['dedup_ratio']:>6.1%}"
+            f" | {result['peak_rss_mb']:>9.1f}"
+        )
+    print("-" * len(header))
+
+def __int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline TCM pipeline benchmark")
+    parser.add_argument("--repo-sizes", type=__int_list, default=[50, 200],
+                        help="Comma separated numbers of fixture files (default 50,200)")
+    parser.add_argument("--chunk-sizes", type=__int_list, default=[200],
+                        help="Comma separated splitter chunk sizes in tokens (default 200)")
+    parser.add_argument("--ks", type=__int_list, default=[3],
+                        help="Comma separated numbers of parts sent to the LLM (default 3)")
+    parser.add_argument("--llm-latency", type=float, default=0.0,
+                        help="Seconds the stub LLM waits before answering (default 0)")
+    parser.add_argument("--mode", type=str, choices=["llm", "map-reduce"], default="llm",
+                        help="Single prompt or map-reduce over groups of parts (default llm)")
+    parser.add_argument("--group-size", type=int, default=3,
+                        help="Parts per prompt in map-reduce mode (default 3)")
+    parser.add_argument("--lexical", action="store_true",
+                        help="Only embed chunks passing the BM25 lexical prefilter")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Query every chunk instead of collapsing duplicates first")
+    parser.add_argument("--output", type=str, default="",
+                        help="(optional) JSON file to write the raw results to")
+    args = parser.parse_args()
+
+    results = []
+    for repo_size, chunk_size, k in itertools.product(args.repo_sizes, args.chunk_sizes, args.ks):
+        config = {
+            "repo_size": repo_size,
+            "chunk_size": chunk_size,
+            "k": k,
+            "llm_latency": args.llm_latency,
+            "dedup": not args.no_dedup,
+            "mode": args.mode,
+            "group_size": args.group_size,
+            "lexical": args.lexical
+        }
+        print(f"(DEBUG): Running {config}")
+        results.append(run_isolated(config))
+
+    print_table(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
@@ -0,0 +1,176 @@
+import os
+import re
+import math
+import random
+import time
+import hashlib
+
+# Global Imports
+from typing import Any, Dict, List
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+BENCH_ANSWER = "Strategy Pattern: the user code defines interchangeable implementations."
+
+class HashEmbeddings(Embeddings):
+    """
+    Deterministic, offline stand-in for the Gemini embedding model.
+
+    Identifiers are split on camelCase/underscores and hashed into a fixed number of buckets
+    (feature hashing), then L2-normalized, so texts sharing identifiers end up close together.
+    """
+    def __init__(self, size: int=256) -> None:
+        self.size = size
+
+    def __embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for word in re.findall(r"[A-Za-z][a-z0-9]*|[0-9]+", text):
+            digest = hashlib.md5(word.lower().encode("utf-8")).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.size
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.__embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.__embed(text)
+
+class SlowFakeListChatModel(FakeListChatModel):
+    """FakeListChatModel only sleeps while streaming, this one also sleeps on invoke."""
+    def _call(self, *args: Any, **kwargs: Any) -> str:
+        if self.sleep:
+            time.sleep(self.sleep)
+        return super()._call(*args, **kwargs)
+
+def stub_chat_model(latency: float=0.0) -> FakeListChatModel:
+    """Offline stand-in for Claude that answers after `latency` seconds."""
+    return SlowFakeListChatModel(responses=[BENCH_ANSWER], sleep=latency)
+
+# One template per kind of class the fixture repository is made of
+_TEMPLATES = {
+    "Strategy Pattern": """\
+package bench.{package};
+
+public interface {name}Strategy {{
+    int apply(int left, int right);
+}}
+
+class {name}Add implements {name}Strategy {{
+    public int apply(int left, int right) {{ return left + right; }}
+}}
+
+class {name}Context {{
+    private {name}Strategy strategy;
+    public {name}Context({name}Strategy strategy) {{ this.strategy = strategy; }}
+    public int execute(int left, int right) {{ return strategy.apply(left, right); }}
+}}
+""",
+    "Builder": """\
+package bench.{package};
+
+public class {name} {{
+    private final String first;
+    private final int second;
+
+    private {name}(Builder builder) {{
+        this.first = builder.first;
+        this.second = builder.second;
+    }}
+
+    public static class Builder {{
+        private String first;
+        private int second;
+        public Builder first(String first) {{ this.first = first; return this; }}
+        public Builder second(int second) {{ this.second = second; return this; }}
+        public {name} build() {{ return new {name}(this); }}
+    }}
+}}
+""",
+    "Observer": """\
+package bench.{package};
+
+import java.util.ArrayList;
+import java.util.List;
+
+public class {name}Subject {{
+    private final List<{name}Observer> observers = new ArrayList<>();
+    public void attach({name}Observer observer) {{ observers.add(observer); }}
+    public void notifyObservers(String event) {{
+        for ({name}Observer observer : observers) {{ observer.update(event); }}
+    }}
+}}
+
+interface {name}Observer {{
+    void update(String event);
+}}
+""",
+    "Plain Object": """\
+package bench.{package};
+
+public class {name} {{
+    private int value{index};
+    private String label{index};
+
+    public int getValue{index}() {{ return value{index}; }}
+    public void setValue{index}(int value) {{ this.value{index} = value; }}
+    public String getLabel{index}() {{ return label{index}; }}
+    public void setLabel{index}(String label) {{ this.label{index} = label; }}
+}}
+""",
+}
+
+def make_fixture_repo(root: str, num_files: int, seed: int=0) -> str:
+    """
+    Writes a deterministic Java repository of `num_files` files under `root/src`.
+
+    Returns:
+        str: the repository root, usable as `--repository` with the snapshot loaders
+    """
+    rng = random.Random(seed)
+    kinds = sorted(_TEMPLATES)
+    for index in range(num_files):
+        kind = rng.choice(kinds)
+        package = f"pkg{index % 10}"
+        name = f"{kind.title().replace(' ', '')}{index}"
+        path = os.path.join(root, "src", package, f"{name}.java")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(_TEMPLATES[kind].format(package=package, name=name, index=index))
+    return root
+
+def training_documents() -> List[Document]:
+    """Labelled training chunks standing in for the TC-Examples collection."""
+    documents = []
+    for kind, template in sorted(_TEMPLATES.items()):
+        if kind == "Plain Object":
+            continue
+        for index in range(5):
+            documents.append(Document(
+                page_content=template.format(package="examples", name=f"Example{index}",
+                                             index=index),
+                metadata={
+                    "type": "source",
+                    "tech_credit": kind,
+                    "tech_credit_description": f"Example of the {kind} design pattern."
+                }
+            ))
+    return documents
+
+def summarize(totals: Dict[str, Any], wall: float, peak_rss_kb: int) -> Dict[str, Any]:
+    """Flattens Tracer totals of one run into a benchmark result row."""
+    spans = totals["spans"]
+    counters = totals["counters"]
+    retrieve_time = spans.get("retrieve", {}).get("time", 0.0)
+    return {
+        "wall_s": wall,
+        "stages_s": {name: span["time"] for name, span in spans.items() if name != "run"},
+        "counters": counters,
+        "chunks_per_s": counters.get("chunks", 0) / retrieve_time if retrieve_time else 0.0,
+        "dedup_ratio": counters.get("duplicate_chunks", 0) / counters["chunks"]
+            if counters.get("chunks") else 0.0,
+        "peak_rss_mb": peak_rss_kb / 1024,
+    }
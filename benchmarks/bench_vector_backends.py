@@ -0,0 +1,141 @@
+"""
+Compares the Chroma and NumPy flat index vector store backends offline.
+
+Both backends get the same documents and queries, embedded with the deterministic hash model, and
+are timed on building the collection, answering one large query batch, and answering queries one
+at a time. Recall is the share of returned neighbors that are among the true 4 nearest neighbors
+(ties included), computed by brute force; Chroma's HNSW index is approximate.
+
+    python benchmarks/bench_vector_backends.py --docs 1000,5000 --queries 500
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+
+# Local Imports
+from bench_support import HashEmbeddings
+
+from tcm.database.database_chroma import ChromaDB
+from tcm.database.database_numpy import NumpyFlatDB
+from tcm.database.database_vector import VectorDB
+from tcm.rag.rag_embeddings import TCMEmbeddings
+
+# Global Imports
+from typing import Any, Dict, List
+from langchain_core.documents import Document
+
+WORDS = [
+    "strategy", "builder", "observer", "factory", "context", "apply", "notify", "attach", "build",
+    "value", "label", "list", "map", "stream", "filter", "visitor", "accept", "command", "execute",
+    "undo", "adapter", "target", "request", "proxy", "subject", "state", "handle", "decorator",
+]
+
+def make_texts(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS).title() + str(rng.randint(0, 50)) for _ in range(40))
+        for _ in range(count)
+    ]
+
+def bench_backend(db: VectorDB, docs: List[Document], queries: List[str],
+                  single: int) -> Dict[str, Any]:
+    start = time.time()
+    for offset in range(0, len(docs), 1000):
+        batch = docs[offset:offset + 1000]
+        db.upsert(batch, [str(offset + i) for i in range(len(batch))])
+    build = time.time() - start
+
+    start = time.time()
+    results = db.query_batch(queries, 4)
+    batch_time = time.time() - start
+
+    latencies = []
+    for query in queries[:single]:
+        start = time.time()
+        db.query_batch([query], 4)
+        latencies.append(time.time() - start)
+
+    return {
+        "build_s": build,
+        "batch_s": batch_time,
+        "batch_qps": len(queries) / batch_time if batch_time else 0.0,
+        "single_p50_ms": statistics.median(latencies) * 1000,
+        "neighbors": [[doc.id for doc, _ in row] for row in results]
+    }
+
+def recall(similarities: np.ndarray, neighbors: List[List[str]], n: int=4) -> float:
+    hits = 0
+    for row, row_neighbors in zip(similarities, neighbors):
+        kth = np.sort(row)[-n]
+        hits += sum(1 for doc_id in row_neighbors if row[int(doc_id)] >= kth - 1e-6)
+    return hits / (n * len(neighbors)) if neighbors else 1.0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chroma vs NumPy flat index benchmark")
+    parser.add_argument("--docs", type=str, default="1000,5000",
+                        help="Comma separated collection sizes (default 1000,5000)")
+    parser.add_argument("--queries", type=int, default=500,
+                        help="Number of queries in the batch (default 500)")
+    parser.add_argument("--single", type=int, default=50,
+                        help="Number of one-at-a-time queries timed (default 50)")
+    parser.add_argument("--dim", type=int, default=768,
+                        help="Embedding dimension (default 768, like text-embedding-004)")
+    parser.add_argument("--output", type=str, default="",
+                        help="(optional) JSON file to write the raw results to")
+    args = parser.parse_args()
+
+    hash_embeddings = HashEmbeddings(args.dim)
+    emb = TCMEmbeddings("hash", cache_path="", embeddings=hash_embeddings)
+    queries = make_texts(args.queries, seed=1)
+    query_vectors = np.asarray(hash_embeddings.embed_documents(queries))
+
+    rows = []
+    for size in [int(item) for item in args.docs.split(",") if item]:
+        texts = make_texts(size, seed=0)
+        docs = [Document(page_content=text) for text in texts]
+        similarities = query_vectors @ np.asarray(hash_embeddings.embed_documents(texts)).T
+        workdir = tempfile.mkdtemp(prefix="tcm-vector-bench-")
+
+        backends = {
+            "chroma": ChromaDB(f"bench_{size}", emb, os.path.join(workdir, "chroma")),
+            "numpy": NumpyFlatDB(f"bench_{size}", emb, os.path.join(workdir, "numpy")),
+            "numpy-f16": NumpyFlatDB(f"bench_{size}", emb, os.path.join(workdir, "numpy16"),
+                                     dtype="float16"),
+        }
+        results = {name: bench_backend(db, docs, queries, args.single)
+                   for name, db in backends.items()}
+
+        for name, result in results.items():
+            rows.append({
+                "docs": size,
+                "backend": name,
+                "recall": recall(similarities, result["neighbors"]),
+                **{key: value for key, value in result.items() if key != "neighbors"}
+            })
+
+    header = f"{'docs':>6} {'backend':<10} | {'build (s)':>9} | {'batch (s)':>9} | " \
+        f"{'batch q/s':>10} | {'1-query p50 (ms)':>16} | {'recall':>6}"
+    print("\nVector Backend Summary:")
+    print("-" * len(header))
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['docs']:>6} {row['backend']:<10} | {row['build_s']:>9.3f} | "
+              f"{row['batch_s']:>9.3f} | {row['batch_qps']:>10.1f} | "
+              f"{row['single_p50_ms']:>16.2f} | {row['recall']:>6.3f}")
+    print("-" * len(header))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=4)
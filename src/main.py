@@ -6,22 +6,46 @@ import argparse
 # Local Imports
 from tcm.helper.helper_filters import FileFilters
 from tcm.helper.helper_secrets import SecretsLoader
-from tcm.helper.helper_constants import JINJA_PROMPT
+from tcm.helper.helper_state import ANALYSIS_MODES
 from tcm.helper.helper_document import DocumentHelper
-from tcm.helper.helper_state import init_app
+from tcm.helper.helper_limits import ConcurrencyLimits
+from tcm.helper.helper_trace import TRACE_PATH, Tracer
+from tcm.helper.helper_checkpoint import CHECKPOINT_PATH, RESULTS_PATH, ResultsStore
 
-from tcm.github.github_loader import GithubLoader
+from tcm.github.github_cache import REPO_CACHE_DIR, RepoCache
+from tcm.github.github_client import GITHUB_API_URL, GithubClient
+from tcm.github.github_snapshot_loader import LOADER_BACKENDS, make_loader
 
 from tcm.splitter.splitter_token_splitter import TokenSplitter
 from tcm.splitter.splitter_webscraper import Webscraper
 
 from tcm.database.database_chroma import ChromaDB
+from tcm.database.database_numpy import NumpyFlatDB
+from tcm.database.database_vector import VECTOR_BACKENDS, VectorDB
+from tcm.database.database_lexical import LexicalIndex
+from tcm.database.database_index_pack import INDEX_PACK_PATH, IndexPack
+from tcm.database.database_manifest import TrainingManifest
+from tcm.database.database_retrieval_cache import RETRIEVAL_CACHE_DIR
 
 from tcm.rag.rag_embeddings import TCMEmbeddings
-from tcm.rag.rag_llm import LargeLanguageModel
+from tcm.rag.rag_llm import LLM_CACHE_PATH
+from tcm.rag.rag_prompt_packer import PROMPT_TOKEN_BUDGET
+
+from tcm.server.server_http import AnalysisServer
+from tcm.server.server_service import AnalysisService
 
 # Global Imports
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from langchain_core.documents import Document
+
+TRAINING_ARTICLE_URL = "https://cacm.acm.org/opinion/technical-credit/"
+TRAINING_REPO_URL = "https://github.com/alexsun2/TC-Examples"
+TRAINING_METADATA_PATH = "./repo_metadata.json"
+CHROMA_DIR = "./src/tcm/database/chroma_langchain_db"
+NUMPY_DIR = "./src/tcm/database/numpy_flat_db"
+WEB_CHUNK_SIZE = 1000
+WEB_CHUNK_OVERLAP = 100
 
 def init() -> None:
     print("=" * 50)
@@ -36,23 +60,44 @@ def init() -> None:
     os.environ["GITHUB_PA_TOKEN"] = SecretsLoader.get_token("GITHUB_PA_TOKEN", envfile)
 
 
-def train(code_db: ChromaDB, web_db: ChromaDB) -> None:
+def train(
+        code_db: VectorDB,
+        web_db: VectorDB,
+        manifest: TrainingManifest,
+        lexical_index: LexicalIndex,
+        retrain: bool=False,
+        loader_backend: str="tarball"
+) -> None:
     print("=" * 50)
     print("(DEBUG): Training LLM")
+
+    fingerprint = TrainingManifest.hash_text(json.dumps({
+        "config": manifest.config,
+        "metadata": TrainingManifest.hash_file(TRAINING_METADATA_PATH)
+    }, sort_keys=True))
+
+    # An index missing from an older training run is rebuilt, without embedding anything again
+    if not retrain and manifest.is_current(fingerprint) and len(lexical_index) > 0:
+        print("(DEBUG): Training manifest is up to date, skipping training\n")
+        return
+
     print("(DEBUG): Loading TC article\n")
-    scraper = Webscraper("https://cacm.acm.org/opinion/technical-credit/")
-    chunks = scraper.tokenize_document()
+    scraper = Webscraper(TRAINING_ARTICLE_URL)
+    chunks = scraper.tokenize_document(
+        chunk_size=WEB_CHUNK_SIZE,
+        chunk_overlap=WEB_CHUNK_OVERLAP
+    )
     scraper.debug_chunks()
-    web_db.add(chunks)
+    __sync_collection(web_db, manifest, "web_tech_credit", {TRAINING_ARTICLE_URL: chunks})
 
     print("(DEBUG): Loading TC training repository\n")
-    gh_loader = GithubLoader("https://github.com/alexsun2/TC-Examples")
+    gh_loader = make_loader(TRAINING_REPO_URL, backend=loader_backend)
     gh_loader.load_repo(FileFilters.JAVA_FILES, debug_lvl=1)
 
     metadata_map = {}
 
     try:
-        with open('./repo_metadata.json', 'r', encoding='utf-8') as f:
+        with open(TRAINING_METADATA_PATH, 'r', encoding='utf-8') as f:
             metadata_map = json.load(f)
 
         #print(metadata_map)
@@ -61,58 +106,109 @@ def train(code_db: ChromaDB, web_db: ChromaDB) -> None:
         print("Could not open repo metadata file! Make sure it exists in the root directory.", e)
         print("Skipping metadata...")
 
-    split_docs = DocumentHelper(
-        TokenSplitter.split_documents(gh_loader.get_docs(), metadata_map=metadata_map)
-    )
+    # The path of a training chunk names the example a kNN vote came from
+    sources = {}
+    for doc in gh_loader.get_docs():
+        sources[doc.metadata.get("path", "")] = TokenSplitter.split_documents(
+            [doc], metadata_map=metadata_map, keep_path=True
+        )
+
+    split_docs = DocumentHelper([chunk for splits in sources.values() for chunk in splits])
     split_docs.debug()
     # split_docs.debug_all()
 
-    code_db.add(split_docs.get_docs())
-
-def main(code_emb_db: ChromaDB, params: Dict[str, Dict[str, str]]) -> None:
+    __sync_collection(code_db, manifest, "tech_credit_code", sources)
+    lexical_index.build(split_docs.get_docs())
+    lexical_index.save()
+    manifest.save(fingerprint)
+
+def __sync_collection(
+        db: VectorDB,
+        manifest: TrainingManifest,
+        collection: str,
+        sources: Dict[str, List[Document]]
+) -> None:
+    """Embeds only new or changed chunks into a collection and removes stale ones."""
+    # A manifest new to the collection (first incremental run, or a new config) has never seen
+    # what is already stored, e.g. the random-ID duplicates of earlier runs: sweep all of it
+    existing_ids = db.ids() if not manifest.collection_ids(collection) else None
+    new_docs, new_ids, stale_ids = manifest.plan(collection, sources, existing_ids)
+    total = sum(len(chunks) for chunks in sources.values())
+    print(f"(DEBUG): {collection}: {len(new_ids)} new, {len(stale_ids)} stale, "
+          f"{total - len(new_ids)} unchanged chunks\n")
+
+    db.upsert(new_docs, new_ids)
+    db.delete(stale_ids)
+
+def main(
+        service: AnalysisService,
+        params: Dict[str, Dict[str, str]],
+        concurrency: int=1,
+        resume: bool=False,
+        results_path: str=RESULTS_PATH
+) -> None:
     print("(DEBUG): Running Prompt")
 
     start_total = time.time()
 
-    llm = LargeLanguageModel(
-        "claude-3-5-sonnet-latest", 
-        "anthropic", 
-        "CLAUDE_API_KEY", 
-        temperature=0
-    )
-    user_tmp = llm.generate_jinja_prompt_template(JINJA_PROMPT)
-    prompt = llm.generate_chat_prompt()
-
-    # llm.debug_chat_prompt()
-
-    graph = init_app()
-
-    responses = {}
-    runtimes = []
-
-    for key, item in params.items():
-        start_repo = time.time()
-        response = graph.invoke({
-            "question": "Tell me what tech credits does the repo possibly use?",
-            "url": item["url"], 
-            "branch": item["branch"], 
-            "folder": item["folder"], 
-            "vector_db": code_emb_db, 
-            "user_prompt_template": user_tmp, 
-            "prompt": prompt, 
-            "llm": llm
-        })
-        
-        end_repo = time.time()
-        duration_repo = end_repo - start_repo
-        runtimes.append((key, duration_repo))
-
-        print(response["answer"])
-        responses[key] = response["answer"]
+    # Every finished repository is appended right away, so an interrupted batch keeps its work
+    store = ResultsStore(results_path)
+    completed = store.completed() if resume else {}
+    reused = set()
+
+    def __analyze(
+            key: str,
+            item: Dict[str, str]
+    ) -> Tuple[str, Optional[str], float, Optional[Exception]]:
+        try:
+            commit = service.resolve_commit(item["url"], item["branch"])
+        except Exception:
+            # The analysis will fail on the same error and report it
+            commit = ""
+
+        # Without a commit (API loader, local directory) the contents may have changed since
+        identity = ResultsStore.identity(item["url"], item["branch"], item["folder"], commit)
+        if commit and identity in completed:
+            reused.add(key)
+            return key, completed[identity]["answer"], completed[identity]["duration"], None
+
+        key, answer, duration_repo, error = service.analyze(
+            key, item["url"], item["branch"], item["folder"], commit=commit, resume=resume
+        )
+        if error is None:
+            store.append({
+                "key": key,
+                "url": item["url"],
+                "branch": item["branch"],
+                "folder": item["folder"],
+                "commit": commit,
+                "answer": answer,
+                "duration": duration_repo,
+                "completed_at": time.time()
+            })
+        return key, answer, duration_repo, error
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(__analyze, key, item) for key, item in params.items()]
+        for future in as_completed(futures):
+            key, answer, duration_repo, error = future.result()
+            results[key] = (answer, duration_repo, error)
+
+            if error is not None:
+                print(f"(ERROR): {key} failed after {duration_repo:.2f}s: {error!r}")
+            elif key in reused:
+                print(f"(DEBUG): {key} already analyzed at this commit, skipping")
+            else:
+                print(answer)
 
     end_total = time.time()
     duration_total = end_total - start_total
 
+    # Keep the input order regardless of completion order
+    responses = {key: results[key][0] for key in params if results[key][2] is None}
+    runtimes = [(key, results[key][1], results[key][2] is None) for key in params]
+
     with open("responses.json", "w", encoding="utf-8") as f:
         json.dump(responses, f, indent=4)
 
@@ -121,11 +217,16 @@ def main(code_emb_db: ChromaDB, params: Dict[str, Dict[str, str]]) -> None:
     print("-" * 50)
     print(f"{'Repo':<20} | {'Time (s)':>10}")
     print("-" * 50)
-    for key, duration in runtimes:
-        print(f"{key:<20} | {duration:>10.2f}")
+    for key, duration, succeeded in runtimes:
+        status = "  (failed)" if not succeeded else "  (reused)" if key in reused else ""
+        print(f"{key:<20} | {duration:>10.2f}{status}")
     print("-" * 50)
     print(f"{'TOTAL':<20} | {duration_total:>10.2f}")
     print("-" * 50)
+
+    Tracer.print_summary()
+    if service.llm is not None:
+        print(f"(DEBUG): LLM response cache: {service.llm.cache_stats()}")
         
 
 if __name__ == "__main__":
@@ -138,22 +239,230 @@ if __name__ == "__main__":
                         default="")
     parser.add_argument("--json", type=str, 
                         help="(optional) JSON file path (for multiple repositories)")
+    parser.add_argument("--loader", type=str, choices=LOADER_BACKENDS, default="tarball",
+                        help="How repositories are fetched: one archive download (default "
+                        "\"tarball\"), a shallow \"git\" clone, or per-file \"api\" calls")
+    train_group = parser.add_mutually_exclusive_group()
+    train_group.add_argument("--skip-train", action="store_true",
+                             help="Skip the training phase and use the existing collections")
+    train_group.add_argument("--retrain", action="store_true",
+                             help="Re-fetch training sources even if the manifest is up to date")
+    parser.add_argument("--taxonomy", type=str, choices=["local", "remote"], default="local",
+                        help="Read the tech credit patterns from docs/ (default \"local\") or from "
+                        "a cached copy of the TC-Examples repository (\"remote\")")
+    parser.add_argument("--k", type=int, default=3,
+                        help="Number of most similar user code snippets sent to the LLM (default 3)")
+    parser.add_argument("--vector-backend", type=str, choices=VECTOR_BACKENDS, default="chroma",
+                        help="Vector store for the training collections: \"chroma\" (default) or "
+                        "an in-process \"numpy\" flat index")
+    parser.add_argument("--vector-dtype", type=str, choices=["float32", "float16"],
+                        default="float32",
+                        help="Storage precision of the numpy backend (default \"float32\")")
+    parser.add_argument("--mode", type=str, choices=ANALYSIS_MODES, default="llm",
+                        help="\"llm\" asks Claude about the most similar code (default), "
+                        "\"map-reduce\" asks about groups of --group-size parts in parallel and "
+                        "merges the answers, \"fast\" ranks tech credits by kNN votes of every "
+                        "chunk's training neighbors, without any LLM call")
+    parser.add_argument("--group-size", type=int, default=3,
+                        help="Parts per prompt in map-reduce mode (default 3)")
+    parser.add_argument("--prompt-budget", type=int, default=PROMPT_TOKEN_BUDGET,
+                        help="Max tokens of the LLM prompt, filled with the taxonomy, then the best "
+                        f"parts, then documentation (default {PROMPT_TOKEN_BUDGET}, 0 for no limit)")
+    parser.add_argument("--lexical-prefilter", action="store_true",
+                        help="Only embed and search the chunks sharing enough identifiers and "
+                        "keywords with the training examples (BM25), fusing both scores")
+    parser.add_argument("--min-lexical-score", type=float, default=0.25,
+                        help="Normalized BM25 score (0 to 1) a chunk needs to pass the lexical "
+                        "prefilter (default 0.25)")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Query every chunk, instead of one chunk per cluster of exact and "
+                        "near-duplicate chunks")
+    parser.add_argument("--max-queries", type=int, default=0,
+                        help="Max chunks per repository sent to the vector store, the others are "
+                        "sampled and only the most promising files are fully queried (default 0, "
+                        "no limit)")
+    parser.add_argument("--time-budget", type=float, default=0.0,
+                        help="Seconds after which retrieval of a repository stops querying new "
+                        "chunks (default 0, no limit)")
+    parser.add_argument("--index-pack", type=str, default=INDEX_PACK_PATH,
+                        help="Index pack imported instead of training when the training database "
+                        f"is empty (default \"{INDEX_PACK_PATH}\")")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip repositories already in the results file at the same commit and "
+                        "continue interrupted analyses from their last finished graph node")
+    parser.add_argument("--results", type=str, default=RESULTS_PATH,
+                        help=f"JSONL file each finished analysis is appended to "
+                        f"(default \"{RESULTS_PATH}\")")
+    parser.add_argument("--full-analysis", action="store_true",
+                        help="Retrieve every file again instead of only the files changed since the "
+                        "last analysis of the same repository, branch and folder")
+    llm_cache_group = parser.add_mutually_exclusive_group()
+    llm_cache_group.add_argument("--no-llm-cache", action="store_true",
+                                 help="Do not read or write the LLM response cache")
+    llm_cache_group.add_argument("--refresh-llm-cache", action="store_true",
+                                 help="Always call the LLM and overwrite cached responses")
+    parser.add_argument("--trace", type=str, default=TRACE_PATH,
+                        help=f"JSONL file that per-stage spans and counters are appended to "
+                        f"(default \"{TRACE_PATH}\", \"\" to disable)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Number of repositories analyzed at the same time (default 1)")
+    parser.add_argument("--github-limit", type=int, default=4,
+                        help="Max concurrent GitHub requests (default 4)")
+    parser.add_argument("--github-api-url", type=str, default=GITHUB_API_URL,
+                        help=f"GitHub REST API root, e.g. a local mock server "
+                        f"(default \"{GITHUB_API_URL}\")")
+    parser.add_argument("--embedding-limit", type=int, default=4,
+                        help="Max concurrent embedding requests (default 4)")
+    parser.add_argument("--llm-limit", type=int, default=2,
+                        help="Max concurrent LLM requests (default 2)")
+
+    subparsers = parser.add_subparsers(dest="command")
+    cache_parser = subparsers.add_parser("cache", help="Manage the on-disk repository cache")
+    cache_parser.add_argument("action", choices=["prune"])
+    cache_parser.add_argument("--max-mb", type=int, default=0,
+                              help="Evict least recently used snapshots down to this size "
+                              "(default 0, empties the cache)")
+    serve_parser = subparsers.add_parser(
+        "serve", help="Keep the models warm and analyze repositories sent over HTTP"
+    )
+    serve_parser.add_argument("--host", type=str, default="127.0.0.1",
+                              help="Address to listen on (default \"127.0.0.1\")")
+    serve_parser.add_argument("--port", type=int, default=8765,
+                              help="Port to listen on (default 8765)")
+    serve_parser.add_argument("--socket", type=str, default="",
+                              help="(optional) Unix socket path to listen on instead of host/port")
+    serve_parser.add_argument("--workers", type=int, default=2,
+                              help="Number of repositories analyzed at the same time (default 2)")
+    serve_parser.add_argument("--queue-size", type=int, default=16,
+                              help="Max requests waiting for a worker before new ones get a 503 "
+                              "(default 16)")
+    index_parser = subparsers.add_parser(
+        "index", help="Export the trained collections to an index pack, or import one"
+    )
+    index_parser.add_argument("action", choices=["export", "import"])
+    index_parser.add_argument("path", type=str, nargs="?", default=INDEX_PACK_PATH,
+                              help=f"Index pack file (default \"{INDEX_PACK_PATH}\")")
     args = parser.parse_args()
 
+    if args.command == "cache":
+        freed = RepoCache().prune(max_bytes=args.max_mb * 1024 ** 2)
+        print(f"(DEBUG): Freed {freed / 1024 ** 2:.2f} MB from {REPO_CACHE_DIR}")
+        raise SystemExit(0)
+
     init()
 
-    emb = TCMEmbeddings("models/text-embedding-004")
-    code_emb_db = ChromaDB("tech_credit_code", emb, './src/tcm/database/chroma_langchain_db')
-    web_emb_db = ChromaDB("web_tech_credit", emb, './src/tcm/database/chroma_langchain_db')
+    ConcurrencyLimits.configure(
+        github=args.github_limit,
+        embedding=args.embedding_limit,
+        llm=args.llm_limit
+    )
+    GithubClient.configure(base_url=args.github_api_url, pool_size=args.github_limit)
 
-    train(code_emb_db, web_emb_db)
+    TokenSplitter.configure_cache()
+    Tracer.configure(args.trace)
+
+    emb = TCMEmbeddings("models/text-embedding-004")
+    if args.vector_backend == "numpy":
+        db_dir = NUMPY_DIR
+        code_emb_db = NumpyFlatDB("tech_credit_code", emb, db_dir, dtype=args.vector_dtype)
+        web_emb_db = NumpyFlatDB("web_tech_credit", emb, db_dir, dtype=args.vector_dtype)
+    else:
+        db_dir = CHROMA_DIR
+        code_emb_db = ChromaDB("tech_credit_code", emb, db_dir)
+        web_emb_db = ChromaDB("web_tech_credit", emb, db_dir)
+
+    # Each backend directory keeps its own manifest of the chunks it holds
+    manifest_path = os.path.join(db_dir, "training_manifest.json")
+    training_config = {
+        "embedding_model": emb.get_model_name(),
+        "splitter": TokenSplitter.config(),
+        "web_splitter": {"chunk_size": WEB_CHUNK_SIZE, "chunk_overlap": WEB_CHUNK_OVERLAP},
+        "article_url": TRAINING_ARTICLE_URL,
+        "training_repo": TRAINING_REPO_URL
+    }
+    manifest = TrainingManifest(manifest_path, training_config)
+    lexical_index = LexicalIndex(os.path.join(db_dir, "lexical_index.json"))
+
+    collections: Dict[str, VectorDB] = {
+        "tech_credit_code": code_emb_db,
+        "web_tech_credit": web_emb_db
+    }
+    packed_files = {
+        "training_manifest.json": manifest_path,
+        "lexical_index.json": lexical_index.path
+    }
+    pack_path = args.path if args.command == "index" else args.index_pack
+    is_empty = not any(manifest.collection_ids(name) for name in collections)
+    # An empty database starts from the pack, also when analyzing without training; only a
+    # retraining rebuilds it from the sources
+    auto_import = is_empty and os.path.exists(pack_path) and \
+        (args.skip_train or not args.retrain)
+
+    if (args.command == "index" and args.action == "import") or auto_import:
+        print(f"(DEBUG): Importing index pack {pack_path}")
+        with Tracer.run("index-import"):
+            header = IndexPack.load(pack_path, collections, emb.get_model_name(), packed_files)
+        if header["config"] != training_config:
+            # The config is part of every chunk ID, so none of the packed chunks is kept
+            print("(WARNING): The index pack was built with another training config, the next "
+                  "training deletes and re-embeds the whole collection")
+        print(f"(DEBUG): Imported {header['collections']}")
+        if args.command == "index":
+            raise SystemExit(0)
+        manifest = TrainingManifest(manifest_path, training_config)
+        lexical_index = LexicalIndex(lexical_index.path)
+
+    if not args.skip_train:
+        with Tracer.run("train"):
+            train(code_emb_db, web_emb_db, manifest, lexical_index, retrain=args.retrain,
+                  loader_backend=args.loader)
+
+    if args.command == "index":
+        header = IndexPack.export(pack_path, collections, emb.get_model_name(), training_config,
+                                  packed_files)
+        print(f"(DEBUG): Exported {header['collections']} to {pack_path}")
+        raise SystemExit(0)
+
+    if args.lexical_prefilter and len(lexical_index) == 0:
+        print("(WARNING): No lexical index in the training database, run training again to use "
+              "--lexical-prefilter; analyzing without it")
+    service = AnalysisService(
+        code_emb_db,
+        loader_backend=args.loader,
+        taxonomy_source=args.taxonomy,
+        k=args.k,
+        dedup=not args.no_dedup,
+        max_queries=args.max_queries,
+        time_budget=args.time_budget,
+        mode=args.mode,
+        prompt_budget=args.prompt_budget,
+        group_size=args.group_size,
+        lexical_index=lexical_index if args.lexical_prefilter and len(lexical_index) else None,
+        min_lexical_score=args.min_lexical_score,
+        llm_cache_path="" if args.no_llm_cache else LLM_CACHE_PATH,
+        refresh_llm_cache=args.refresh_llm_cache,
+        retrieval_cache_dir="" if args.full_analysis else RETRIEVAL_CACHE_DIR,
+        # Concurrent server requests for the same repository would share a checkpoint thread
+        checkpoint_path="" if args.command == "serve" else CHECKPOINT_PATH
+    )
 
     # url = "https://github.com/alexsun2/cs3500lab9"
 
-    if args.json:
+    if args.command == "serve":
+        server = AnalysisServer(service, workers=args.workers, queue_size=args.queue_size)
+        kind, address = server.start(args.host, args.port, args.socket)
+        print(f"(DEBUG): Serving analyses on {kind} {address}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("(DEBUG): Shutting down, finishing queued analyses")
+        finally:
+            server.shutdown()
+    elif args.json:
         with open(args.json, 'r', encoding='utf-8') as f:
             json_args = json.load(f)
-        main(code_emb_db, json_args)
+        main(service, json_args, concurrency=args.concurrency, resume=args.resume,
+             results_path=args.results)
     else:
         llm_args = {
             "repo": {
@@ -162,4 +471,7 @@ if __name__ == "__main__":
                 "folder": args.folder
             }
         }
-        main(code_emb_db, llm_args)
\ No newline at end of file
+        main(service, llm_args, concurrency=args.concurrency, resume=args.resume,
+             results_path=args.results)
+
+    print(f"(DEBUG): Embedding cache: {emb.cache_stats()}")
\ No newline at end of file
@@ -1,19 +1,37 @@
-import heapq
+import hashlib
 
 # Local Imports
+from tcm.database.database_vector import VectorDB
+from tcm.helper.helper_trace import Tracer
 from tcm.rag.rag_embeddings import TCMEmbeddings
 
 # Global Imports
 from langchain_chroma import Chroma
 from langchain.schema import Document
+from chromadb.api.types import Metadata, PyEmbedding
 
 from typing import List, Tuple
 
-class ChromaDB:
-    def __init__(self, collection_name: str, embeddings: TCMEmbeddings, dirname: str="") -> None:
+CHROMA_WRITE_BATCH = 1000
+
+class ChromaDB(VectorDB):
+    def __init__(
+            self,
+            collection_name: str,
+            embeddings: TCMEmbeddings,
+            dirname: str="",
+            embed_batch_size: int=100,
+            query_batch_size: int=500
+    ) -> None:
+        self.embed_batch_size = embed_batch_size
+        self.query_batch_size = query_batch_size
+        self.__embeddings = embeddings.get_embeddings()
+        self.__model_name = embeddings.get_model_name()
+        self.__collection_name = collection_name
+
         chroma_args = {
             "collection_name": collection_name,
-            "embedding_function": embeddings.get_embeddings(),
+            "embedding_function": self.__embeddings,
         }
 
         if dirname != "":
@@ -23,36 +41,116 @@ class ChromaDB:
 
     def add(self, documents: List[Document]) -> List[str]:
        return self.__database.add_documents(documents=documents)
+
+    def upsert(self, documents: List[Document], ids: List[str]) -> List[str]:
+        if not documents:
+            return []
+        return self.__database.add_documents(documents=documents, ids=ids)
+
+    def delete(self, ids: List[str]) -> None:
+        if ids:
+            self.__database.delete(ids=ids)
+
+    def ids(self) -> List[str]:
+        return list(self.__database._collection.get(include=[])["ids"])
+
+    @staticmethod
+    def __embeddings_of(vectors: List[List[float]], positions: List[int]) -> List[PyEmbedding]:
+        return [vectors[i] for i in positions]
+
+    def upsert_vectors(
+            self,
+            documents: List[Document],
+            ids: List[str],
+            vectors: List[List[float]]
+    ) -> List[str]:
+        # Chroma caps the size of a single write
+        for start in range(0, len(documents), CHROMA_WRITE_BATCH):
+            batch = range(start, min(start + CHROMA_WRITE_BATCH, len(documents)))
+            # Chroma rejects empty metadata dicts, entries without any are written without them
+            with_metadata = [i for i in batch if documents[i].metadata]
+            without_metadata = [i for i in batch if not documents[i].metadata]
+
+            if with_metadata:
+                metadatas: List[Metadata] = [documents[i].metadata for i in with_metadata]
+                self.__database._collection.upsert(
+                    ids=[ids[i] for i in with_metadata],
+                    embeddings=ChromaDB.__embeddings_of(vectors, with_metadata),
+                    documents=[documents[i].page_content for i in with_metadata],
+                    metadatas=metadatas
+                )
+            if without_metadata:
+                self.__database._collection.upsert(
+                    ids=[ids[i] for i in without_metadata],
+                    embeddings=ChromaDB.__embeddings_of(vectors, without_metadata),
+                    documents=[documents[i].page_content for i in without_metadata]
+                )
+        return ids
+
+    def export_entries(self) -> Tuple[List[str], List[Document], List[List[float]]]:
+        entries = self.__database._collection.get(
+            include=["embeddings", "documents", "metadatas"]
+        )
+        texts, metadatas, vectors = entries["documents"], entries["metadatas"], entries["embeddings"]
+        if texts is None or metadatas is None or vectors is None:
+            raise ValueError(f"Chroma did not return the entries of {self.__collection_name}")
+
+        return (
+            list(entries["ids"]),
+            [
+                Document(page_content=text, metadata=dict(metadata or {}))
+                for text, metadata in zip(texts, metadatas)
+            ],
+            [list(map(float, vector)) for vector in vectors]
+        )
     
-    def top_k_similar_queries(
+    def query_batch(
             self,
             queries: List[str],
-            k: int=3,
             top_docs_per_query: int=4
-    ) -> List[Tuple[str, List[Document], float]]:
-        heap = []
-        
-        for query in queries:
-            results = self.__database.similarity_search_with_score(query, k=top_docs_per_query)
-            if not results:
-                continue
-
-            def __scoring_fn(results: List[Tuple[Document, float]]) -> float:
-                """Default scoring function: returns the minimum score"""
-                return min(score for _, score in results)
-            
-            agg_score = __scoring_fn(results)
-            docs = [doc for doc, _ in results]
-
-            heapq.heappush(heap, (-agg_score, query, docs))
-            if len(heap) > k:
-                heapq.heappop(heap)
-
-        top_k = sorted([(-score, query, docs) for score, query, docs in heap], reverse=True)
-        return [(query, docs, score) for score, query, docs, in top_k]
+    ) -> List[List[Tuple[Document, float]]]:
+        """Runs a single multi-query search against the collection."""
+        if not queries:
+            return []
+
+        vectors = []
+        with Tracer.span("embed", queries=len(queries)):
+            for start in range(0, len(queries), self.embed_batch_size):
+                vectors.extend(
+                    self.__embeddings.embed_documents(queries[start:start + self.embed_batch_size])
+                )
+
+        with Tracer.span("search", queries=len(queries)):
+            results = self.__database._collection.query(
+                query_embeddings=vectors,
+                n_results=top_docs_per_query,
+                include=["documents", "metadatas", "distances"]
+            )
+        Tracer.count("queries", len(queries))
+
+        texts, metadatas, distances = \
+            results["documents"], results["metadatas"], results["distances"]
+        if texts is None or metadatas is None or distances is None:
+            raise ValueError(f"Chroma did not return the results of {self.__collection_name}")
+
+        return [
+            [
+                (Document(page_content=text, metadata=dict(metadata or {}), id=doc_id), distance)
+                for text, metadata, doc_id, distance in zip(
+                    texts[i], metadatas[i], results["ids"][i], distances[i]
+                )
+            ]
+            for i in range(len(queries))
+        ]
+
+    def fingerprint(self) -> str:
+        ids = sorted(self.ids())
+        key = "\0".join([self.__collection_name, self.__model_name] + ids)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
     
     def similarity_search(self, question: str) -> List[Document]:
-        return self.__database.similarity_search(question)
+        with Tracer.span("search"):
+            return self.__database.similarity_search(question)
 
 
 
@@ -0,0 +1,174 @@
+import io
+import os
+import json
+import time
+import tarfile
+import hashlib
+
+import numpy as np
+
+# Local Imports
+from tcm.database.database_vector import VectorDB
+
+# Global Imports
+from typing import Any, Dict, List
+from langchain_core.documents import Document
+
+INDEX_PACK_PATH = "tcm_index.tcmpack"
+INDEX_PACK_VERSION = 1
+
+class IndexPack:
+    """
+    Single-file, versioned snapshot of the training collections, so a new machine can analyze
+    without scraping, crawling and embedding the training sources first.
+
+    A pack is a gzip-compressed tar, read in one sequential pass. Its first member, `pack.json`,
+    holds the format version, the embedding model, the training config and the SHA-256 of every
+    other member. Each collection follows as `{name}.npy` (float32 embeddings) and `{name}.json`
+    (IDs, texts and metadata), then extra files such as the training manifest and lexical index.
+    Nothing is written until every member has been read and verified.
+    """
+    @staticmethod
+    def __sha256(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def export(
+            path: str,
+            collections: Dict[str, VectorDB],
+            embedding_model: str,
+            config: Dict[str, Any],
+            extra_files: Dict[str, str]
+    ) -> Dict[str, Any]:
+        """
+        Args:
+            path (str): pack file to write
+            collections (Dict[str, VectorDB]): collections to pack, by name
+            embedding_model (str): model the embeddings were computed with
+            config (Dict[str, Any]): training config (splitters, sources) the collections match
+            extra_files (Dict[str, str]): files to pack, by member name; missing files are skipped
+
+        Returns:
+            Dict[str, Any]: the pack header
+        """
+        members: List[tuple] = []
+        header = {
+            "version": INDEX_PACK_VERSION,
+            "created_at": time.time(),
+            "embedding_model": embedding_model,
+            "config": config,
+            "collections": {},
+            "files": {},
+        }
+
+        for name, db in collections.items():
+            ids, documents, vectors = db.export_entries()
+            matrix = np.asarray(vectors, dtype=np.float32)
+            buffer = io.BytesIO()
+            np.save(buffer, matrix)
+            entries = json.dumps({
+                "ids": ids,
+                "documents": [
+                    {"page_content": doc.page_content, "metadata": doc.metadata}
+                    for doc in documents
+                ]
+            }).encode("utf-8")
+
+            header["collections"][name] = {"count": len(ids), "dim": int(matrix.shape[-1])}
+            members.append((f"{name}.npy", buffer.getvalue()))
+            members.append((f"{name}.json", entries))
+
+        for member, file_path in extra_files.items():
+            if os.path.exists(file_path):
+                with open(file_path, 'rb') as f:
+                    members.append((member, f.read()))
+
+        header["files"] = {member: IndexPack.__sha256(data) for member, data in members}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with tarfile.open(tmp_path, "w:gz") as tar:
+            for member, data in [("pack.json", json.dumps(header, indent=2).encode("utf-8"))] \
+                    + members:
+                info = tarfile.TarInfo(member)
+                info.size = len(data)
+                info.mtime = int(header["created_at"])
+                tar.addfile(info, io.BytesIO(data))
+        os.replace(tmp_path, path)
+        return header
+
+    @staticmethod
+    def load(
+            path: str,
+            collections: Dict[str, VectorDB],
+            embedding_model: str,
+            extra_files: Dict[str, str]
+    ) -> Dict[str, Any]:
+        """
+        Verifies a pack and replaces the contents of the given collections and files with it.
+
+        Args:
+            path (str): pack file to read
+            collections (Dict[str, VectorDB]): collections to fill, by name
+            embedding_model (str): model used to embed queries, must match the pack
+            extra_files (Dict[str, str]): where to write packed files, by member name
+
+        Returns:
+            Dict[str, Any]: the pack header
+
+        Raises:
+            ValueError: unsupported version, other embedding model, missing, corrupted or
+                malformed member
+        """
+        header = None
+        members: Dict[str, bytes] = {}
+        with tarfile.open(path, "r|gz") as tar:
+            for info in tar:
+                member = tar.extractfile(info) if info.isfile() else None
+                if member is None:
+                    raise ValueError(f"{path} is malformed, {info.name} is not a regular file")
+                data = member.read()
+                if header is None:
+                    if info.name != "pack.json":
+                        raise ValueError(f"{path} is not an index pack")
+                    header = json.loads(data)
+                    if header.get("version", 0) > INDEX_PACK_VERSION:
+                        raise ValueError(f"{path} has pack version {header['version']}, "
+                                         f"this tool reads up to {INDEX_PACK_VERSION}")
+                    if header["embedding_model"] != embedding_model:
+                        raise ValueError(f"{path} was embedded with {header['embedding_model']}, "
+                                         f"not {embedding_model}")
+                    continue
+
+                if IndexPack.__sha256(data) != header["files"].get(info.name):
+                    raise ValueError(f"{path}: checksum mismatch for {info.name}")
+                members[info.name] = data
+
+        if header is None:
+            raise ValueError(f"{path} is empty")
+        missing = [member for member in header["files"] if member not in members]
+        if missing:
+            raise ValueError(f"{path} is truncated, missing {missing}")
+
+        for name, db in collections.items():
+            if name not in header["collections"]:
+                continue
+            entries = json.loads(members[f"{name}.json"])
+            vectors = np.load(io.BytesIO(members[f"{name}.npy"]))
+            documents = [
+                Document(page_content=doc["page_content"], metadata=doc["metadata"])
+                for doc in entries["documents"]
+            ]
+
+            # Entries of an earlier training run that the pack does not have are stale
+            stale = set(db.ids()) - set(entries["ids"])
+            db.delete(list(stale))
+            db.upsert_vectors(documents, entries["ids"], vectors.tolist())
+
+        for member, file_path in extra_files.items():
+            if member in members:
+                os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+                with open(file_path, 'wb') as f:
+                    f.write(members[member])
+
+        return header
@@ -0,0 +1,127 @@
+import os
+import re
+import json
+import math
+import hashlib
+
+# Global Imports
+from typing import Dict, List
+from langchain_core.documents import Document
+
+class LexicalIndex:
+    """
+    BM25 inverted index over the identifiers and keywords of the training chunks.
+
+    Identifiers are indexed whole and split on camelCase/underscores (`ConcreteStrategyA` gives
+    `concretestrategya`, `concrete`, `strategy`), so `implements Strategy`, `Builder` or
+    `abstract class` in user code match the training examples that use them. A user chunk scores
+    the best BM25 score it gets against any training chunk, divided by that chunk's score against
+    itself, so scores fall between 0 (no shared term) and about 1 (all of the chunk's terms).
+
+    Built at training time from the same chunks as the vector collection and persisted as JSON.
+    """
+    path: str
+    k1: float
+    b: float
+
+    def __init__(self, path: str="", k1: float=1.2, b: float=0.75) -> None:
+        """
+        Args:
+            path (str): JSON file the index is persisted to, "" keeps it in memory only
+            k1 (float): BM25 term frequency saturation (default 1.2)
+            b (float): BM25 document length normalization (default 0.75)
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+
+        self.__postings: Dict[str, List[List[int]]] = {}
+        self.__doc_lengths: List[int] = []
+        self.__idf: Dict[str, float] = {}
+        self.__self_scores: List[float] = []
+        self.__fingerprint = ""
+
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.__postings = data["postings"]
+            self.__doc_lengths = data["doc_lengths"]
+            self.__prepare()
+
+    @staticmethod
+    def terms(text: str) -> List[str]:
+        terms = []
+        for identifier in re.findall(r"[A-Za-z_][A-Za-z0-9_]*", text):
+            parts = re.findall(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+", identifier)
+            terms.append(identifier.lower())
+            if len(parts) > 1:
+                terms.extend(part.lower() for part in parts if len(part) > 1)
+        return terms
+
+    def __len__(self) -> int:
+        return len(self.__doc_lengths)
+
+    def __term_score(self, term: str, tf: int, doc: int, avgdl: float) -> float:
+        norm = 1 - self.b + self.b * self.__doc_lengths[doc] / avgdl
+        return self.__idf[term] * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+    def __prepare(self) -> None:
+        count = len(self.__doc_lengths)
+        self.__idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.__postings.items()
+        }
+
+        avgdl = sum(self.__doc_lengths) / count if count else 1.0
+        self.__self_scores = [0.0] * count
+        for term, postings in self.__postings.items():
+            for doc, tf in postings:
+                self.__self_scores[doc] += self.__term_score(term, tf, doc, avgdl)
+
+        key = json.dumps([self.__doc_lengths, self.__postings], sort_keys=True)
+        self.__fingerprint = hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def build(self, documents: List[Document]) -> None:
+        """Replaces the index with one over the given training chunks."""
+        self.__postings = {}
+        self.__doc_lengths = []
+        for doc, document in enumerate(documents):
+            frequencies: Dict[str, int] = {}
+            terms = LexicalIndex.terms(document.page_content)
+            for term in terms:
+                frequencies[term] = frequencies.get(term, 0) + 1
+            for term, tf in frequencies.items():
+                self.__postings.setdefault(term, []).append([doc, tf])
+            self.__doc_lengths.append(len(terms))
+        self.__prepare()
+
+    def save(self) -> None:
+        if not self.path:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"postings": self.__postings, "doc_lengths": self.__doc_lengths}, f)
+        os.replace(tmp_path, self.path)
+
+    def score(self, text: str) -> float:
+        """Returns how much of the closest training chunk's lexical signal the text matches."""
+        if not self.__doc_lengths:
+            return 0.0
+
+        avgdl = sum(self.__doc_lengths) / len(self.__doc_lengths)
+        scores: Dict[int, float] = {}
+        for term in set(LexicalIndex.terms(text)):
+            for doc, tf in self.__postings.get(term, []):
+                scores[doc] = scores.get(doc, 0.0) + self.__term_score(term, tf, doc, avgdl)
+
+        return max(
+            (score / self.__self_scores[doc] for doc, score in scores.items()
+             if self.__self_scores[doc] > 0),
+            default=0.0
+        )
+
+    def fingerprint(self) -> str:
+        """Identifies the indexed chunks, for caching retrieval results filtered by this index."""
+        return self.__fingerprint
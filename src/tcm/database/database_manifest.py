@@ -0,0 +1,134 @@
+import os
+import json
+import hashlib
+
+# Global Imports
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+
+class TrainingManifest:
+    """
+    Keeps track of which training chunks have already been embedded into each collection.
+
+    Every chunk is given a deterministic ID derived from its source, its content and metadata
+    hashes and the splitter/embedding configuration, so re-running training only needs to embed
+    chunks whose ID is not in the manifest yet, and can delete the IDs that are no longer produced
+    by any source. A relabelled chunk gets a new ID, so it is re-upserted with its new labels.
+    """
+    path: str
+    config: Dict[str, Any]
+
+    def __init__(self, path: str, config: Dict[str, Any]) -> None:
+        self.path = path
+        self.config = config
+        self.__config_hash = TrainingManifest.hash_text(json.dumps(config, sort_keys=True))
+        self.__data = {"config_hash": "", "fingerprint": "", "collections": {}}
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.__data = json.load(f)
+
+        # A different splitter/embedding config invalidates every ID we have stored
+        if self.__data.get("config_hash") != self.__config_hash:
+            self.__data = {"config_hash": self.__config_hash, "fingerprint": "", "collections": {}}
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        """Returns the sha256 of a file, or an empty string if the file does not exist."""
+        if not os.path.exists(path):
+            return ""
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def chunk_id(
+            self,
+            source: str,
+            content: str,
+            occurrence: int=0,
+            metadata: Optional[Dict[str, Any]]=None
+    ) -> str:
+        """
+        Builds the deterministic ID of a chunk.
+
+        Args:
+            source (str): path or URL the chunk was split from
+            content (str): chunk text
+            occurrence (int): index among identical chunks of the same source (default 0)
+            metadata (Optional[Dict[str, Any]]): labels stored with the chunk (default None)
+
+        Returns:
+            str: hex digest identifying the chunk under the current config
+        """
+        metadata_hash = TrainingManifest.hash_text(
+            json.dumps(metadata or {}, sort_keys=True, default=str)
+        )
+        key = f"{self.__config_hash}\0{source}\0{TrainingManifest.hash_text(content)}" \
+            f"\0{occurrence}\0{metadata_hash}"
+        return TrainingManifest.hash_text(key)
+
+    def is_current(self, fingerprint: str) -> bool:
+        """True if the manifest was last saved for the same inputs and holds at least one chunk."""
+        return self.__data.get("fingerprint") == fingerprint and \
+            any(self.__data["collections"].values())
+
+    def collection_ids(self, collection: str) -> List[str]:
+        return list(self.__data["collections"].get(collection, {}).keys())
+
+    def plan(
+            self,
+            collection: str,
+            sources: Dict[str, List[Document]],
+            existing_ids: Optional[List[str]]=None
+    ) -> Tuple[List[Document], List[str], List[str]]:
+        """
+        Diffs freshly split chunks against what the collection already holds.
+
+        Args:
+            collection (str): name of the collection the chunks belong to
+            sources (Dict[str, List[Document]]): chunks grouped by the source they were split from
+            existing_ids (Optional[List[str]]): IDs found in the collection itself; those not
+                produced by any source are stale too, even if the manifest never recorded them
+
+        Returns:
+            Tuple[List[Document], List[str], List[str]]: the chunks to embed, their IDs, and the IDs
+            of stale chunks that should be deleted from the collection.
+        """
+        known = self.__data["collections"].get(collection, {})
+        current = {}
+        new_docs, new_ids = [], []
+
+        for source, chunks in sources.items():
+            seen = {}
+            for chunk in chunks:
+                occurrence = seen.get(chunk.page_content, 0)
+                seen[chunk.page_content] = occurrence + 1
+
+                chunk_id = self.chunk_id(source, chunk.page_content, occurrence, chunk.metadata)
+                current[chunk_id] = source
+                if chunk_id not in known:
+                    new_docs.append(chunk)
+                    new_ids.append(chunk_id)
+
+        stale_ids = [chunk_id for chunk_id in known if chunk_id not in current]
+        stale_ids += [
+            chunk_id for chunk_id in existing_ids or []
+            if chunk_id not in current and chunk_id not in known
+        ]
+        self.__data["collections"][collection] = current
+
+        return new_docs, new_ids, stale_ids
+
+    def save(self, fingerprint: str) -> None:
+        self.__data["fingerprint"] = fingerprint
+        dirname = os.path.dirname(self.path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.__data, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,247 @@
+import os
+import json
+import uuid
+import hashlib
+import threading
+
+import numpy as np
+
+# Local Imports
+from tcm.database.database_vector import VectorDB
+from tcm.helper.helper_trace import Tracer
+from tcm.rag.rag_embeddings import TCMEmbeddings
+
+# Global Imports
+from langchain_core.documents import Document
+from typing import Any, Dict, List, Tuple
+
+class NumpyFlatDB(VectorDB):
+    """
+    Exact, in-process vector store for small collections, a drop-in alternative to ChromaDB.
+
+    Normalized embeddings are kept in one contiguous float32 (or float16) matrix, so a batch of
+    queries is answered with a single matrix multiply and an argpartition per row. With a
+    `dirname`, the matrix is persisted as `{collection}.npy` (memory-mapped when loaded) and the
+    documents and IDs as a `{collection}.json` sidecar.
+
+    Distances are squared L2 between normalized vectors (2 - 2 * cosine similarity), so they rank
+    the same way as Chroma's default "l2" space and the same thresholds apply.
+    """
+    dtype: str
+
+    def __init__(
+            self,
+            collection_name: str,
+            embeddings: TCMEmbeddings,
+            dirname: str="",
+            embed_batch_size: int=100,
+            query_batch_size: int=500,
+            dtype: str="float32"
+    ) -> None:
+        """
+        Args:
+            collection_name (str): name of the collection, also the persisted file names
+            embeddings (TCMEmbeddings): embedding model used for documents and queries
+            dirname (str): directory to persist the collection to, "" keeps it in memory only
+            embed_batch_size (int): texts per embedding call (default 100)
+            query_batch_size (int): queries per search when consumed lazily (default 500)
+            dtype (str): "float32" or "float16" storage of the matrix (default "float32")
+        """
+        self.embed_batch_size = embed_batch_size
+        self.query_batch_size = query_batch_size
+        self.dtype = dtype
+        self.__embeddings = embeddings.get_embeddings()
+        self.__model_name = embeddings.get_model_name()
+        self.__collection_name = collection_name
+        self.__lock = threading.Lock()
+
+        self.__matrix_path = os.path.join(dirname, f"{collection_name}.npy") if dirname else ""
+        self.__sidecar_path = os.path.join(dirname, f"{collection_name}.json") if dirname else ""
+
+        self.__matrix = np.zeros((0, 0), dtype=dtype)
+        self.__ids: List[str] = []
+        self.__documents: List[Dict[str, Any]] = []
+
+        if self.__matrix_path and os.path.exists(self.__matrix_path) and \
+                os.path.exists(self.__sidecar_path):
+            with open(self.__sidecar_path, 'r', encoding='utf-8') as f:
+                sidecar = json.load(f)
+            self.__ids = sidecar["ids"]
+            self.__documents = sidecar["documents"]
+            self.__matrix = np.load(self.__matrix_path, mmap_mode="r")
+
+    @staticmethod
+    def __normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def __embed(self, texts: List[str]) -> np.ndarray:
+        vectors = []
+        with Tracer.span("embed", queries=len(texts)):
+            for start in range(0, len(texts), self.embed_batch_size):
+                vectors.extend(
+                    self.__embeddings.embed_documents(texts[start:start + self.embed_batch_size])
+                )
+        return NumpyFlatDB.__normalize(np.asarray(vectors, dtype=np.float32))
+
+    def __save(self) -> None:
+        if not self.__matrix_path:
+            return
+
+        os.makedirs(os.path.dirname(self.__matrix_path) or ".", exist_ok=True)
+        tmp_matrix = self.__matrix_path + ".tmp.npy"
+        np.save(tmp_matrix, self.__matrix)
+        tmp_sidecar = self.__sidecar_path + ".tmp"
+        with open(tmp_sidecar, 'w', encoding='utf-8') as f:
+            json.dump({
+                "ids": self.__ids,
+                "documents": self.__documents,
+                "dtype": self.dtype,
+                "model": self.__model_name
+            }, f)
+        os.replace(tmp_matrix, self.__matrix_path)
+        os.replace(tmp_sidecar, self.__sidecar_path)
+        self.__matrix = np.load(self.__matrix_path, mmap_mode="r")
+
+    def add(self, documents: List[Document]) -> List[str]:
+        return self.upsert(documents, [str(uuid.uuid4()) for _ in documents])
+
+    def upsert(self, documents: List[Document], ids: List[str]) -> List[str]:
+        if not documents:
+            return []
+        return self.__store(documents, ids, self.__embed([doc.page_content for doc in documents]))
+
+    def upsert_vectors(
+            self,
+            documents: List[Document],
+            ids: List[str],
+            vectors: List[List[float]]
+    ) -> List[str]:
+        if not documents:
+            return []
+        return self.__store(
+            documents, ids, NumpyFlatDB.__normalize(np.asarray(vectors, dtype=np.float32))
+        )
+
+    def export_entries(self) -> Tuple[List[str], List[Document], List[List[float]]]:
+        with self.__lock:
+            matrix, ids, documents = self.__matrix, self.__ids, self.__documents
+        return (
+            list(ids),
+            [Document(page_content=doc["page_content"], metadata=doc["metadata"])
+             for doc in documents],
+            np.asarray(matrix, dtype=np.float32).tolist()
+        )
+
+    def __store(self, documents: List[Document], ids: List[str], vectors: np.ndarray) -> List[str]:
+        vectors = vectors.astype(self.dtype)
+        with self.__lock:
+            # Readers keep using the previous matrix and lists until they are swapped in
+            all_ids, all_documents = list(self.__ids), list(self.__documents)
+            positions = {doc_id: i for i, doc_id in enumerate(all_ids)}
+            matrix = np.array(self.__matrix, dtype=self.dtype) if all_ids \
+                else np.zeros((0, vectors.shape[1]), dtype=self.dtype)
+
+            appended = []
+            for doc, doc_id, vector in zip(documents, ids, vectors):
+                entry = {"page_content": doc.page_content, "metadata": doc.metadata}
+                if doc_id in positions:
+                    matrix[positions[doc_id]] = vector
+                    all_documents[positions[doc_id]] = entry
+                else:
+                    positions[doc_id] = len(all_ids)
+                    all_ids.append(doc_id)
+                    all_documents.append(entry)
+                    appended.append(vector)
+
+            if appended:
+                matrix = np.vstack([matrix, np.asarray(appended, dtype=self.dtype)])
+            self.__matrix = np.ascontiguousarray(matrix)
+            self.__ids, self.__documents = all_ids, all_documents
+            self.__save()
+
+        return ids
+
+    def delete(self, ids: List[str]) -> None:
+        if not ids:
+            return
+
+        with self.__lock:
+            removed = set(ids)
+            keep = [i for i, doc_id in enumerate(self.__ids) if doc_id not in removed]
+            if len(keep) == len(self.__ids):
+                return
+
+            self.__matrix = np.ascontiguousarray(np.asarray(self.__matrix)[keep])
+            self.__ids = [self.__ids[i] for i in keep]
+            self.__documents = [self.__documents[i] for i in keep]
+            self.__save()
+
+    def ids(self) -> List[str]:
+        with self.__lock:
+            return list(self.__ids)
+
+    def __search(
+            self,
+            vectors: np.ndarray,
+            top_docs_per_query: int
+    ) -> List[List[Tuple[Document, float]]]:
+        with self.__lock:
+            matrix, ids, documents = self.__matrix, self.__ids, self.__documents
+
+        n = min(top_docs_per_query, len(ids))
+        if n == 0:
+            return [[] for _ in range(len(vectors))]
+
+        # One (queries x documents) similarity matrix for the whole batch
+        similarities = vectors @ np.asarray(matrix, dtype=np.float32).T
+        if n < len(ids):
+            candidates = np.argpartition(-similarities, n - 1, axis=1)[:, :n]
+        else:
+            candidates = np.tile(np.arange(len(ids)), (len(vectors), 1))
+        candidate_sims = np.take_along_axis(similarities, candidates, axis=1)
+        order = np.argsort(-candidate_sims, axis=1)
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        distances = 2.0 - 2.0 * np.take_along_axis(candidate_sims, order, axis=1)
+
+        return [
+            [
+                (
+                    Document(
+                        page_content=documents[index]["page_content"],
+                        metadata=documents[index]["metadata"],
+                        id=ids[index]
+                    ),
+                    float(max(distance, 0.0))
+                )
+                for index, distance in zip(row_candidates, row_distances)
+            ]
+            for row_candidates, row_distances in zip(candidates, distances)
+        ]
+
+    def query_batch(
+            self,
+            queries: List[str],
+            top_docs_per_query: int=4
+    ) -> List[List[Tuple[Document, float]]]:
+        """Answers the whole batch with one matrix multiply against the collection."""
+        if not queries:
+            return []
+
+        vectors = self.__embed(queries)
+        with Tracer.span("search", queries=len(queries)):
+            results = self.__search(vectors, top_docs_per_query)
+        Tracer.count("queries", len(queries))
+        return results
+
+    def similarity_search(self, question: str) -> List[Document]:
+        with Tracer.span("search"):
+            vector = np.asarray([self.__embeddings.embed_query(question)], dtype=np.float32)
+            return [doc for doc, _ in self.__search(NumpyFlatDB.__normalize(vector), 4)[0]]
+
+    def fingerprint(self) -> str:
+        with self.__lock:
+            ids = sorted(self.__ids)
+        key = "\0".join([self.__collection_name, self.__model_name] + ids)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
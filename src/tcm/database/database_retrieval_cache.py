@@ -0,0 +1,141 @@
+import os
+import json
+import hashlib
+import threading
+
+# Local Imports
+from tcm.helper.helper_trace import Tracer
+
+# Global Imports
+from typing import Any, Dict, Iterator, List, Tuple
+from langchain_core.documents import Document
+
+RETRIEVAL_CACHE_DIR = ".cache/tcm/retrieval"
+
+class RepoRetrieval:
+    """
+    Retrieval results of one (repo, branch, folder) analysis, diffed against the previous one.
+
+    Files are identified by their git blob SHA, so a file whose SHA did not change since the last
+    analyzed commit keeps its chunks, their neighbors and distances without being split, embedded
+    or queried again. Everything else is recorded as it is retrieved and saved for the next run;
+    files that disappeared from the repository are dropped on save.
+    """
+    path: str
+    fingerprint: str
+
+    def __init__(self, path: str, fingerprint: str) -> None:
+        self.path = path
+        self.fingerprint = fingerprint
+
+        previous = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+
+        # Neighbors retrieved against another collection, splitter or model are meaningless
+        if previous.get("fingerprint") != fingerprint:
+            previous = {}
+
+        self.__previous_files: Dict[str, Dict[str, Any]] = previous.get("files", {})
+        self.__previous_docs: Dict[str, List[Any]] = previous.get("docs", {})
+        self.__files: Dict[str, Dict[str, Any]] = {}
+        self.__docs: Dict[str, List[Any]] = {}
+        self.__reused: List[str] = []
+
+    def reuse(self, file_path: str, sha: str) -> bool:
+        """
+        Carries over the results of a file that has not changed since the previous analysis.
+
+        Returns:
+            bool: False if the file is new or changed and has to be retrieved again
+        """
+        entry = self.__previous_files.get(file_path)
+        if not sha or entry is None or entry["sha"] != sha:
+            self.__files[file_path] = {"sha": sha, "chunks": []}
+            return False
+
+        self.__files[file_path] = entry
+        for _, neighbors in entry["chunks"]:
+            for doc_key, _ in neighbors:
+                self.__docs[doc_key] = self.__previous_docs[doc_key]
+        self.__reused.append(file_path)
+
+        Tracer.count("files_reused")
+        Tracer.count("chunks_reused", len(entry["chunks"]))
+        return True
+
+    @staticmethod
+    def __doc_key(doc: Document) -> str:
+        if doc.id:
+            return doc.id
+        return hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+    def record(self, file_path: str, text: str, results: List[Tuple[Document, float]]) -> None:
+        """Remembers the neighbors freshly retrieved for one chunk of a new or changed file."""
+        neighbors = []
+        for doc, distance in results:
+            doc_key = RepoRetrieval.__doc_key(doc)
+            self.__docs[doc_key] = [doc.page_content, doc.metadata]
+            neighbors.append([doc_key, distance])
+
+        self.__files[file_path]["chunks"].append([text, neighbors])
+
+    def forget(self, file_path: str) -> None:
+        """Drops a file whose chunks were only partly retrieved, so the next run retrieves it again."""
+        self.__files.pop(file_path, None)
+
+    def iter_reused(self) -> Iterator[Tuple[str, str, List[Tuple[Document, float]]]]:
+        """Yields every reused chunk with the path of its file and its neighbors."""
+        for file_path in self.__reused:
+            for text, neighbors in self.__files[file_path]["chunks"]:
+                results = []
+                for doc_key, distance in neighbors:
+                    content, metadata = self.__docs[doc_key]
+                    results.append((Document(page_content=content, metadata=metadata), distance))
+                yield file_path, text, results
+
+    def save(self) -> None:
+        dirname = os.path.dirname(self.path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "fingerprint": self.fingerprint,
+                "files": self.__files,
+                "docs": self.__docs
+            }, f)
+        os.replace(tmp_path, self.path)
+
+class RetrievalCache:
+    """
+    On-disk store of the last retrieval results of every analyzed (repo, branch, folder), so
+    re-analyzing a repository after a merge only costs as much as the files the merge changed.
+    """
+    root: str
+
+    def __init__(self, root: str=RETRIEVAL_CACHE_DIR) -> None:
+        self.root = root
+
+    def open(
+            self,
+            url: str,
+            branch: str,
+            folder: str,
+            fingerprint: str
+    ) -> RepoRetrieval:
+        """
+        Args:
+            url (str): repository URL or local path
+            branch (str): analyzed branch
+            folder (str): folder filter of the analysis, "" for the whole repository
+            fingerprint (str): identifies the collection, splitter and retrieval settings; results
+                stored under another fingerprint are ignored
+
+        Returns:
+            RepoRetrieval: the previous results of this analysis, ready to be diffed
+        """
+        key = hashlib.sha256(f"{url}\0{branch}\0{folder}".encode("utf-8")).hexdigest()
+        return RepoRetrieval(os.path.join(self.root, f"{key}.json"), fingerprint)
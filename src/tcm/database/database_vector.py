@@ -0,0 +1,159 @@
+import math
+import heapq
+
+# Local Imports
+from tcm.helper.helper_stream import batched
+
+# Global Imports
+from abc import ABC, abstractmethod
+from langchain_core.documents import Document
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+VECTOR_BACKENDS = ("chroma", "numpy")
+
+class VectorDB(ABC):
+    """
+    Interface shared by the vector store backends (ChromaDB, NumpyFlatDB).
+
+    Backends implement storage and `query_batch` (every abstract method, or they cannot be
+    constructed); lazy batching and top-k selection over the query results are the same for every
+    backend.
+    """
+    embed_batch_size: int
+    query_batch_size: int
+
+    @abstractmethod
+    def add(self, documents: List[Document]) -> List[str]:
+        ...
+
+    @abstractmethod
+    def upsert(self, documents: List[Document], ids: List[str]) -> List[str]:
+        """Adds documents under the given IDs, replacing any existing entries with the same ID."""
+        ...
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        ...
+
+    @abstractmethod
+    def ids(self) -> List[str]:
+        """Returns the ID of every entry in the collection."""
+        ...
+
+    @abstractmethod
+    def export_entries(self) -> Tuple[List[str], List[Document], List[List[float]]]:
+        """Returns the IDs, documents and embeddings of every entry, for an index pack."""
+        ...
+
+    @abstractmethod
+    def upsert_vectors(
+            self,
+            documents: List[Document],
+            ids: List[str],
+            vectors: List[List[float]]
+    ) -> List[str]:
+        """Like upsert, with embeddings computed beforehand by the same model (no embedding call)."""
+        ...
+
+    @abstractmethod
+    def query_batch(
+            self,
+            queries: List[str],
+            top_docs_per_query: int=4
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Embeds every query in batches and searches the collection for all of them at once.
+
+        Args:
+            queries (List[str]): texts to search for
+            top_docs_per_query (int): number of neighbors to return per query (default 4)
+
+        Returns:
+            List[List[Tuple[Document, float]]]: for each query, its neighbors and their distances
+        """
+        ...
+
+    @abstractmethod
+    def similarity_search(self, question: str) -> List[Document]:
+        ...
+
+    @abstractmethod
+    def fingerprint(self) -> str:
+        """Identifies the collection contents and embedding model, for caching query results."""
+        ...
+
+    def iter_query_batches(
+            self,
+            queries: Iterable[str],
+            top_docs_per_query: int=4
+    ) -> Iterator[Tuple[str, List[Tuple[Document, float]]]]:
+        """
+        Consumes queries lazily in batches of `query_batch_size`, so only one batch of queries and
+        results is held in memory at a time.
+
+        Args:
+            queries (Iterable[str]): texts to search for, possibly a generator
+            top_docs_per_query (int): number of neighbors to return per query (default 4)
+
+        Returns:
+            Iterator[Tuple[str, List[Tuple[Document, float]]]]: each query with its neighbors
+        """
+        for batch in batched(queries, self.query_batch_size):
+            yield from zip(batch, self.query_batch(batch, top_docs_per_query))
+
+    def top_k_similar_queries(
+            self,
+            queries: Iterable[str],
+            k: int=3,
+            top_docs_per_query: int=4
+    ) -> List[Tuple[str, List[Document], float]]:
+        return VectorDB.top_k(self.iter_query_batches(queries, top_docs_per_query), k)
+
+    @staticmethod
+    def top_k(
+            results: Iterable[Tuple[str, List[Tuple[Document, float]]]],
+            k: int=3,
+            counts: Optional[Dict[str, int]]=None,
+            count_weight: float=0.0
+    ) -> List[Tuple[str, List[Document], float]]:
+        """
+        Keeps the k queries whose closest neighbor is the most similar, closest first.
+
+        Args:
+            results (Iterable[Tuple[str, List[Tuple[Document, float]]]]): each query with its
+                neighbors and their distances, e.g. from iter_query_batches
+            k (int): number of queries to keep (default 3)
+            counts (Optional[Dict[str, int]]): how many (near-)duplicate chunks each query stands
+                for, see ChunkDeduplicator (default None)
+            count_weight (float): shrinks the distance of a query standing for n chunks by a
+                factor 1 + count_weight * ln(n), 0 ignores counts (default 0)
+
+        Returns:
+            List[Tuple[str, List[Document], float]]: the queries, their neighbors and scores, by
+            ascending score (distance)
+        """
+        heap = []
+
+        for order, (query, query_results) in enumerate(results):
+            if not query_results:
+                continue
+
+            def __scoring_fn(results: List[Tuple[Document, float]]) -> float:
+                """Default scoring function: returns the minimum score"""
+                return min(score for _, score in results)
+
+            agg_score = __scoring_fn(query_results)
+            if counts and count_weight:
+                agg_score /= 1 + count_weight * math.log(counts.get(query, 1))
+            docs = [doc for doc, _ in query_results]
+
+            # order breaks ties between identical chunks, Documents can not be compared
+            heapq.heappush(heap, (-agg_score, query, order, docs))
+            if len(heap) > k:
+                heapq.heappop(heap)
+
+        top_k = sorted(
+            ((-score, order, query, docs) for score, query, order, docs in heap),
+            key=lambda item: item[:2]
+        )
+        return [(query, docs, score) for score, _, query, docs in top_k]
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+
+# Global Imports
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+
+REPO_CACHE_DIR = ".cache/tcm/repos"
+
+class RepoCache:
+    """
+    Content-addressed cache of repository snapshots keyed by (repo, commit SHA).
+
+    Snapshots are stored as extracted trees under `{root}/{org}__{project}/{sha}/`, so every
+    folder-filtered load against the same commit reuses one download. Branch names are resolved to
+    a commit SHA once and remembered for `ref_ttl` seconds, which means reruns against an unchanged
+    commit do not touch the network at all. The total size is capped and the least recently used
+    snapshots get evicted first, except those being read.
+    """
+    root: str
+    max_bytes: int
+    ref_ttl: float
+
+    # Shared by every RepoCache instance in the process
+    __file_index: Dict[Tuple[str, str], List[str]] = {}
+    __locks: Dict[Tuple[str, str], threading.Lock] = {}
+    __locks_guard = threading.Lock()
+    # Readers of each snapshot path, pinned while a loader walks it so eviction skips it
+    __in_use: Dict[str, int] = {}
+    __in_use_guard = threading.Lock()
+
+    def __init__(
+            self,
+            root: str=REPO_CACHE_DIR,
+            max_bytes: int=2 * 1024 ** 3,
+            ref_ttl: float=600
+    ) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ref_ttl = ref_ttl
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def __repo_key(repo: str) -> str:
+        return repo.replace('/', '__')
+
+    def __refs_path(self) -> str:
+        return os.path.join(self.root, "refs.json")
+
+    def __load_refs(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.__refs_path()):
+            return {}
+        with open(self.__refs_path(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def get_ref(self, repo: str, branch: str) -> Optional[str]:
+        """Returns the commit SHA the branch resolved to, if it was resolved within `ref_ttl`."""
+        entry = self.__load_refs().get(f"{repo}@{branch}")
+        if entry and time.time() - entry["resolved_at"] < self.ref_ttl:
+            return entry["sha"]
+        return None
+
+    def set_ref(self, repo: str, branch: str, sha: str) -> None:
+        with RepoCache.__locks_guard:
+            refs = self.__load_refs()
+            refs[f"{repo}@{branch}"] = {"sha": sha, "resolved_at": time.time()}
+            tmp_path = self.__refs_path() + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(refs, f, indent=2)
+            os.replace(tmp_path, self.__refs_path())
+
+    def __lock(self, repo: str, sha: str) -> threading.Lock:
+        with RepoCache.__locks_guard:
+            return RepoCache.__locks.setdefault((repo, sha), threading.Lock())
+
+    @staticmethod
+    def __pin(path: str, delta: int) -> None:
+        """Adds delta readers to a snapshot path, the caller holds __in_use_guard."""
+        key = os.path.abspath(path)
+        readers = RepoCache.__in_use.get(key, 0) + delta
+        if readers > 0:
+            RepoCache.__in_use[key] = readers
+        else:
+            RepoCache.__in_use.pop(key, None)
+
+    @contextmanager
+    def snapshot_dir(self, repo: str, sha: str, fetch: Callable[[str], None]) -> Iterator[str]:
+        """
+        Yields the directory holding the snapshot of a commit, fetching it on a cache miss. The
+        snapshot is not evicted before the block exits, even by other threads' fetches.
+
+        Args:
+            repo (str): repository name, e.g. "org/project"
+            sha (str): resolved commit SHA
+            fetch (Callable[[str], None]): writes the repository tree into the given directory
+
+        Returns:
+            Iterator[str]: path to the extracted tree
+        """
+        path = os.path.join(self.root, RepoCache.__repo_key(repo), sha)
+
+        with self.__lock(repo, sha):
+            with RepoCache.__in_use_guard:
+                cached = os.path.isdir(path)
+                if cached:
+                    RepoCache.__pin(path, 1)
+
+            if not cached:
+                print(f"(DEBUG): Repo cache miss for {repo}@{sha[:12]}, fetching snapshot")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_dir = tempfile.mkdtemp(prefix=".fetch-", dir=os.path.dirname(path))
+                try:
+                    fetch(tmp_dir)
+                    with open(os.path.join(tmp_dir, ".tcm_size"), 'w', encoding='utf-8') as f:
+                        f.write(str(RepoCache.__dir_size(tmp_dir)))
+                    with RepoCache.__in_use_guard:
+                        os.rename(tmp_dir, path)
+                        RepoCache.__pin(path, 1)
+                except BaseException:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+                    raise
+                self.prune()
+            else:
+                print(f"(DEBUG): Repo cache hit for {repo}@{sha[:12]}")
+
+            # Directory mtime doubles as the LRU timestamp
+            os.utime(path)
+
+        try:
+            yield path
+        finally:
+            with RepoCache.__in_use_guard:
+                RepoCache.__pin(path, -1)
+
+    def list_files(self, repo: str, sha: str, path: str) -> List[str]:
+        """Returns the repository-relative paths of every file in a snapshot (memoized)."""
+        key = (repo, sha)
+        if key not in RepoCache.__file_index:
+            files = []
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames[:] = sorted(d for d in dirnames if d != ".git")
+                for filename in sorted(filenames):
+                    rel_path = os.path.relpath(os.path.join(dirpath, filename), path)
+                    if rel_path != ".tcm_size":
+                        files.append(rel_path.replace(os.sep, "/"))
+            RepoCache.__file_index[key] = files
+        return RepoCache.__file_index[key]
+
+    @staticmethod
+    def __dir_size(path: str) -> int:
+        total = 0
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+        return total
+
+    def __snapshots(self) -> List[Tuple[float, int, str]]:
+        """Lists (last used, size in bytes, path) for every snapshot in the cache."""
+        snapshots = []
+        for repo_key in os.listdir(self.root):
+            repo_dir = os.path.join(self.root, repo_key)
+            if not os.path.isdir(repo_dir):
+                continue
+            for sha in os.listdir(repo_dir):
+                path = os.path.join(repo_dir, sha)
+                if sha.startswith(".") or not os.path.isdir(path):
+                    continue
+                size_path = os.path.join(path, ".tcm_size")
+                if os.path.exists(size_path):
+                    with open(size_path, 'r', encoding='utf-8') as f:
+                        size = int(f.read())
+                else:
+                    size = RepoCache.__dir_size(path)
+                snapshots.append((os.path.getmtime(path), size, path))
+        return snapshots
+
+    def prune(self, max_bytes: Optional[int]=None) -> int:
+        """
+        Evicts least recently used snapshots until the cache fits in `max_bytes`. Snapshots being
+        read by a loader of this process are skipped.
+
+        Args:
+            max_bytes (Optional[int]): size cap in bytes (defaults to the cache's own cap)
+
+        Returns:
+            int: number of bytes freed
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        snapshots = sorted(self.__snapshots())
+        total = sum(size for _, size, _ in snapshots)
+        freed = 0
+
+        for _, size, path in snapshots:
+            if total - freed <= limit:
+                break
+            with RepoCache.__in_use_guard:
+                if os.path.abspath(path) in RepoCache.__in_use:
+                    continue
+                print(f"(DEBUG): Evicting cached snapshot {path} ({size:,} bytes)")
+                shutil.rmtree(path, ignore_errors=True)
+            freed += size
+
+        # Drop in-process file lists of snapshots that no longer exist
+        for key in list(RepoCache.__file_index):
+            if not os.path.isdir(os.path.join(self.root, RepoCache.__repo_key(key[0]), key[1])):
+                RepoCache.__file_index.pop(key, None)
+
+        return freed
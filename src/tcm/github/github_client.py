@@ -0,0 +1,305 @@
+import os
+import json
+import time
+import requests
+import threading
+
+# Local Imports
+from tcm.helper.helper_limits import ConcurrencyLimits
+from tcm.helper.helper_sqlite_cache import SqliteCache
+from tcm.helper.helper_trace import Tracer
+
+# Global Imports
+from typing import Any, Dict, Iterator, Optional
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+GITHUB_API_URL = "https://api.github.com"
+GITHUB_CACHE_PATH = ".cache/tcm/github_responses.sqlite"
+
+class TokenBucket:
+    """
+    Paces requests against the GitHub rate limit.
+
+    While more than `reserve` of the quota is left, requests go out unpaced. Past that, the bucket
+    holds up to `burst` tokens and refills at the rate that spreads the remaining quota
+    (`X-RateLimit-Remaining`) evenly until the window resets (`X-RateLimit-Reset`), so a batch
+    slows down as the quota runs low instead of failing halfway through.
+    """
+    reserve: float
+    burst: int
+
+    def __init__(self, reserve: float=0.1, burst: int=10) -> None:
+        """
+        Args:
+            reserve (float): share of the quota spent paced (default 0.1)
+            burst (int): paced requests that may be sent back to back (default 10)
+        """
+        self.reserve = reserve
+        self.burst = burst
+        # Unknown until the first response reports the quota
+        self.__free = float("inf")
+        self.__rate = 0.0
+        self.__reset = 0.0
+        self.__tokens = float(burst)
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def __refill(self) -> None:
+        now = time.monotonic()
+        if self.__reset and time.time() >= self.__reset:
+            # A new window started, the next response tells the new quota
+            self.__free = float("inf")
+            self.__reset = 0.0
+        self.__tokens = min(float(self.burst), self.__tokens + (now - self.__updated) * self.__rate)
+        self.__updated = now
+
+    def update(self, limit: int, remaining: int, reset: float) -> None:
+        """Adjusts the pacing to the quota reported by a response (reset is epoch seconds)."""
+        with self.__lock:
+            self.__refill()
+            self.__free = max(remaining - limit * self.reserve, 0.0)
+            self.__reset = reset
+            self.__rate = remaining / max(reset - time.time(), 1.0)
+            self.__tokens = min(self.__tokens, float(remaining))
+
+    def acquire(self) -> float:
+        """Blocks until a request may be sent. Returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self.__lock:
+                self.__refill()
+                if self.__free >= 1:
+                    self.__free -= 1
+                    return waited
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return waited
+                if self.__rate > 0:
+                    wait = (1 - self.__tokens) / self.__rate
+                else:
+                    wait = max(self.__reset - time.time(), 0.0) + 1.0
+
+            with Tracer.span("github_throttle"):
+                time.sleep(wait)
+            waited += wait
+
+class GithubClient:
+    """
+    GitHub REST client shared by every loader and the taxonomy fetch of a process.
+
+    - One pooled keep-alive session, so each repository does not open new connections.
+    - Conditional requests: 200 responses with an `ETag` or `Last-Modified` are kept in a SQLite
+      response cache and revalidated with `If-None-Match`/`If-Modified-Since`. A 304 answer does
+      not count against the quota and is served from the cache.
+    - A TokenBucket paces requests against the remaining quota, and a request rejected by the rate
+      limit (403/429) waits for `Retry-After` or the reset time, then is retried.
+
+    The base URL can point to any server speaking the same API, e.g. a local mock for testing.
+    """
+    base_url: str
+    max_retries: int
+    max_wait: float
+
+    __shared: Optional["GithubClient"] = None
+    __shared_lock = threading.Lock()
+    __shared_config: Dict[str, Any] = {}
+
+    def __init__(
+            self,
+            base_url: str=GITHUB_API_URL,
+            cache_path: str=GITHUB_CACHE_PATH,
+            pool_size: int=4,
+            bucket: Optional[TokenBucket]=None,
+            max_retries: int=2,
+            max_wait: float=900.0
+    ) -> None:
+        """
+        Args:
+            base_url (str): root of the REST API (default GITHUB_API_URL)
+            cache_path (str): SQLite file of the response cache, "" disables conditional requests
+            pool_size (int): kept-alive connections, at least the GitHub concurrency limit
+                (default 4)
+            bucket (Optional[TokenBucket]): request pacing (default TokenBucket())
+            max_retries (int): retries of a request rejected by the rate limit (default 2)
+            max_wait (float): longest wait for the rate limit to reset before giving up, in
+                seconds (default 900)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.__bucket = bucket or TokenBucket()
+        self.__cache = SqliteCache(cache_path, "github_responses", max_entries=50_000) \
+            if cache_path != "" else None
+
+        self.__session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.__session.mount("http://", adapter)
+        self.__session.mount("https://", adapter)
+
+    @staticmethod
+    def configure(
+            base_url: str=GITHUB_API_URL,
+            cache_path: str=GITHUB_CACHE_PATH,
+            pool_size: int=4
+    ) -> None:
+        """Sets up the client returned by shared(). Must be called before any worker threads start."""
+        with GithubClient.__shared_lock:
+            GithubClient.__shared_config = {
+                "base_url": base_url,
+                "cache_path": cache_path,
+                "pool_size": pool_size
+            }
+            GithubClient.__shared = None
+
+    @staticmethod
+    def shared() -> "GithubClient":
+        with GithubClient.__shared_lock:
+            if GithubClient.__shared is None:
+                GithubClient.__shared = GithubClient(**GithubClient.__shared_config)
+            return GithubClient.__shared
+
+    def url(self, path: str) -> str:
+        """Resolves an API path like "/repos/{org}/{project}" against the base URL."""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    @staticmethod
+    def __headers(accept: str) -> Dict[str, str]:
+        headers = {"Accept": accept}
+        if os.environ.get("GITHUB_PA_TOKEN"):
+            headers["Authorization"] = f"Bearer {os.environ['GITHUB_PA_TOKEN']}"
+        return headers
+
+    def __wait_for_quota(self, response: requests.Response, attempt: int) -> bool:
+        """Waits out a rate limit rejection. Returns False if the request should not be retried."""
+        if response.status_code not in (403, 429) or attempt >= self.max_retries:
+            return False
+
+        if response.headers.get("Retry-After"):
+            wait = float(response.headers["Retry-After"])
+        elif response.headers.get("X-RateLimit-Remaining") == "0":
+            wait = float(response.headers.get("X-RateLimit-Reset", 0)) - time.time() + 1.0
+        else:
+            # A 403 unrelated to the rate limit, e.g. missing permissions
+            return False
+
+        wait = max(wait, 0.0)
+        if wait > self.max_wait:
+            return False
+
+        Tracer.count("github_rate_limited")
+        print(f"(DEBUG): GitHub rate limit hit, retrying in {wait:.0f}s")
+        with Tracer.span("github_throttle"):
+            time.sleep(wait)
+        return True
+
+    def __send(
+            self,
+            url: str,
+            headers: Dict[str, str],
+            stream: bool=False,
+            **kwargs: Any
+    ) -> requests.Response:
+        # A revalidation is usually answered with a free 304, so it is not paced; a 403 for a
+        # changed resource past the quota is still waited out below
+        paced = "If-None-Match" not in headers and "If-Modified-Since" not in headers
+        attempt = 0
+        while True:
+            if paced:
+                self.__bucket.acquire()
+            response = self.__session.get(url, headers=headers, stream=stream, **kwargs)
+            Tracer.count("github_requests")
+
+            if "X-RateLimit-Remaining" in response.headers:
+                self.__bucket.update(
+                    int(response.headers.get("X-RateLimit-Limit", 5000)),
+                    int(response.headers["X-RateLimit-Remaining"]),
+                    float(response.headers.get("X-RateLimit-Reset", time.time() + 3600))
+                )
+
+            if not self.__wait_for_quota(response, attempt):
+                return response
+            response.close()
+            attempt += 1
+
+    @staticmethod
+    def __cache_key(url: str, params: Optional[Dict[str, Any]], accept: str) -> str:
+        return json.dumps([url, sorted((params or {}).items()), accept])
+
+    @staticmethod
+    def __from_cache(url: str, value: bytes) -> requests.Response:
+        meta, content = value.split(b"\n", 1)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict(json.loads(meta))
+        response._content = content
+        return response
+
+    def get(
+            self,
+            path: str,
+            params: Optional[Dict[str, Any]]=None,
+            accept: str="application/vnd.github+json",
+            timeout: float=30
+    ) -> requests.Response:
+        """
+        Sends a GET request, revalidating a cached response when there is one.
+
+        Args:
+            path (str): API path or absolute URL
+            params (Optional[Dict[str, Any]]): query parameters
+            accept (str): media type requested (default "application/vnd.github+json")
+            timeout (float): seconds to wait for the server (default 30)
+
+        Returns:
+            requests.Response: the response, a 304 being replaced by the cached 200 response
+        """
+        url = self.url(path)
+        headers = GithubClient.__headers(accept)
+        key = GithubClient.__cache_key(url, params, accept)
+        cached = self.__cache.get(key) if self.__cache is not None else None
+        if cached is not None:
+            meta = json.loads(cached.split(b"\n", 1)[0])
+            if meta.get("ETag"):
+                headers["If-None-Match"] = meta["ETag"]
+            if meta.get("Last-Modified"):
+                headers["If-Modified-Since"] = meta["Last-Modified"]
+
+        with ConcurrencyLimits.acquire(ConcurrencyLimits.GITHUB):
+            response = self.__send(url, headers, params=params, timeout=timeout)
+
+        if response.status_code == 304 and cached is not None:
+            Tracer.count("github_not_modified")
+            return GithubClient.__from_cache(url, cached)
+
+        if self.__cache is not None and response.status_code == 200 and \
+                (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+            meta = {
+                name: response.headers[name]
+                for name in ("ETag", "Last-Modified", "Content-Type")
+                if name in response.headers
+            }
+            self.__cache.put(key, json.dumps(meta).encode("utf-8") + b"\n" + response.content)
+        return response
+
+    @contextmanager
+    def stream(
+            self,
+            path: str,
+            accept: str="application/vnd.github+json",
+            timeout: float=60
+    ) -> Iterator[requests.Response]:
+        """
+        Sends a GET request for a large body (e.g. a tarball), read from the response as it
+        downloads. Not cached, and the caller holds the GitHub concurrency slot for the download.
+        """
+        headers = GithubClient.__headers(accept)
+        response = self.__send(self.url(path), headers, stream=True, timeout=timeout)
+        try:
+            yield response
+        finally:
+            response.close()
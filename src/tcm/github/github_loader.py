@@ -1,14 +1,15 @@
-import os
+import base64
 
 # Local Imports
+from tcm.github.github_client import GithubClient
 from tcm.helper.helper_filters import FileFilters
+from tcm.helper.helper_trace import Tracer
 
 # Global Imports
-from typing import List
-from urllib.parse import urlparse
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import quote, urlparse
 
 from langchain_core.documents import Document
-from langchain_community.document_loaders import GithubFileLoader
 
 class GithubLoader:
     url: str
@@ -29,9 +30,9 @@ class GithubLoader:
         if len(path_parts) < 2:
             raise ValueError(f"Invalid GitHub repository URL: {self.url}")
 
-        self.__repo_name = '/'.join(path_parts[:2])  # Only org/project, ignore any deeper paths
+        self._repo_name = '/'.join(path_parts[:2])  # Only org/project, ignore any deeper paths
 
-    def __print_repo_contents(self) -> None:
+    def _print_repo_contents(self) -> None:
         """
         Print all document paths/names from a loaded repository for debugging.
         
@@ -39,7 +40,7 @@ class GithubLoader:
             documents (List[Document]): List of loaded documents
             repo_name (str): Name of the repository for context
         """
-        print(f"=== Repository Contents: {self.__repo_name} ===")
+        print(f"=== Repository Contents: {self._repo_name} ===")
         print(f"Total files loaded: {len(self.documents)}")
         print("Files:")
         
@@ -51,7 +52,7 @@ class GithubLoader:
         
         print("=" * 50)
 
-    def __addtl_debug(self) -> None:
+    def _addtl_debug(self) -> None:
         print(f"\nSummary: Successfully loaded {len(self.documents)} Python files")
         if self.documents and len(self.documents) > 7:
             print(f"\nSample metadata from document 8: {self.documents[7].metadata}\n")
@@ -97,6 +98,57 @@ class GithubLoader:
             load_repo("https://github.com/org/repo", "main", debug=False)
         """
 
+        self.documents = list(self.iter_repo(*filters))
+        self._debug(debug_lvl)
+        
+        return self.documents
+
+    def _list_tree(self, client: GithubClient, folders: Optional[List[str]]) -> List[Dict]:
+        """
+        Lists the entries of the repository tree, or only those under the given folders: the
+        tree of "{branch}:{folder}" is requested instead of the whole repository. A folder
+        missing from the branch lists nothing, a missing branch or repository raises HTTPError.
+        """
+        if folders is None:
+            folders = [""]
+
+        entries = []
+        for folder in folders:
+            tree_ish = quote(f"{self.branch}:{folder.rstrip('/')}" if folder else self.branch,
+                             safe="/:")
+            with Tracer.span("list_files"):
+                response = client.get(
+                    f"/repos/{self._repo_name}/git/trees/{tree_ish}", params={"recursive": 1}
+                )
+            # A folder missing from the branch holds no files, but a mistyped branch or repository
+            # is answered with the same 404 and must fail
+            if folder and response.status_code == 404:
+                with Tracer.span("list_files"):
+                    branch_tree = client.get(f"/repos/{self._repo_name}/git/trees/"
+                                             f"{quote(self.branch, safe='/')}")
+                branch_tree.raise_for_status()
+                continue
+            response.raise_for_status()
+
+            tree = response.json()["tree"]
+            Tracer.count("tree_entries_listed", len(tree))
+            entries.extend({**entry, "path": folder + entry["path"]} for entry in tree)
+        return entries
+
+    def iter_repo(self, *filters) -> Iterator[Document]:
+        """
+        Lazily yields the files of the repository that pass the filters, one at a time.
+
+        Unlike load_repo, documents are not kept on the loader, so memory does not grow with the
+        size of the repository.
+
+        Args:
+            *filters: Variable number of filter functions or lists of filter functions to apply.
+                    If no filters provided, defaults to Python files only.
+
+        Returns:
+            Iterator[Document]: the loaded documents
+        """
         # Default to Python files if no filters provided
         if not filters:
             filters = [FileFilters.PYTHON_FILES]
@@ -104,26 +156,45 @@ class GithubLoader:
         # Combine all filters with logical AND
         combined_filter = FileFilters.combine_filters(*filters)
 
-        loader = GithubFileLoader(
-            repo=self.__repo_name,
-            branch=self.branch,
-            access_token=os.environ["GITHUB_PA_TOKEN"],
-            github_api_url="https://api.github.com",
-            file_filter=combined_filter,
-        )
-        self.documents = loader.load()
-        
-        # Debug output
+        # Same requests and metadata as langchain's GithubFileLoader, through the shared client
+        client = GithubClient.shared()
+        # Folders ("tree") and submodules ("commit") have no contents to fetch
+        files = [file for file in self._list_tree(client, combined_filter.prefixes())
+                 if file["type"] == "blob" and combined_filter(file["path"])]
+
+        # Every file is a REST call, answered from the response cache when it did not change
+        for file in files:
+            with Tracer.span("fetch_file"):
+                response = client.get(
+                    f"/repos/{self._repo_name}/contents/{file['path']}", params={"ref": self.branch}
+                )
+            response.raise_for_status()
+
+            body = response.json()
+            if not isinstance(body, dict):
+                continue
+            content = base64.b64decode(body["content"]).decode("utf-8")
+            if content == "":
+                continue
+
+            Tracer.count("files_fetched")
+            Tracer.count("bytes_fetched", len(content.encode("utf-8")))
+            yield Document(page_content=content, metadata={
+                "path": file["path"],
+                "sha": file["sha"],
+                "source": f"{client.base_url}/{self._repo_name}/{file['type']}/"
+                f"{self.branch}/{file['path']}"
+            })
+
+    def _debug(self, debug_lvl: int) -> None:
         match debug_lvl:
             case 1:
-                self.__print_repo_contents()
+                self._print_repo_contents()
             case 2: 
-                self.__print_repo_contents()
-                self.__addtl_debug()
+                self._print_repo_contents()
+                self._addtl_debug()
             case _:
                 pass
-        
-        return self.documents
     
     def switch_branch(self, branch: str) -> None:
         self.branch = branch
@@ -0,0 +1,278 @@
+import os
+import base64
+import shutil
+import tarfile
+import hashlib
+import subprocess
+
+# Local Imports
+from tcm.github.github_cache import RepoCache
+from tcm.github.github_client import GithubClient
+from tcm.github.github_loader import GithubLoader
+from tcm.helper.helper_filters import FileFilters, FilterSpec
+from tcm.helper.helper_limits import ConcurrencyLimits
+from tcm.helper.helper_trace import Tracer
+
+# Global Imports
+from typing import Dict, Iterable, Iterator, List, Optional
+from langchain_core.documents import Document
+
+LOADER_BACKENDS = ("api", "tarball", "git")
+
+class SnapshotLoader(GithubLoader):
+    """
+    Loads a repository from a local snapshot instead of one GitHub REST call per file.
+
+    The snapshot is either a tarball of the commit (one API call), a shallow `git` fetch, or an
+    existing local directory. Documents carry the same `path`, `sha` and `source` metadata as the
+    ones produced by `GithubFileLoader`.
+    """
+    method: str
+
+    def __init__(
+            self,
+            url: str,
+            branch: str="main",
+            method: str="tarball",
+            cache: Optional[RepoCache]=None
+    ) -> None:
+        if method not in ("tarball", "git"):
+            raise ValueError(f"Unknown snapshot method: {method}")
+
+        self.method = method
+        self.__local_dir = ""
+        self.__cache = cache
+
+        if os.path.isdir(url):
+            self.url = url
+            self.branch = branch
+            self.documents = []
+            self.__local_dir = os.path.abspath(url)
+            self._repo_name = os.path.basename(self.__local_dir.rstrip(os.sep))
+        else:
+            super().__init__(url, branch)
+            if self.__cache is None:
+                self.__cache = RepoCache()
+
+    @staticmethod
+    def git_blob_sha(content: bytes) -> str:
+        """Computes the same blob SHA that GitHub reports for a file."""
+        header = f"blob {len(content)}\0".encode("utf-8")
+        return hashlib.sha1(header + content).hexdigest()
+
+    def __clone_url(self) -> str:
+        return f"https://github.com/{self._repo_name}.git"
+
+    @staticmethod
+    def git_env() -> Dict[str, str]:
+        """
+        Environment of the `git` subprocesses. The token is passed as an HTTP header through
+        environment config rather than in the URL, so it never appears in the process list or in
+        the command of a failed call's CalledProcessError.
+        """
+        env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+        if os.environ.get("GITHUB_PA_TOKEN"):
+            credentials = f"x-access-token:{os.environ['GITHUB_PA_TOKEN']}".encode("utf-8")
+            env.update({
+                "GIT_CONFIG_COUNT": "1",
+                "GIT_CONFIG_KEY_0": "http.https://github.com/.extraHeader",
+                "GIT_CONFIG_VALUE_0": f"Authorization: Basic {base64.b64encode(credentials).decode()}"
+            })
+        return env
+
+    def resolve_commit(self) -> str:
+        """
+        Resolves the loader's branch to a commit SHA, reusing a recent resolution from the cache.
+
+        Returns:
+            str: the commit SHA, or an empty string for local directories
+        """
+        if self.__local_dir or self.__cache is None:
+            return ""
+
+        sha = self.__cache.get_ref(self._repo_name, self.branch)
+        if sha:
+            return sha
+
+        with Tracer.span("resolve_commit"):
+            if self.method == "git":
+                with ConcurrencyLimits.acquire(ConcurrencyLimits.GITHUB):
+                    result = subprocess.run(
+                        ["git", "ls-remote", self.__clone_url(), self.branch],
+                        check=True, capture_output=True, text=True, env=SnapshotLoader.git_env()
+                    )
+                if not result.stdout.strip():
+                    raise ValueError(f"Branch {self.branch} not found in {self._repo_name}")
+                sha = result.stdout.split()[0]
+            else:
+                # Revalidated with its ETag, an unchanged branch costs no quota
+                response = GithubClient.shared().get(
+                    f"/repos/{self._repo_name}/commits/{self.branch}",
+                    accept="application/vnd.github.sha"
+                )
+                response.raise_for_status()
+                sha = response.text.strip()
+
+        self.__cache.set_ref(self._repo_name, self.branch, sha)
+        return sha
+
+    def __fetch_tarball(self, sha: str, dest: str) -> None:
+        archive_path = os.path.join(dest, ".snapshot.tar.gz")
+        with GithubClient.shared().stream(f"/repos/{self._repo_name}/tarball/{sha}") as response:
+            response.raise_for_status()
+            with open(archive_path, 'wb') as f:
+                for block in response.iter_content(chunk_size=1 << 20):
+                    f.write(block)
+
+        tree_dir = os.path.join(dest, ".tree")
+        with tarfile.open(archive_path, "r:gz") as tar:
+            tar.extractall(tree_dir, filter="data")
+        os.remove(archive_path)
+
+        # GitHub wraps the tree in a single '{org}-{project}-{sha}/' folder
+        (top_level,) = os.listdir(tree_dir)
+        top_level_dir = os.path.join(tree_dir, top_level)
+        for name in os.listdir(top_level_dir):
+            os.rename(os.path.join(top_level_dir, name), os.path.join(dest, name))
+        shutil.rmtree(tree_dir)
+
+    def __fetch_git(self, sha: str, dest: str) -> None:
+        for command in (
+            ["git", "init", "--quiet", dest],
+            ["git", "-C", dest, "fetch", "--quiet", "--depth", "1", self.__clone_url(), sha],
+            ["git", "-C", dest, "checkout", "--quiet", "FETCH_HEAD"],
+        ):
+            subprocess.run(command, check=True, env=SnapshotLoader.git_env())
+        shutil.rmtree(os.path.join(dest, ".git"), ignore_errors=True)
+
+    def _source(self, path: str) -> str:
+        if self.__local_dir:
+            return os.path.join(self.__local_dir, path)
+        return f"https://api.github.com/{self._repo_name}/blob/{self.branch}/{path}"
+
+    @staticmethod
+    def _list_files(root: str, spec: Optional[FilterSpec]=None) -> List[str]:
+        """
+        Lists the repository-relative paths of the files under root. With a spec, only the
+        folders it can match in are walked, and directories it rules out are skipped.
+        """
+        folders = spec.prefixes() if spec is not None else None
+        files = []
+        for folder in folders if folders is not None else [""]:
+            top = os.path.join(root, folder)
+            if ".." in folder.split("/") or not os.path.isdir(top):
+                continue
+
+            for dirpath, dirnames, filenames in os.walk(top):
+                rel_dir = os.path.relpath(dirpath, root).replace(os.sep, "/")
+                rel_dir = "" if rel_dir == "." else rel_dir + "/"
+                dirnames[:] = sorted(
+                    d for d in dirnames
+                    if d != ".git" and (spec is None or spec.may_contain(f"{rel_dir}{d}/"))
+                )
+                for filename in sorted(filenames):
+                    files.append(rel_dir + filename)
+        return files
+
+    def _iter_files(self, root: str, paths: Iterable[str]) -> Iterator[Document]:
+        """Reads the given repository-relative paths under root into documents, one at a time."""
+        for path in paths:
+            with open(os.path.join(root, path), 'rb') as f:
+                raw = f.read()
+            try:
+                content = raw.decode("utf-8")
+            except UnicodeDecodeError:
+                continue
+            if content == "":
+                continue
+
+            Tracer.count("files_fetched")
+            Tracer.count("bytes_fetched", len(raw))
+            yield Document(page_content=content, metadata={
+                "path": path,
+                "sha": SnapshotLoader.git_blob_sha(raw),
+                "source": self._source(path),
+            })
+
+    def load_repo(self, *filters, debug_lvl: int = 1) -> List[Document]:
+        """
+        Loads files from a repository snapshot with customizable filters.
+
+        Remote repositories are resolved to a commit SHA and served from the on-disk RepoCache,
+        so only the first load of a commit downloads anything.
+
+        Args:
+            *filters: Variable number of filter functions or lists of filter functions to apply.
+                    If no filters provided, defaults to Python files only.
+            debug_lvl (int): Level of debug output about loaded files (default 1).
+
+        Returns:
+            List[Document]: A list of loaded document objects.
+        """
+        self.documents = list(self.iter_repo(*filters))
+        self._debug(debug_lvl)
+        return self.documents
+
+    def iter_repo(self, *filters) -> Iterator[Document]:
+        """
+        Lazily yields the files of the snapshot that pass the filters, one at a time.
+
+        Args:
+            *filters: Variable number of filter functions or lists of filter functions to apply.
+                    If no filters provided, defaults to Python files only.
+
+        Returns:
+            Iterator[Document]: the loaded documents
+        """
+        if not filters:
+            filters = [FileFilters.PYTHON_FILES]
+        combined_filter = FileFilters.combine_filters(*filters)
+
+        if self.__local_dir or self.__cache is None:
+            paths = SnapshotLoader._list_files(self.__local_dir, combined_filter)
+            yield from self._iter_files(
+                self.__local_dir, (path for path in paths if combined_filter(path))
+            )
+            return
+
+        sha = self.resolve_commit()
+        fetch = self.__fetch_git if self.method == "git" else self.__fetch_tarball
+
+        def __limited_fetch(dest: str) -> None:
+            with Tracer.span("fetch_snapshot", method=self.method), \
+                    ConcurrencyLimits.acquire(ConcurrencyLimits.GITHUB):
+                fetch(sha, dest)
+
+        # Concurrent analyses may fetch and evict meanwhile, the snapshot is pinned until read
+        with self.__cache.snapshot_dir(self._repo_name, sha, __limited_fetch) as root:
+            # The whole snapshot is listed once per process, a folder is cheaper to walk alone
+            if combined_filter.prefixes() is not None:
+                paths = SnapshotLoader._list_files(root, combined_filter)
+            else:
+                paths = self.__cache.list_files(self._repo_name, sha, root)
+            yield from self._iter_files(root, (path for path in paths if combined_filter(path)))
+
+def make_loader(
+        url: str,
+        branch: str="main",
+        backend: str="tarball",
+        cache: Optional[RepoCache]=None
+) -> GithubLoader:
+    """
+    Creates a repository loader for the requested backend.
+
+    Args:
+        url (str): GitHub repository URL, or a local directory for the snapshot backends
+        branch (str): branch to load (default "main")
+        backend (str): one of LOADER_BACKENDS (default "tarball")
+        cache (Optional[RepoCache]): snapshot cache to use (default: RepoCache())
+
+    Returns:
+        GithubLoader: the per-file API loader or a SnapshotLoader
+    """
+    if backend not in LOADER_BACKENDS:
+        raise ValueError(f"Unknown loader backend: {backend}. Expected one of {LOADER_BACKENDS}")
+
+    if backend == "api":
+        return GithubLoader(url, branch)
+    return SnapshotLoader(url, branch, method=backend, cache=cache)
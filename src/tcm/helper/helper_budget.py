@@ -0,0 +1,234 @@
+import os
+import time
+import random
+import itertools
+
+from collections import deque
+
+# Local Imports
+from tcm.helper.helper_trace import Tracer
+
+# Global Imports
+from langchain_core.documents import Document
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Set, Tuple
+
+Results = List[Tuple[Document, float]]
+
+class QueryBudget:
+    """
+    Bounds the number of vector store queries (and/or the time) spent retrieving one repository.
+
+    Chunks are stratified by package (the directory of their file). The sampling phase spends part
+    of the budget visiting packages round-robin in a shuffled order, each giving one chunk per
+    round, taken in turn from each of its files, so every package and then every file gets sampled
+    before any gets a second chunk, and large ones keep getting sampled after small ones run out.
+    The escalation phase then queries the rest of the packages whose best sampled chunk is within
+    `margin` of the current k-th best distance, closest packages first, re-evaluating the
+    threshold after every batch. Whatever budget is left resumes the sampling; chunks never
+    queried are skipped.
+
+    With a budget at least as large as the number of chunks, every chunk gets queried.
+
+    Chunks stream in from the splitter, so each package only keeps a uniform reservoir sample of
+    at most `max_queries` chunks (or `max_package_chunks` with a time budget only): more could
+    never be queried, and memory stays bounded by the budget instead of the repository size.
+    """
+    max_queries: int
+    time_budget: float
+    sample_fraction: float
+    margin: float
+    max_package_chunks: int
+
+    __SEED = 0
+
+    def __init__(
+            self,
+            max_queries: int=0,
+            time_budget: float=0.0,
+            sample_fraction: float=0.5,
+            margin: float=0.15,
+            max_package_chunks: int=2000
+    ) -> None:
+        """
+        Args:
+            max_queries (int): max chunks sent to the vector store, 0 for no limit (default 0)
+            time_budget (float): seconds after which no new query batch starts, counted from the
+                creation of the budget, 0 for no limit (default 0)
+            sample_fraction (float): share of the budget spent on the sampling phase (default 0.5)
+            margin (float): packages whose best distance is within this relative margin of the
+                k-th best distance get escalated (default 0.15)
+            max_package_chunks (int): chunks kept per package when there is no query budget
+                (default 2000)
+        """
+        self.max_queries = max_queries
+        self.time_budget = time_budget
+        self.sample_fraction = sample_fraction
+        self.margin = margin
+        self.max_package_chunks = max_package_chunks
+
+        self.__start = time.time()
+        self.__spent = 0
+        self.incomplete_paths: Set[str] = set()
+
+    def enabled(self) -> bool:
+        return self.max_queries > 0 or self.time_budget > 0
+
+    def spend(self, queries: int) -> None:
+        """Records queries actually sent to the vector store (duplicates served otherwise are free)."""
+        self.__spent += queries
+
+    def __remaining(self, fraction: float=1.0) -> int:
+        """Number of queries left in the given share of the budget, 0 once exhausted, -1 if unbounded."""
+        if self.time_budget > 0 and time.time() - self.__start >= self.time_budget * fraction:
+            return 0
+        if self.max_queries > 0:
+            return max(int(self.max_queries * fraction) - self.__spent, 0)
+        return -1
+
+    @staticmethod
+    def __stratify(
+            splits: Iterable[Document],
+            rng: random.Random,
+            capacity: int
+    ) -> Tuple[Dict[str, Deque[Document]], int, Set[str]]:
+        """
+        Returns the reservoir of each package in round-robin order of its files, the number of
+        chunks seen, and the paths of the files some chunks were left out of.
+        """
+        reservoirs: Dict[str, List[Document]] = {}
+        seen: Dict[str, int] = {}
+        dropped: Set[str] = set()
+        total = 0
+        for split in splits:
+            total += 1
+            package = os.path.dirname(split.metadata.get("path", ""))
+            reservoir = reservoirs.setdefault(package, [])
+            seen[package] = seen.get(package, 0) + 1
+            if len(reservoir) < capacity:
+                reservoir.append(split)
+                continue
+
+            # Algorithm R: every chunk of the package is kept with the same probability
+            slot = rng.randrange(seen[package])
+            if slot < capacity:
+                dropped.add(reservoir[slot].metadata.get("path", ""))
+                reservoir[slot] = split
+            else:
+                dropped.add(split.metadata.get("path", ""))
+
+        strata = {}
+        for package in sorted(reservoirs):
+            files: Dict[str, List[Document]] = {}
+            for split in reservoirs[package]:
+                files.setdefault(split.metadata.get("path", ""), []).append(split)
+            file_splits = [files[path] for path in sorted(files)]
+            for chunks in file_splits:
+                rng.shuffle(chunks)
+            rng.shuffle(file_splits)
+            # One chunk of each file per round
+            strata[package] = deque(
+                split for round_splits in itertools.zip_longest(*file_splits)
+                for split in round_splits if split is not None
+            )
+        return strata, total, dropped
+
+    def select(
+            self,
+            splits: Iterable[Document],
+            resolve: Callable[[List[str]], List[Results]],
+            k: int=3,
+            batch_size: int=500
+    ) -> Iterator[Tuple[Document, Results]]:
+        """
+        Queries a budgeted subset of the chunks.
+
+        Args:
+            splits (Iterable[Document]): chunks of the repository, with their "path" metadata
+            resolve (Callable[[List[str]], List[Results]]): returns the neighbors of a batch of
+                texts, calling `spend` for every text it actually queries
+            k (int): number of chunks that will be kept, sets the escalation threshold (default 3)
+            batch_size (int): max texts per `resolve` call (default 500)
+
+        Returns:
+            Iterator[Tuple[Document, Results]]: each queried chunk with its neighbors
+        """
+        rng = random.Random(QueryBudget.__SEED)
+        capacity = self.max_queries if self.max_queries > 0 else self.max_package_chunks
+        strata, total, dropped = QueryBudget.__stratify(splits, rng, capacity)
+        best: Dict[str, float] = {}
+        distances: List[float] = []
+        queried = 0
+
+        packages = list(strata)
+        rng.shuffle(packages)
+
+        def __round_robin() -> Iterator[Tuple[str, Document]]:
+            while any(strata.values()):
+                for package in packages:
+                    if strata[package]:
+                        yield package, strata[package].popleft()
+
+        def __run(batch: List[Tuple[str, Document]]) -> Iterator[Tuple[Document, Results]]:
+            nonlocal queried
+            results = resolve([split.page_content for _, split in batch])
+            for (package, split), split_results in zip(batch, results):
+                queried += 1
+                if split_results:
+                    distance = min(score for _, score in split_results)
+                    distances.append(distance)
+                    best[package] = min(best.get(package, distance), distance)
+                yield split, split_results
+
+        def __sample(fraction: float) -> Iterator[Tuple[Document, Results]]:
+            while True:
+                remaining = self.__remaining(fraction)
+                if remaining == 0 and queried:
+                    return
+                if remaining == 0:
+                    # An exhausted budget still gets one round, so there is something to rank
+                    remaining = min(len(packages), self.max_queries or len(packages))
+                size = batch_size if remaining < 0 else min(remaining, batch_size)
+                batch = list(itertools.islice(sampler, size))
+                if not batch:
+                    return
+                yield from __run(batch)
+
+        sampler = __round_robin()
+        with Tracer.span("sample"):
+            yield from __sample(self.sample_fraction)
+
+        # Escalation phase: finish the packages that could still make it into the top k
+        escalated = set()
+        with Tracer.span("escalate"):
+            while distances:
+                remaining = self.__remaining()
+                if remaining == 0:
+                    break
+
+                threshold = sorted(distances)[min(k, len(distances)) - 1] * (1 + self.margin)
+                candidates = sorted(
+                    (best[package], package) for package, chunks in strata.items()
+                    if chunks and package in best and best[package] <= threshold
+                )
+                if not candidates:
+                    break
+
+                size = batch_size if remaining < 0 else min(remaining, batch_size)
+                batch = []
+                for _, package in candidates:
+                    escalated.add(package)
+                    while strata[package] and len(batch) < size:
+                        batch.append((package, strata[package].popleft()))
+                yield from __run(batch)
+
+        # Spend what is left on more samples
+        with Tracer.span("sample"):
+            yield from __sample(1.0)
+
+        self.incomplete_paths = dropped | {
+            split.metadata.get("path", "") for chunks in strata.values() for split in chunks
+        }
+        Tracer.count("escalated_packages", len(escalated))
+        Tracer.count("chunks_skipped", total - queried)
+        print(f"(DEBUG): Query budget: {queried}/{total} chunks, {self.__spent} queries, "
+              f"{len(escalated)} packages escalated")
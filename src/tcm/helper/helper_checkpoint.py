@@ -0,0 +1,135 @@
+import os
+import json
+import sqlite3
+import threading
+
+# Global Imports
+from typing import Any, Dict, Tuple
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+CHECKPOINT_PATH = ".cache/tcm/checkpoints.sqlite"
+RESULTS_PATH = "responses.jsonl"
+
+class ResourceSerializer(JsonPlusSerializer):
+    """
+    Checkpoint serializer that stores the live objects of the state (vector database, LLM,
+    templates, see RUNTIME_KEYS) as references by name, and resolves them to the current run's
+    objects when a checkpoint is loaded. They cannot be serialized and every run builds them anyway.
+
+    LangGraph serializes a whole checkpoint, an input dict or a single channel value at a time, so
+    references are swapped in and out of nested dicts as well.
+    """
+    __TYPE = "tcm_resource"
+    __PREFIX = "\0tcm_resource:"
+
+    def __init__(self, resources: Dict[str, Any]) -> None:
+        """
+        Args:
+            resources (Dict[str, Any]): live objects by state key, None values are serialized as is
+        """
+        super().__init__()
+        self.__resources = {name: value for name, value in resources.items() if value is not None}
+        self.__names = {id(value): name for name, value in self.__resources.items()}
+
+    def __swap_out(self, value: Any) -> Any:
+        if id(value) in self.__names:
+            return ResourceSerializer.__PREFIX + self.__names[id(value)]
+        if isinstance(value, dict):
+            return {key: self.__swap_out(item) for key, item in value.items()}
+        return value
+
+    def __swap_in(self, value: Any) -> Any:
+        prefix = ResourceSerializer.__PREFIX
+        if isinstance(value, str) and value.startswith(prefix):
+            return self.__resources[value[len(prefix):]]
+        if isinstance(value, dict):
+            return {key: self.__swap_in(item) for key, item in value.items()}
+        return value
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if id(obj) in self.__names:
+            return ResourceSerializer.__TYPE, self.__names[id(obj)].encode("utf-8")
+        return super().dumps_typed(self.__swap_out(obj))
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        if data[0] == ResourceSerializer.__TYPE:
+            return self.__resources[data[1].decode("utf-8")]
+        return self.__swap_in(super().loads_typed(data))
+
+    def dumps(self, obj: Any) -> bytes:
+        return super().dumps(self.__swap_out(obj))
+
+    def loads(self, data: bytes) -> Any:
+        return self.__swap_in(super().loads(data))
+
+def make_checkpointer(path: str, resources: Dict[str, Any]) -> SqliteSaver:
+    """
+    Opens the SQLite checkpointer keeping the graph state of every repository after each node, so
+    an interrupted analysis can continue from the last finished node.
+
+    Args:
+        path (str): SQLite file of the checkpoints
+        resources (Dict[str, Any]): live objects of the state, see ResourceSerializer
+    """
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    serde = ResourceSerializer(resources)
+    checkpointer = SqliteSaver(conn, serde=serde)
+    # Checkpoint metadata (the writes of each step, the input included) has its own serializer
+    checkpointer.jsonplus_serde = serde
+    return checkpointer
+
+class ResultsStore:
+    """
+    Append-only JSONL file of finished analyses, one line per repository, written and flushed as
+    soon as each one completes so a crashed or interrupted batch keeps its finished work.
+
+    Entries are identified by (url, branch, folder, commit): a rerun with `--resume` skips those
+    already stored, while a new commit on the branch is analyzed again. Later lines win. Entries
+    without a commit (API loader, local directories) are never skipped, their contents may have
+    changed since.
+    """
+    path: str
+
+    def __init__(self, path: str=RESULTS_PATH) -> None:
+        self.path = path
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def identity(url: str, branch: str, folder: str, commit: str) -> str:
+        return json.dumps([url, branch, folder, commit])
+
+    def completed(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the stored entries by identity, ignoring a line cut short by a crash."""
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                identity = ResultsStore.identity(
+                    entry["url"], entry["branch"], entry["folder"], entry["commit"]
+                )
+                entries[identity] = entry
+        return entries
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Appends one finished analysis and flushes it to disk. Safe to call from several threads."""
+        dirname = os.path.dirname(self.path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        line = json.dumps(entry) + "\n"
+        with self.__lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
@@ -9,6 +9,9 @@ Example code for that tech credit:
 
 Here is the code from user:
 {{ part.user_code }}
+{% if part.occurrences > 1 %}
+(This code appears {{ part.occurrences }} times in the repository, near-duplicates included)
+{% endif %}
 {% endfor %}
 """
 
@@ -33,4 +36,21 @@ tech credits.
 
 Question: {question}
 Answer:
-"""
\ No newline at end of file
+"""
+REDUCE_SYSTEM_PROMPT = (
+    "You are an assistant for identifying technical credit. You are given the findings of several "
+    "analyses of the same repository, each about a different group of its code snippets. Merge "
+    "them into one answer: list each technical credit once, with the parts it was found in, and "
+    "only keep the provided technical credit categories. Keep your answer as concise as possible."
+)
+
+REDUCE_USER_PROMPT = """\
+The list of technical credit categories you must follow:
+{tech_credit_list}
+
+The findings for each group of code snippets:
+{findings}
+
+Question: {question}
+Answer:
+"""
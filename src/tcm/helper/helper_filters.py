@@ -1,35 +1,173 @@
+import re
+import fnmatch
+
 # Global Imports
-from typing import Callable
+from typing import Callable, Iterable, List, Optional, Tuple
+
+class FilterSpec:
+    """
+    Declarative file filter: every field is a condition on the repository-relative path, and a path
+    passes when all of them hold. `None` leaves a condition out, an empty tuple matches nothing.
+
+    The conditions are compiled once into a single anchored regex of lookaheads, so a path is
+    checked with one `match` call instead of one lambda per filter. Because the spec is
+    declarative, loaders can also push it down: `prefixes()` tells which subtrees can hold
+    matches and `may_contain()` which directories a walk can skip. Plain callables combined with a
+    spec are kept as `predicates` and evaluated after the regex.
+    """
+    extensions: Optional[Tuple[str, ...]]
+    include_prefixes: Optional[Tuple[str, ...]]
+    filenames: Optional[Tuple[str, ...]]
+    exclude_prefixes: Tuple[str, ...]
+    exclude_substrings: Tuple[str, ...]
+    exclude_hidden: bool
+    globs: Tuple[str, ...]
+    predicates: Tuple[Callable[[str], bool], ...]
+
+    def __init__(
+            self,
+            extensions: Optional[Iterable[str]]=None,
+            include_prefixes: Optional[Iterable[str]]=None,
+            filenames: Optional[Iterable[str]]=None,
+            exclude_prefixes: Iterable[str]=(),
+            exclude_substrings: Iterable[str]=(),
+            exclude_hidden: bool=False,
+            globs: Iterable[str]=(),
+            predicates: Iterable[Callable[[str], bool]]=()
+    ) -> None:
+        """
+        Args:
+            extensions (Optional[Iterable[str]]): the path ends with one of them
+            include_prefixes (Optional[Iterable[str]]): the path starts with one of them
+            filenames (Optional[Iterable[str]]): the last path component is one of them
+            exclude_prefixes (Iterable[str]): the path starts with none of them
+            exclude_substrings (Iterable[str]): the path contains none of them
+            exclude_hidden (bool): no path component starts with "."
+            globs (Iterable[str]): the path matches every one of these fnmatch patterns
+            predicates (Iterable[Callable[[str], bool]]): arbitrary filters, all must pass
+        """
+        self.extensions = tuple(extensions) if extensions is not None else None
+        self.include_prefixes = tuple(include_prefixes) if include_prefixes is not None else None
+        self.filenames = tuple(filenames) if filenames is not None else None
+        self.exclude_prefixes = tuple(exclude_prefixes)
+        self.exclude_substrings = tuple(exclude_substrings)
+        self.exclude_hidden = exclude_hidden
+        self.globs = tuple(globs)
+        self.predicates = tuple(predicates)
+        self.__regex = self.__compile()
+
+    @staticmethod
+    def __any_of(items: Iterable[str]) -> str:
+        return "|".join(re.escape(item) for item in items) or "(?!)"
+
+    def __compile(self) -> re.Pattern:
+        lookaheads = []
+        if self.include_prefixes is not None:
+            lookaheads.append(f"(?=(?:{FilterSpec.__any_of(self.include_prefixes)}))")
+        if self.exclude_prefixes:
+            lookaheads.append(f"(?!(?:{FilterSpec.__any_of(self.exclude_prefixes)}))")
+        if self.exclude_substrings:
+            lookaheads.append(f"(?!.*(?:{FilterSpec.__any_of(self.exclude_substrings)}))")
+        if self.exclude_hidden:
+            lookaheads.append(r"(?!(?:.*/)?\.)")
+        if self.extensions is not None:
+            lookaheads.append(rf"(?=.*(?:{FilterSpec.__any_of(self.extensions)})\Z)")
+        if self.filenames is not None:
+            lookaheads.append(rf"(?=(?:.*/)?(?:{FilterSpec.__any_of(self.filenames)})\Z)")
+        for glob in self.globs:
+            lookaheads.append(f"(?={fnmatch.translate(glob)})")
+        return re.compile("".join(lookaheads), re.DOTALL)
+
+    def __call__(self, file_path: str) -> bool:
+        return self.__regex.match(file_path) is not None and \
+            all(predicate(file_path) for predicate in self.predicates)
+
+    @staticmethod
+    def __intersect(
+            left: Optional[Tuple[str, ...]],
+            right: Optional[Tuple[str, ...]],
+            narrower: Callable[[str, str], bool]
+    ) -> Optional[Tuple[str, ...]]:
+        """
+        ANDs two any-of conditions: keeps each item of one side that is at least as narrow as an
+        item of the other, e.g. "src/adapter/" from "src/adapter/" and "src/".
+        """
+        if left is None or right is None:
+            return right if left is None else left
+        items = [a for a in left if any(narrower(a, b) for b in right)] + \
+            [b for b in right if any(narrower(b, a) for a in left)]
+        return tuple(dict.fromkeys(items))
+
+    def __and__(self, other: "FilterSpec") -> "FilterSpec":
+        return FilterSpec(
+            extensions=FilterSpec.__intersect(self.extensions, other.extensions, str.endswith),
+            include_prefixes=FilterSpec.__intersect(
+                self.include_prefixes, other.include_prefixes, str.startswith
+            ),
+            filenames=FilterSpec.__intersect(self.filenames, other.filenames, str.__eq__),
+            exclude_prefixes=self.exclude_prefixes + other.exclude_prefixes,
+            exclude_substrings=self.exclude_substrings + other.exclude_substrings,
+            exclude_hidden=self.exclude_hidden or other.exclude_hidden,
+            globs=self.globs + other.globs,
+            predicates=self.predicates + other.predicates
+        )
+
+    def prefixes(self) -> Optional[List[str]]:
+        """
+        Returns the folders (ending with "/") that hold every matching path, none nested in
+        another, or None if matches can be anywhere in the repository.
+        """
+        if self.include_prefixes is None:
+            return None
+
+        # A prefix that is not a whole folder name, e.g. "src/Foo", narrows down to its folder
+        folders = sorted({prefix[:prefix.rfind("/") + 1] for prefix in self.include_prefixes})
+        if "" in folders:
+            return None
+        return [
+            folder for folder in folders
+            if not any(folder != other and folder.startswith(other) for other in folders)
+        ]
+
+    def may_contain(self, directory: str) -> bool:
+        """False if no path under `directory` (repository-relative, ending with "/") can match."""
+        if self.include_prefixes is not None and not any(
+            prefix.startswith(directory) or directory.startswith(prefix)
+            for prefix in self.include_prefixes
+        ):
+            return False
+        if any(directory.startswith(prefix) for prefix in self.exclude_prefixes):
+            return False
+        if any(substring in directory for substring in self.exclude_substrings):
+            return False
+        if self.exclude_hidden and any(part.startswith(".") for part in directory.split("/")):
+            return False
+        return True
 
-# Filter constants (like C macros) - each returns a lambda function
+# Filter constants (like C macros) - each is a FilterSpec, callable like a lambda
 class FileFilters:
     """Collection of file filter constants that can be combined with logical operations"""
     
     # Extension filters
-    PYTHON_FILES = lambda file_path: file_path.endswith(".py")
-    JAVA_FILES = lambda file_path: file_path.endswith(".java")
-    JAVASCRIPT_FILES = lambda file_path: file_path.endswith((".js", ".jsx"))
-    TYPESCRIPT_FILES = lambda file_path: file_path.endswith((".ts", ".tsx"))
-    JSON_FILES = lambda file_path: file_path.endswith(".json")
-    MARKDOWN_FILES = lambda file_path: file_path.endswith((".md", ".markdown"))
-    YAML_FILES = lambda file_path: file_path.endswith((".yml", ".yaml"))
+    PYTHON_FILES = FilterSpec(extensions=[".py"])
+    JAVA_FILES = FilterSpec(extensions=[".java"])
+    JAVASCRIPT_FILES = FilterSpec(extensions=[".js", ".jsx"])
+    TYPESCRIPT_FILES = FilterSpec(extensions=[".ts", ".tsx"])
+    JSON_FILES = FilterSpec(extensions=[".json"])
+    MARKDOWN_FILES = FilterSpec(extensions=[".md", ".markdown"])
+    YAML_FILES = FilterSpec(extensions=[".yml", ".yaml"])
     
     # Directory exclusion filters
-    NOT_TESTS = lambda file_path: not file_path.startswith("tests/") and \
-        not file_path.startswith("test/")
-    NOT_NODE_MODULES = lambda file_path: "node_modules" not in file_path
-    NOT_DIST = lambda file_path: not file_path.startswith("dist/") and \
-        not file_path.startswith("build/")
-    NOT_CACHE = lambda file_path: \
-        not any(cache_dir in file_path for cache_dir in ["__pycache__", ".cache", "cache/"])
-    NOT_HIDDEN = lambda file_path: \
-        not any(part.startswith(".") for part in file_path.split("/"))
-    NOT_VENV = lambda file_path: \
-        not any(venv_dir in file_path for venv_dir in ["venv/", "env/", ".env/", "virtualenv/"])
+    NOT_TESTS = FilterSpec(exclude_prefixes=["tests/", "test/"])
+    NOT_NODE_MODULES = FilterSpec(exclude_substrings=["node_modules"])
+    NOT_DIST = FilterSpec(exclude_prefixes=["dist/", "build/"])
+    NOT_CACHE = FilterSpec(exclude_substrings=["__pycache__", ".cache", "cache/"])
+    NOT_HIDDEN = FilterSpec(exclude_hidden=True)
+    NOT_VENV = FilterSpec(exclude_substrings=["venv/", "env/", ".env/", "virtualenv/"])
     
     # Directory inclusion filters
     @staticmethod
-    def FOLDER_ONLY(folder_name: str):
+    def FOLDER_ONLY(folder_name: str) -> FilterSpec:
         """
         Creates a filter that only includes files from a specific folder.
         
@@ -37,7 +175,7 @@ class FileFilters:
             folder_name (str): The folder name/path to include (e.g., "src", "lib", "utils/helpers")
             
         Returns:
-            A lambda function that filters for files in the specified folder
+            A filter for files in the specified folder, which loaders list on its own
             
         Examples:
             FileFilters.FOLDER_ONLY("src")  # Only files in src/ folder
@@ -45,10 +183,10 @@ class FileFilters:
         """
         # Normalize folder name to ensure it ends with /
         normalized_folder = folder_name.rstrip('/') + '/'
-        return lambda file_path: file_path.startswith(normalized_folder)
+        return FilterSpec(include_prefixes=[normalized_folder])
     
     @staticmethod
-    def FOLDERS_ONLY(*folder_names):
+    def FOLDERS_ONLY(*folder_names) -> FilterSpec:
         """
         Creates a filter that includes files from multiple specific folders.
         
@@ -56,17 +194,17 @@ class FileFilters:
             *folder_names: Variable number of folder names to include
             
         Returns:
-            A lambda function that filters for files in any of the specified folders
+            A filter for files in any of the specified folders
             
         Examples:
             FileFilters.FOLDERS_ONLY("src", "lib")  # Files in src/ OR lib/
             FileFilters.FOLDERS_ONLY("components", "utils", "services")  # Multiple folders
         """
         normalized_folders = [folder.rstrip('/') + '/' for folder in folder_names]
-        return lambda file_path: any(file_path.startswith(folder) for folder in normalized_folders)
+        return FilterSpec(include_prefixes=normalized_folders)
     
     @staticmethod
-    def FILE_ONLY(filename: str) -> Callable[[str], bool]:
+    def FILE_ONLY(filename: str) -> FilterSpec:
         """
         Creates a filter that only includes a specific file name, regardless of folder.
 
@@ -74,29 +212,41 @@ class FileFilters:
             filename (str): The exact filename to include (e.g., "main.py", "config.json")
 
         Returns:
-            A lambda function that filters for that exact file name
+            A filter for that exact file name
 
         Examples:
             FileFilters.FILE_ONLY("main.py")  # Matches any path ending in /main.py
         """
-        return lambda file_path: file_path.endswith('/' + filename) or file_path == filename
+        return FilterSpec(filenames=[filename])
+
+    @staticmethod
+    def GLOB(pattern: str) -> FilterSpec:
+        """
+        Creates a filter that only includes paths matching an fnmatch pattern ("*" also matches
+        "/").
+
+        Examples:
+            FileFilters.GLOB("src/*/adapter/*.java")
+        """
+        return FilterSpec(globs=[pattern])
     
     # Common combinations
     PYTHON_SOURCE_ONLY = [PYTHON_FILES, NOT_TESTS, NOT_CACHE, NOT_HIDDEN]
-    WEB_SOURCE_FILES = [lambda f: any(f.endswith(ext) for ext in \
-                                      [".js", ".jsx", ".ts", ".tsx", ".css", ".html"]), \
-                                        NOT_NODE_MODULES, NOT_DIST]
+    WEB_SOURCE_FILES = [FilterSpec(extensions=[".js", ".jsx", ".ts", ".tsx", ".css", ".html"]),
+                        NOT_NODE_MODULES, NOT_DIST]
     
     @staticmethod
-    def combine_filters(*filters) -> Callable[[str], bool]:
+    def combine_filters(*filters) -> FilterSpec:
         """
         Combine multiple filter functions with logical AND operation.
         
         Args:
-            *filters: Variable number of filter functions or lists of filter functions
+            *filters: Variable number of filters (FilterSpec or any function of the path) or lists
+                of them
             
         Returns:
-            A single filter function that applies all filters with AND logic
+            A single FilterSpec that applies all filters with AND logic, plain functions being
+            evaluated after the compiled ones
         """
         # Flatten any nested lists
         flat_filters = []
@@ -106,7 +256,7 @@ class FileFilters:
             else:
                 flat_filters.append(f)
         
-        def combined_filter(file_path: str) -> bool:
-            return all(filter_func(file_path) for filter_func in flat_filters)
-        
-        return combined_filter
\ No newline at end of file
+        combined = FilterSpec()
+        for f in flat_filters:
+            combined = combined & (f if isinstance(f, FilterSpec) else FilterSpec(predicates=[f]))
+        return combined
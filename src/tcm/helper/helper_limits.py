@@ -0,0 +1,42 @@
+import threading
+
+# Global Imports
+from typing import Dict, Iterator
+from contextlib import contextmanager
+
+class ConcurrencyLimits:
+    """
+    Process-wide caps on the number of in-flight requests to each external provider.
+
+    Only the code that actually performs a network call should acquire a slot, never its callers,
+    so that nested calls can not deadlock on a limit of 1.
+    """
+    GITHUB = "github"
+    EMBEDDING = "embedding"
+    LLM = "llm"
+
+    __semaphores: Dict[str, threading.BoundedSemaphore] = {
+        GITHUB: threading.BoundedSemaphore(4),
+        EMBEDDING: threading.BoundedSemaphore(4),
+        LLM: threading.BoundedSemaphore(2),
+    }
+
+    @staticmethod
+    def configure(github: int=4, embedding: int=4, llm: int=2) -> None:
+        """
+        Sets the number of concurrent requests allowed per provider. Must be called before any
+        worker threads start.
+        """
+        ConcurrencyLimits.__semaphores = {
+            ConcurrencyLimits.GITHUB: threading.BoundedSemaphore(github),
+            ConcurrencyLimits.EMBEDDING: threading.BoundedSemaphore(embedding),
+            ConcurrencyLimits.LLM: threading.BoundedSemaphore(llm),
+        }
+
+    @staticmethod
+    @contextmanager
+    def acquire(provider: str) -> Iterator[None]:
+        """Blocks until a request slot for the provider is free and holds it for the block."""
+        semaphore = ConcurrencyLimits.__semaphores[provider]
+        with semaphore:
+            yield
@@ -0,0 +1,145 @@
+import os
+import time
+import sqlite3
+import threading
+
+# Global Imports
+from typing import Dict, Iterable, Optional
+
+class SqliteCache:
+    """
+    Small persistent key/value cache backed by a single SQLite table.
+
+    Values are raw bytes. Reads refresh an entry's last-used time so that, once the table grows past
+    `max_entries`, the least recently used entries are evicted first. Entries older than `ttl`
+    seconds (if set) are treated as misses and deleted. Safe to share between threads.
+    """
+    path: str
+    table: str
+    max_entries: int
+    ttl: Optional[float]
+    hits: int
+    misses: int
+
+    # SQLite limits the number of bound parameters per statement
+    __BATCH = 500
+
+    def __init__(
+            self,
+            path: str,
+            table: str,
+            max_entries: int=100_000,
+            ttl: Optional[float]=None
+    ) -> None:
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.__lock = threading.Lock()
+
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        self.__conn = sqlite3.connect(path, check_same_thread=False)
+        self.__conn.execute("PRAGMA journal_mode=WAL")
+        self.__conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL, "
+            "last_used REAL NOT NULL)"
+        )
+        self.__conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used)"
+        )
+        self.__conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """
+        Looks up several keys at once.
+
+        Args:
+            keys (Iterable[str]): keys to look up
+
+        Returns:
+            Dict[str, bytes]: the values of the keys that were found (misses are left out)
+        """
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        found = {}
+
+        with self.__lock:
+            for start in range(0, len(keys), SqliteCache.__BATCH):
+                batch = keys[start:start + SqliteCache.__BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.__conn.execute(
+                    f"SELECT key, value, created_at FROM {self.table} "
+                    f"WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+
+                expired = []
+                for key, value, created_at in rows:
+                    if self.ttl is not None and now - created_at > self.ttl:
+                        expired.append(key)
+                    else:
+                        found[key] = value
+
+                if expired:
+                    self.__conn.executemany(
+                        f"DELETE FROM {self.table} WHERE key = ?", [(key,) for key in expired]
+                    )
+                self.__conn.executemany(
+                    f"UPDATE {self.table} SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in batch if key in found]
+                )
+            self.__conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        return found
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, bytes]) -> None:
+        """Stores several values at once, then evicts least recently used entries if needed."""
+        if not items:
+            return
+
+        now = time.time()
+        with self.__lock:
+            self.__conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                [(key, value, now, now) for key, value in items.items()]
+            )
+            self.__evict()
+            self.__conn.commit()
+
+    def put(self, key: str, value: bytes) -> None:
+        self.put_many({key: value})
+
+    def __evict(self) -> None:
+        (count,) = self.__conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        if count > self.max_entries:
+            self.__conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def __len__(self) -> int:
+        with self.__lock:
+            (count,) = self.__conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return count
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__conn.execute(f"DELETE FROM {self.table}")
+            self.__conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
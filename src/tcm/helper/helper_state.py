@@ -1,24 +1,58 @@
 import json
+import heapq
+import hashlib
+import itertools
+import contextvars
 
 # Local Imports
-from tcm.database.database_chroma import ChromaDB
+from tcm.database.database_vector import VectorDB
+from tcm.database.database_lexical import LexicalIndex
+from tcm.database.database_retrieval_cache import RetrievalCache
 
+from tcm.helper.helper_budget import QueryBudget
 from tcm.helper.helper_document import DocumentHelper
 from tcm.helper.helper_filters import FileFilters
+from tcm.helper.helper_stream import batched, prefetch
+from tcm.helper.helper_trace import Tracer
+from tcm.helper.helper_taxonomy import TaxonomyProvider
 
+from tcm.rag.rag_knn import KnnVoter
 from tcm.rag.rag_llm import LargeLanguageModel
+from tcm.rag.rag_prompt_packer import PromptPacker
 
+from tcm.splitter.splitter_dedup import ChunkDeduplicator
 from tcm.splitter.splitter_token_splitter import TokenSplitter
 
-from tcm.github.github_loader import GithubLoader
+from tcm.github.github_snapshot_loader import make_loader
 
 # Global Imports
 from jinja2 import Template
-from typing import List, Dict, TypedDict
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple, TypedDict
 from langchain_core.documents import Document
 from langgraph.graph import START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompt_values import PromptValue
+from concurrent.futures import ThreadPoolExecutor
+
+TOP_DOCS_PER_QUERY = 4
+
+# "llm" asks the LLM about the top k parts in one prompt, "map-reduce" asks about groups of parts
+# in parallel and merges the answers, "fast" labels the repository with kNN votes only
+ANALYSIS_MODES = ("llm", "map-reduce", "fast")
+
+# A chunk standing for n (near-)duplicates ranks as if its distance were divided by
+# 1 + DUPLICATE_WEIGHT * ln(n): repeated code is more evidence of a pattern, but only mildly
+DUPLICATE_WEIGHT = 0.1
+
+# A chunk passing the lexical prefilter with score s ranks as if its distance were divided by
+# 1 + LEXICAL_WEIGHT * s, s being between 0 and 1
+LEXICAL_WEIGHT = 0.5
+
+# Live objects of the state, shared by every run instead of being serialized with it
+RUNTIME_KEYS = ("vector_db", "lexical_index", "retrieval_cache", "user_prompt_template", "prompt",
+                "reduce_prompt", "llm")
 
 class State(TypedDict):
     question: str
@@ -27,10 +61,25 @@ class State(TypedDict):
     url: str
     branch: str
     folder: str
+    loader_backend: str
+    tech_credit_list: List[str]
+    k: int
+    dedup: bool
+    max_queries: int
+    time_budget: float
+    mode: str
+    prompt_budget: int
+    group_size: int
+    findings: List[str]
+    tech_credits: List[Dict]
     answer: str
-    vector_db: ChromaDB
+    vector_db: VectorDB
+    lexical_index: Optional[LexicalIndex]
+    min_lexical_score: float
+    retrieval_cache: Optional[RetrievalCache]
     user_prompt_template: Template
     prompt: ChatPromptTemplate
+    reduce_prompt: ChatPromptTemplate
     llm: LargeLanguageModel
 
 def __to_json(state: State) -> str:
@@ -46,35 +95,160 @@ def __to_json(state: State) -> str:
         serialize_document(doc) for doc in state["context_doc"]
     ]
 
-    for key in ["vector_db", "user_prompt_template", "prompt", "llm"]:
+    for key in RUNTIME_KEYS:
         serializable_state.pop(key, None)
 
     return json.dumps(serializable_state, indent=2)
 
+def __retrieval_fingerprint(state: State) -> str:
+    vector_db = state["vector_db"]
+    lexical_index = state.get("lexical_index")
+    return hashlib.sha256(json.dumps({
+        "backend": type(vector_db).__name__,
+        "collection": vector_db.fingerprint(),
+        "splitter": TokenSplitter.config(),
+        "top_docs_per_query": TOP_DOCS_PER_QUERY,
+        "dedup": state.get("dedup", True),
+        "lexical": [lexical_index.fingerprint(), state.get("min_lexical_score", 0.0)]
+            if lexical_index is not None else None
+    }, sort_keys=True).encode("utf-8")).hexdigest()
+
+def __lexical_prefilter(
+        splits: Iterable[Document],
+        index: LexicalIndex,
+        min_score: float,
+        k: int
+) -> Iterator[Document]:
+    """
+    Lets through the chunks scoring at least `min_score` against the lexical index, with their
+    score in the "lexical_score" metadata. If fewer than k chunks pass, the k best rejected ones
+    are let through at the end, so there is always something to rank.
+    """
+    passed = 0
+    rejected: List[Tuple[float, int, Document]] = []
+    with Tracer.span("lexical"):
+        for order, split in enumerate(splits):
+            score = index.score(split.page_content)
+            # Splits of one file share their metadata dict
+            split.metadata = {**split.metadata, "lexical_score": score}
+            if score >= min_score:
+                passed += 1
+                yield split
+                continue
+
+            Tracer.count("lexical_rejected")
+            if len(rejected) < k:
+                heapq.heappush(rejected, (score, order, split))
+            elif score > rejected[0][0]:
+                heapq.heapreplace(rejected, (score, order, split))
+
+    if passed < k:
+        for _, _, split in sorted(rejected, reverse=True, key=lambda item: item[:2])[:k - passed]:
+            yield split
+
+@Tracer.traced
 def retrieve(state: State):
-    gh_loader = GithubLoader(state["url"], state['branch'])
+    # Started first, so a time budget also covers fetching and splitting the repository
+    budget = QueryBudget(state.get("max_queries", 0), state.get("time_budget", 0.0))
+    gh_loader = make_loader(state["url"], state["branch"], state.get("loader_backend", "tarball"))
+    filters = [FileFilters.JAVA_FILES, FileFilters.NOT_TESTS]
     if state["folder"] != "":
-        gh_loader.load_repo(
-            FileFilters.FOLDER_ONLY(state["folder"]),
-            FileFilters.JAVA_FILES, 
-            FileFilters.NOT_TESTS
+        filters.insert(0, FileFilters.FOLDER_ONLY(state["folder"]))
+
+    # Files keep downloading on a background thread while earlier ones are split and queried, and
+    # only one query batch of splits is ever held in memory
+    repo_files = prefetch(gh_loader.iter_repo(*filters))
+    vector_db = state["vector_db"]
+
+    # Files unchanged since the last analyzed commit keep their neighbors, only the diff gets
+    # split, embedded and queried
+    previous = None
+    retrieval_cache = state.get("retrieval_cache")
+    if retrieval_cache is not None:
+        previous = retrieval_cache.open(
+            state["url"], state["branch"], state["folder"], __retrieval_fingerprint(state)
+        )
+        repo_files = (
+            doc for doc in repo_files
+            if not previous.reuse(doc.metadata.get("path", ""), doc.metadata.get("sha", ""))
         )
+    repo_splits = TokenSplitter.iter_split_documents(repo_files, keep_path=True)
+
+    # Chunks sharing no identifiers or keywords with the training examples are never embedded
+    lexical_index = state.get("lexical_index")
+    if lexical_index is not None:
+        repo_splits = __lexical_prefilter(
+            repo_splits, lexical_index, state.get("min_lexical_score", 0.0), state.get("k", 3)
+        )
+
+    # (Near-)duplicate chunks reuse the neighbors of the first chunk of their cluster
+    dedup = ChunkDeduplicator() if state.get("dedup", True) else None
+
+    def __query(texts: List[str]) -> List[List[Tuple[Document, float]]]:
+        budget.spend(len(texts))
+        return vector_db.query_batch(texts, TOP_DOCS_PER_QUERY)
+
+    def __resolve(texts: List[str]) -> List[List[Tuple[Document, float]]]:
+        return dedup.query(texts, __query) if dedup is not None else __query(texts)
+
+    def __retrieve_all():
+        for batch in batched(repo_splits, vector_db.query_batch_size):
+            yield from zip(batch, __resolve([split.page_content for split in batch]))
+
+    def __retrieve_changed():
+        if budget.enabled():
+            # Large repositories only get a representative sample of their chunks queried
+            selected = budget.select(
+                repo_splits, __resolve, state.get("k", 3), vector_db.query_batch_size
+            )
+        else:
+            selected = __retrieve_all()
+
+        for split, split_results in selected:
+            if "lexical_score" in split.metadata:
+                # Fuse the lexical and dense scores
+                fusion = 1 + LEXICAL_WEIGHT * split.metadata["lexical_score"]
+                split_results = [(doc, distance / fusion) for doc, distance in split_results]
+            if previous is not None:
+                previous.record(split.metadata["path"], split.page_content, split_results)
+            yield split.metadata["path"], split.page_content, split_results
+
+    retrieved = __retrieve_changed()
+    if previous is not None:
+        # Reused chunks are only known once every file has been seen, so they come last
+        retrieved = itertools.chain(retrieved, previous.iter_reused())
+
+    # In fast mode every chunk votes for the tech credits of its neighbors
+    voter = KnnVoter() if state.get("mode", "llm") == "fast" else None
+
+    def __observe():
+        for path, text, results in retrieved:
+            if voter is not None:
+                voter.add(path, text, results)
+            yield text, results
+
+    if dedup is None:
+        docs = VectorDB.top_k(__observe(), k=state.get("k", 3))
     else:
-        gh_loader.load_repo(
-            FileFilters.JAVA_FILES, 
-            FileFilters.NOT_TESTS
+        docs = VectorDB.top_k(
+            dedup.collapse(__observe()),
+            k=state.get("k", 3),
+            counts=dedup.counts,
+            count_weight=DUPLICATE_WEIGHT
         )
+        print(f"(DEBUG): Deduplicated chunks: {dedup.stats()}")
 
-    repo_splits = DocumentHelper(TokenSplitter.split_documents(gh_loader.get_docs()))
-    repo_splits.debug()
-    # repo_splits.debug_all()
+    if previous is not None:
+        for path in budget.incomplete_paths:
+            previous.forget(path)
+        previous.save()
 
-    docs = state["vector_db"].top_k_similar_queries(repo_splits.to_str())
+    counts = dedup.counts if dedup is not None else {}
 
     # print("\n(DEBUG): Collecting unique pairs")
     # print("\n---\n")
     parts = []
-    for i, (user_code, context_docs, _) in enumerate(docs):
+    for i, (user_code, context_docs, distance) in enumerate(docs):
         if i != 0:
             print("\n---\n")
         context_helper = DocumentHelper(context_docs)
@@ -82,40 +256,52 @@ def retrieve(state: State):
             "ordinal": i + 1,
             "tech_credit": '\n'.join(context_helper.collect_unique_pairs()),
             "user_code": user_code,
-            "context_code": "\n\n".join(doc.page_content for doc in context_helper.get_docs())
+            "distance": distance,
+            "occurrences": counts.get(user_code, 1),
+            "context_code": "\n\n".join(doc.page_content for doc in context_helper.get_docs()),
+            "context_snippets": [doc.page_content for doc in context_helper.get_docs()]
         })
 
     # print('\n')
     # print("=" * 50)
+    if voter is not None:
+        return {"parts": parts, "tech_credits": voter.ranking(), "answer": voter.render()}
     return {"parts": parts}
 
+@Tracer.traced
 def retrieve_doc(state: State):
     retrieved_doc = state["vector_db"].similarity_search(state["question"])
     return {"context_doc": retrieved_doc}
 
+def __prompt_messages(state: State, parts: List[Dict], first_ordinal: int=1) -> PromptValue:
+    tech_credit_categories = state.get("tech_credit_list") or TaxonomyProvider.categories()
+
+    def __render(parts: List[Dict], doc_content: str):
+        return state["prompt"].invoke(
+            {
+                "question": state["question"], 
+                "rendered": state["user_prompt_template"].render(parts=parts),
+                "context_doc": doc_content,
+                "tech_credit_list": tech_credit_categories,
+            }
+        )
+
+    docs = [doc.page_content for doc in state["context_doc"]]
+    if state.get("prompt_budget", 0) > 0:
+        # Taxonomy first, then the best parts, then documentation, within the token budget
+        packer = PromptPacker(state["llm"].count_tokens, state["prompt_budget"])
+        parts, doc_content, _ = packer.pack(
+            parts, docs, lambda parts, doc_content: __render(parts, doc_content).to_string(),
+            first_ordinal
+        )
+    else:
+        doc_content = "\n\n".join(docs)
+
+    return __render(parts, doc_content)
+
+@Tracer.traced
 def generate(state: State):
-    doc_content = "\n\n".join(doc.page_content for doc in state["context_doc"])
-    user_prompt = state["user_prompt_template"].render(parts=state["parts"])
-   
-    
-    gh_loader = GithubLoader(
-        "https://github.com/alexsun2/TC-Examples",
-        "main"
-    )
-    gh_loader.load_repo(
-        FileFilters.FILE_ONLY("tech_credit_patterns.json")
-    )
-    tcp = json.loads(gh_loader.get_docs()[0].page_content)
-    tech_credit_categories = [entry["pattern_name"] for entry in tcp]
-
-    messages = state["prompt"].invoke(
-        {
-            "question": state["question"], 
-            "rendered": user_prompt,
-            "context_doc": doc_content,
-            "tech_credit_list": tech_credit_categories,
-        }
-    )
+    messages = __prompt_messages(state, state["parts"])
     
     # print("\n(DEBUG) GENERATE STATE:\n")
     # print(__to_json(state), '\n')
@@ -129,11 +315,65 @@ def generate(state: State):
     response = state["llm"].invoke(messages)
     return {"answer": response.content}
 
-def init_app() -> CompiledStateGraph:
-    graph_builder = StateGraph(State).add_sequence([retrieve, generate])
+@Tracer.traced
+def generate_map_reduce(state: State):
+    parts = state["parts"]
+    size = max(1, state.get("group_size", 3))
+    groups = [parts[start:start + size] for start in range(0, len(parts), size)]
+    if len(groups) <= 1:
+        messages = __prompt_messages(state, parts)
+        with open("logs/context_doc_content.txt", "w", encoding="utf-8") as f:
+            f.write(messages.to_string())
+        return {"answer": state["llm"].invoke(messages).content}
+
+    def __map(start: int, group: List[Dict]) -> Tuple[str, str]:
+        with Tracer.span("map", parts=len(group)):
+            messages = __prompt_messages(state, group, first_ordinal=start + 1)
+            # Chat models may answer with a list of content blocks, findings are joined as text
+            return messages.to_string(), state["llm"].invoke(messages).text()
+
+    # Every group gets its own thread, the LLM concurrency limit decides how many run at once
+    with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, __map, i * size, group)
+            for i, group in enumerate(groups)
+        ]
+        mapped = [future.result() for future in futures]
+
+    findings = [answer for _, answer in mapped]
+    rendered_findings = "\n\n".join(
+        f"Parts No. {i * size + 1} to {i * size + len(group)}:\n{answer}"
+        for i, (group, answer) in enumerate(zip(groups, findings))
+    )
+
+    with Tracer.span("reduce"):
+        messages = state["reduce_prompt"].invoke({
+            "question": state["question"],
+            "findings": rendered_findings,
+            "tech_credit_list": state.get("tech_credit_list") or TaxonomyProvider.categories()
+        })
+        with open("logs/context_doc_content.txt", "w", encoding="utf-8") as f:
+            f.write("\n\n".join([prompt for prompt, _ in mapped] + [messages.to_string()]))
+        response = state["llm"].invoke(messages)
+
+    Tracer.count("map_prompts", len(groups))
+    return {"answer": response.content, "findings": findings}
+
+def init_app(
+        mode: str="llm",
+        checkpointer: Optional[BaseCheckpointSaver]=None
+) -> CompiledStateGraph:
+    if mode == "fast":
+        # The answer is voted during retrieval, no LLM or article context is needed
+        graph_builder = StateGraph(State).add_node(retrieve)
+        graph_builder.add_edge(START, "retrieve")
+        return graph_builder.compile(checkpointer=checkpointer)
+
+    generate_node = generate_map_reduce if mode == "map-reduce" else generate
+    graph_builder = StateGraph(State).add_sequence([retrieve, generate_node])
     graph_builder.add_node(retrieve_doc)
     graph_builder.add_edge(START, "retrieve")
     graph_builder.add_edge(START, "retrieve_doc")
-    return graph_builder.compile()
+    return graph_builder.compile(checkpointer=checkpointer)
     
 
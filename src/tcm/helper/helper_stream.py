@@ -0,0 +1,63 @@
+import queue
+import threading
+import contextvars
+
+# Global Imports
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Groups an iterable into lists of at most `size` items without materializing it."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def prefetch(items: Iterable[T], maxsize: int=32) -> Iterator[T]:
+    """
+    Consumes an iterable on a background thread, keeping at most `maxsize` items buffered.
+
+    This lets a slow producer (e.g. files being downloaded) run while the consumer is still busy
+    with earlier items (e.g. splitting and embedding them). Exceptions raised by the producer are
+    re-raised in the consumer.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=maxsize)
+    done = object()
+    stop = threading.Event()
+
+    def __produce() -> None:
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                buffer.put(item)
+        except BaseException as e:
+            buffer.put(e)
+        buffer.put(done)
+
+    # Run the producer in a copy of the caller's context so tracing attributes its work correctly
+    producer = threading.Thread(
+        target=contextvars.copy_context().run, args=(__produce,), daemon=True
+    )
+    producer.start()
+
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Unblock the producer if the consumer stopped early
+        stop.set()
+        while producer.is_alive():
+            try:
+                buffer.get_nowait()
+            except queue.Empty:
+                producer.join(timeout=0.05)
@@ -0,0 +1,72 @@
+import json
+import base64
+import threading
+
+# Local Imports
+from tcm.github.github_client import GithubClient
+
+# Global Imports
+from typing import Any, Dict, List
+
+TAXONOMY_PATH = "./docs/tech_credit_patterns.json"
+TAXONOMY_REPO = "alexsun2/TC-Examples"
+TAXONOMY_FILE = "tech_credit_patterns.json"
+
+class TaxonomyProvider:
+    """
+    Loads the list of tech credit patterns once per process and source.
+
+    The list either comes from the copy shipped in `docs/` or from the TC-Examples repository. The
+    remote copy goes through the shared GithubClient, so it is only downloaded again when GitHub
+    reports that the file changed.
+    """
+    __patterns: Dict[str, List[Dict[str, Any]]] = {}
+    __lock = threading.Lock()
+
+    @staticmethod
+    def __fetch_remote(branch: str="main") -> List[Dict[str, Any]]:
+        # Revalidated with its ETag by the client, an unchanged file is served from its cache
+        response = GithubClient.shared().get(
+            f"/repos/{TAXONOMY_REPO}/contents/{TAXONOMY_FILE}", params={"ref": branch}
+        )
+        response.raise_for_status()
+
+        body = response.json()
+        print(f"(DEBUG): Taxonomy at sha {body['sha'][:12]}")
+        return json.loads(base64.b64decode(body["content"]).decode("utf-8"))
+
+    @staticmethod
+    def load(source: str="local", path: str=TAXONOMY_PATH) -> List[Dict[str, Any]]:
+        """
+        Loads the tech credit patterns, or returns the ones this process already loaded from the
+        same source.
+
+        Args:
+            source (str): "local" to read `path`, "remote" to use the versioned TC-Examples copy
+                (default "local")
+            path (str): local taxonomy file (default TAXONOMY_PATH)
+
+        Returns:
+            List[Dict[str, Any]]: the pattern entries, each with a "pattern_name"
+        """
+        with TaxonomyProvider.__lock:
+            patterns = TaxonomyProvider.__patterns.get(source)
+            if patterns is None:
+                if source == "remote":
+                    patterns = TaxonomyProvider.__fetch_remote()
+                elif source == "local":
+                    with open(path, 'r', encoding='utf-8') as f:
+                        patterns = json.load(f)
+                else:
+                    raise ValueError(f"Unknown taxonomy source: {source}")
+
+                if not isinstance(patterns, list):
+                    raise ValueError(f"The {source} taxonomy is not a list of patterns")
+                TaxonomyProvider.__patterns[source] = patterns
+
+            return patterns
+
+    @staticmethod
+    def categories(source: str="local") -> List[str]:
+        """Returns the names of the tech credit patterns."""
+        return [entry["pattern_name"] for entry in TaxonomyProvider.load(source)]
@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import threading
+import contextvars
+
+# Global Imports
+from functools import wraps
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+TRACE_PATH = "logs/trace.jsonl"
+
+class Tracer:
+    """
+    Records timed spans and counters for each analysis run, without any external service.
+
+    Every finished span is appended to a JSONL trace file, and per-run totals are kept in memory for
+    the summary table printed at the end of a batch. The current run and span are tracked with
+    context variables, so concurrent runs on different threads do not mix up their numbers.
+    """
+    __path: str = ""
+    __enabled: bool = True
+    __lock = threading.Lock()
+    __runs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    __run: contextvars.ContextVar = contextvars.ContextVar("tcm_trace_run", default="")
+    __span: contextvars.ContextVar = contextvars.ContextVar("tcm_trace_span", default="")
+
+    @staticmethod
+    def configure(path: str=TRACE_PATH, enabled: bool=True) -> None:
+        """Sets the JSONL file spans are appended to, "" keeps totals in memory only."""
+        Tracer.__path = path
+        Tracer.__enabled = enabled
+        if path:
+            dirname = os.path.dirname(path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+
+    @staticmethod
+    def __write(record: Dict[str, Any]) -> None:
+        if Tracer.__path:
+            with open(Tracer.__path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    @staticmethod
+    def __totals(run: str) -> Dict[str, Dict[str, Any]]:
+        return Tracer.__runs.setdefault(run, {"spans": {}, "counters": {}})
+
+    @staticmethod
+    @contextmanager
+    def run(run_id: str) -> Iterator[None]:
+        """Attributes every span and counter recorded inside the block to the given run."""
+        token = Tracer.__run.set(run_id)
+        try:
+            with Tracer.span("run"):
+                yield
+        finally:
+            with Tracer.__lock:
+                Tracer.__write({
+                    "type": "counters",
+                    "run": run_id,
+                    "time": time.time(),
+                    "counters": dict(Tracer.__totals(run_id)["counters"])
+                })
+            Tracer.__run.reset(token)
+
+    @staticmethod
+    @contextmanager
+    def span(name: str, **attrs: Any) -> Iterator[None]:
+        """Times the block as a span nested under the current span, e.g. "retrieve/embed"."""
+        if not Tracer.__enabled:
+            yield
+            return
+
+        parent = Tracer.__span.get()
+        path = f"{parent}/{name}" if parent and parent != "run" else name
+        token = Tracer.__span.set(path)
+        start = time.time()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = repr(e)
+            raise
+        finally:
+            duration = time.time() - start
+            Tracer.__span.reset(token)
+            run = Tracer.__run.get()
+            with Tracer.__lock:
+                totals = Tracer.__totals(run)["spans"].setdefault(path, {"time": 0.0, "calls": 0})
+                totals["time"] += duration
+                totals["calls"] += 1
+                Tracer.__write({
+                    "type": "span",
+                    "run": run,
+                    "name": path,
+                    "start": start,
+                    "duration": duration,
+                    "error": error,
+                    "attrs": attrs
+                })
+
+    @staticmethod
+    def traced(fn: F) -> F:
+        """Decorator recording each call of a graph node as a span named after the function."""
+        @wraps(fn)
+        def __wrapper(*args, **kwargs):
+            with Tracer.span(fn.__name__):
+                return fn(*args, **kwargs)
+        return __wrapper  # type: ignore
+
+    @staticmethod
+    def count(name: str, value: float=1) -> None:
+        """Adds value to a counter of the current run (files fetched, bytes, tokens, ...)."""
+        if not Tracer.__enabled or not value:
+            return
+        with Tracer.__lock:
+            counters = Tracer.__totals(Tracer.__run.get())["counters"]
+            counters[name] = counters.get(name, 0) + value
+
+    @staticmethod
+    def totals(run_id: Optional[str]=None) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Returns the span and counter totals of one run, or of every run keyed by run id."""
+        with Tracer.__lock:
+            if run_id is not None:
+                return json.loads(json.dumps(Tracer.__totals(run_id)))
+            return json.loads(json.dumps(Tracer.__runs))
+
+    @staticmethod
+    def pop(run_id: str) -> Dict[str, Dict[str, Any]]:
+        """Returns the totals of one run and forgets them, so long-running processes stay small."""
+        with Tracer.__lock:
+            return Tracer.__runs.pop(run_id, {"spans": {}, "counters": {}})
+
+    @staticmethod
+    def print_summary() -> None:
+        print("\nStage Summary:")
+        print("-" * 70)
+        print(f"{'Repo / Stage':<40} | {'Time (s)':>10} | {'Calls':>10}")
+        print("-" * 70)
+        for run, totals in Tracer.totals().items():
+            print(f"{run or '(no run)':<40} |")
+            for name, span in sorted(totals["spans"].items()):
+                if name == "run":
+                    continue
+                print(f"  {name:<38} | {span['time']:>10.2f} | {span['calls']:>10}")
+            for name, value in sorted(totals["counters"].items()):
+                print(f"  {name:<38} | {'':>10} | {value:>10,.0f}")
+        print("-" * 70)
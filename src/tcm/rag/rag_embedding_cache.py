@@ -0,0 +1,74 @@
+import hashlib
+
+# Local Imports
+from tcm.helper.helper_sqlite_cache import SqliteCache
+from tcm.helper.helper_trace import Tracer
+
+# Global Imports
+from array import array
+from typing import Dict, List
+from langchain_core.embeddings import Embeddings
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends texts it has never seen before to the underlying model.
+
+    Vectors are stored in a SqliteCache keyed by (model name, sha256 of the text). Every
+    `embed_documents` call looks up all of its texts at once and embeds the misses in a single call
+    to the wrapped model.
+    """
+    model_name: str
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: SqliteCache) -> None:
+        self.model_name = model_name
+        self.__embeddings = embeddings
+        self.__cache = cache
+
+    def __key(self, text: str, kind: str) -> str:
+        # Gemini embeds queries and documents with different task types
+        return f"{self.model_name}:{kind}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    @staticmethod
+    def __encode(vector: List[float]) -> bytes:
+        return array('d', vector).tobytes()
+
+    @staticmethod
+    def __decode(blob: bytes) -> List[float]:
+        return array('d', blob).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.__key(text, "document") for text in texts]
+        found = self.__cache.get_many(keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing[key] = text
+        Tracer.count("embedding_cache_hits", len(found))
+        Tracer.count("embedding_cache_misses", len(missing))
+
+        if missing:
+            vectors = self.__embeddings.embed_documents(list(missing.values()))
+            new_entries = {
+                key: CachedEmbeddings.__encode(vector)
+                for key, vector in zip(missing.keys(), vectors)
+            }
+            self.__cache.put_many(new_entries)
+            found.update(new_entries)
+
+        return [CachedEmbeddings.__decode(found[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.__key(text, "query")
+        blob = self.__cache.get(key)
+
+        Tracer.count("embedding_cache_hits" if blob is not None else "embedding_cache_misses")
+        if blob is None:
+            vector = self.__embeddings.embed_query(text)
+            self.__cache.put(key, CachedEmbeddings.__encode(vector))
+            return vector
+
+        return CachedEmbeddings.__decode(blob)
+
+    def stats(self) -> Dict[str, int]:
+        return self.__cache.stats()
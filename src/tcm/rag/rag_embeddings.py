@@ -1,12 +1,72 @@
+# Local Imports
+from tcm.helper.helper_limits import ConcurrencyLimits
+from tcm.helper.helper_sqlite_cache import SqliteCache
+from tcm.helper.helper_trace import Tracer
+from tcm.rag.rag_embedding_cache import CachedEmbeddings
+
 # Global Imports
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
+EMBEDDING_CACHE_PATH = ".cache/tcm/embeddings.sqlite"
+
+class LimitedEmbeddings(Embeddings):
+    """Holds an embedding request slot from ConcurrencyLimits for every call to the model."""
+    def __init__(self, embeddings: Embeddings) -> None:
+        self.__embeddings = embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        Tracer.count("embedding_calls")
+        Tracer.count("embedded_texts", len(texts))
+        with ConcurrencyLimits.acquire(ConcurrencyLimits.EMBEDDING):
+            return self.__embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        Tracer.count("embedding_calls")
+        Tracer.count("embedded_texts")
+        with ConcurrencyLimits.acquire(ConcurrencyLimits.EMBEDDING):
+            return self.__embeddings.embed_query(text)
+
 class TCMEmbeddings:
-    embeddings: GoogleGenerativeAIEmbeddings
+    embeddings: Embeddings
 
-    def __init__(self, model_name: str) -> None:
+    def __init__(
+            self,
+            model_name: str,
+            cache_path: str=EMBEDDING_CACHE_PATH,
+            max_cache_entries: int=500_000,
+            embeddings: Optional[Embeddings]=None
+    ) -> None:
+        """
+        Args:
+            model_name (str): name of the Gemini embedding model
+            cache_path (str): SQLite file for the embedding cache, "" disables caching
+                (default EMBEDDING_CACHE_PATH)
+            max_cache_entries (int): number of vectors kept before evicting the least recently
+                used ones (default 500,000)
+            embeddings (Optional[Embeddings]): model to use instead of Gemini, e.g. an offline
+                stand-in for benchmarks (default None)
+        """
         self.__model_name = model_name
-        self.embeddings = GoogleGenerativeAIEmbeddings(model=model_name)
+        self.embeddings = LimitedEmbeddings(
+            embeddings if embeddings is not None else GoogleGenerativeAIEmbeddings(model=model_name)
+        )
+
+        if cache_path != "":
+            self.embeddings = CachedEmbeddings(
+                self.embeddings,
+                model_name,
+                SqliteCache(cache_path, "embeddings", max_entries=max_cache_entries)
+            )
+
+    def get_embeddings(self) -> Embeddings:
+        return self.embeddings
+
+    def get_model_name(self) -> str:
+        return self.__model_name
 
-    def get_embeddings(self) -> GoogleGenerativeAIEmbeddings:
-        return self.embeddings
\ No newline at end of file
+    def cache_stats(self) -> Dict[str, int]:
+        if isinstance(self.embeddings, CachedEmbeddings):
+            return self.embeddings.stats()
+        return {}
@@ -0,0 +1,102 @@
+import heapq
+
+# Global Imports
+from langchain_core.documents import Document
+from typing import Any, Dict, List, Tuple
+
+class KnnVoter:
+    """
+    Labels a repository without an LLM: every user chunk votes for the tech credits of its nearest
+    training chunks.
+
+    A neighbor at rank r (1-based) and distance d votes max(0, 1 - d / 2) / r for its
+    `tech_credit`, i.e. its cosine similarity to the chunk, discounted by rank. Every chunk votes,
+    so code repeated across the repository weighs as many times as it appears. Scores are reported
+    as shares of all votes cast, with the files that voted the most for each credit and the chunks
+    that gave the strongest votes as evidence.
+    """
+    max_files: int
+    max_evidence: int
+    snippet_chars: int
+
+    def __init__(self, max_files: int=5, max_evidence: int=3, snippet_chars: int=300) -> None:
+        """
+        Args:
+            max_files (int): supporting files listed per tech credit (default 5)
+            max_evidence (int): evidence snippets kept per tech credit (default 3)
+            snippet_chars (int): max characters of each evidence snippet (default 300)
+        """
+        self.max_files = max_files
+        self.max_evidence = max_evidence
+        self.snippet_chars = snippet_chars
+
+        self.__total = 0.0
+        self.__chunks = 0
+        self.__scores: Dict[str, float] = {}
+        self.__descriptions: Dict[str, str] = {}
+        self.__files: Dict[str, Dict[str, float]] = {}
+        self.__evidence: Dict[str, List[Tuple[float, int, Dict[str, Any]]]] = {}
+
+    def add(self, path: str, text: str, results: List[Tuple[Document, float]]) -> None:
+        """Counts the votes of one user chunk, given its neighbors sorted by distance."""
+        self.__chunks += 1
+        for rank, (doc, distance) in enumerate(results, start=1):
+            credit = doc.metadata.get("tech_credit")
+            weight = max(0.0, 1.0 - distance / 2) / rank
+            self.__total += weight
+            if not credit or weight == 0.0:
+                continue
+
+            self.__scores[credit] = self.__scores.get(credit, 0.0) + weight
+            self.__descriptions.setdefault(credit, doc.metadata.get("tech_credit_description", ""))
+            files = self.__files.setdefault(credit, {})
+            files[path] = files.get(path, 0.0) + weight
+
+            # Keep the strongest votes, the counter breaks ties without comparing dicts
+            evidence = self.__evidence.setdefault(credit, [])
+            entry = (weight, self.__chunks, {
+                "path": path,
+                "snippet": text[:self.snippet_chars],
+                "example": doc.metadata.get("path", ""),
+                "distance": distance
+            })
+            if len(evidence) < self.max_evidence:
+                heapq.heappush(evidence, entry)
+            elif entry[:2] > evidence[0][:2]:
+                heapq.heapreplace(evidence, entry)
+
+    def ranking(self) -> List[Dict[str, Any]]:
+        """
+        Returns:
+            List[Dict[str, Any]]: one entry per tech credit, highest score first, with its
+            description, score (share of all votes), supporting files and evidence
+        """
+        ranking = []
+        for credit, score in sorted(self.__scores.items(), key=lambda item: -item[1]):
+            files = sorted(self.__files[credit].items(), key=lambda item: -item[1])
+            ranking.append({
+                "tech_credit": credit,
+                "description": self.__descriptions[credit],
+                "score": score / self.__total if self.__total else 0.0,
+                "files": [path for path, _ in files[:self.max_files]],
+                "evidence": [entry for _, _, entry in sorted(self.__evidence[credit], reverse=True,
+                                                              key=lambda item: item[:2])]
+            })
+        return ranking
+
+    def render(self) -> str:
+        """Formats the ranking as a plain text answer, in place of the LLM response."""
+        if not self.__scores:
+            return "No tech credits found: no user code chunk is close to a training example."
+
+        lines = [f"Tech credits ranked by weighted kNN votes over {self.__chunks} chunks:"]
+        for i, entry in enumerate(self.ranking()):
+            lines.append(f"\n{i + 1}. {entry['tech_credit']} (score {entry['score']:.2f})")
+            if entry["description"]:
+                lines.append(f"   {entry['description']}")
+            lines.append(f"   Supporting files: {', '.join(entry['files'])}")
+            for evidence in entry["evidence"]:
+                snippet = " ".join(evidence["snippet"].split())
+                lines.append(f"   - {evidence['path']} (distance {evidence['distance']:.3f}, "
+                             f"like {evidence['example'] or 'a training example'}): {snippet}")
+        return "\n".join(lines)
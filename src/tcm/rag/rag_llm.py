@@ -1,29 +1,91 @@
 import os
+import json
+import hashlib
 import textwrap
 
 # Local Imports
-from tcm.helper.helper_constants import SYSTEM_PROMPT, USER_PROMPT
+from tcm.helper.helper_limits import ConcurrencyLimits
+from tcm.helper.helper_sqlite_cache import SqliteCache
+from tcm.helper.helper_trace import Tracer
+from tcm.helper.helper_constants import (
+    REDUCE_SYSTEM_PROMPT, REDUCE_USER_PROMPT, SYSTEM_PROMPT, USER_PROMPT
+)
 
 # Global Imports
-from langchain_core.messages import BaseMessage
+import tiktoken
+
+from functools import lru_cache
+from typing import Dict, Optional
+from langchain_core.messages import AIMessage, BaseMessage, messages_to_dict
+from langchain_core.language_models import BaseChatModel
 from langchain.chat_models import init_chat_model
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.prompt_values import PromptValue
 
 from jinja2 import Environment, BaseLoader, StrictUndefined, Template
 
+LLM_CACHE_PATH = ".cache/tcm/llm_responses.sqlite"
+LLM_CACHE_TTL = 30 * 24 * 3600
+
+# Anthropic does not ship an offline tokenizer; cl100k_base (also used by the splitter) is close
+# enough to size prompts, and the real input token counts are traced after each call
+TOKENIZER_ENCODING = "cl100k_base"
+
+@lru_cache(maxsize=None)
+def _get_encoding(name: str) -> "tiktoken.Encoding":
+    return tiktoken.get_encoding(name)
+
 class LargeLanguageModel:
     user_prompt_template: Template
     chat_prompt: ChatPromptTemplate
+    reduce_prompt: ChatPromptTemplate
+    model_name: str
+    model_provider: str
     temperature: float
+    bypass_cache: bool
 
     def __init__(
             self,
             model_name: str, 
             model_provider: str, 
             api_key_name: str, 
-            temperature: float=0
+            temperature: float=0,
+            chat_model: Optional[BaseChatModel]=None,
+            cache_path: str=LLM_CACHE_PATH,
+            cache_ttl: Optional[float]=LLM_CACHE_TTL,
+            max_cache_entries: int=10_000,
+            bypass_cache: bool=False
         ) -> None:
+        """
+        Args:
+            model_name (str): name of the chat model
+            model_provider (str): provider passed to init_chat_model, e.g. "anthropic"
+            api_key_name (str): environment variable holding the provider API key
+            temperature (float): sampling temperature (default 0)
+            chat_model (Optional[BaseChatModel]): model to use instead of init_chat_model, e.g. an
+                offline stand-in for benchmarks (default None)
+            cache_path (str): SQLite file for the response cache, "" disables caching
+                (default LLM_CACHE_PATH)
+            cache_ttl (Optional[float]): seconds a cached response stays valid, None keeps it
+                until evicted (default 30 days)
+            max_cache_entries (int): number of responses kept before evicting the least recently
+                used ones (default 10,000)
+            bypass_cache (bool): always call the model, but still store its responses
+                (default False)
+        """
+        self.model_name = model_name
+        self.model_provider = model_provider
+        self.temperature = temperature
+        self.bypass_cache = bypass_cache
+        self.__cache = SqliteCache(
+            cache_path, "llm_responses", max_entries=max_cache_entries, ttl=cache_ttl
+        ) if cache_path != "" else None
+
+        # An already built chat model (e.g. an offline stand-in) needs no API key
+        if chat_model is not None:
+            self.__llm = chat_model
+            return
+
         __api_key = os.environ[api_key_name]
 
         self.__llm = init_chat_model(
@@ -50,9 +112,52 @@ class LargeLanguageModel:
         ])
 
         return self.chat_prompt
+
+    def generate_reduce_prompt(self) -> ChatPromptTemplate:
+        """Prompt merging the answers of several per-group prompts, in map-reduce mode."""
+        self.reduce_prompt = ChatPromptTemplate.from_messages([
+            ("system", REDUCE_SYSTEM_PROMPT),
+            ("user", textwrap.dedent(REDUCE_USER_PROMPT))
+        ])
+
+        return self.reduce_prompt
     
+    def __cache_key(self, message: PromptValue) -> str:
+        # The rendered prompt already holds the taxonomy, context_doc and parts
+        serialized = json.dumps(messages_to_dict(message.to_messages()), sort_keys=True)
+        digest = hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+        return f"{self.model_provider}:{self.model_name}:{self.temperature}:{digest}"
+
     def invoke(self, message: PromptValue) -> BaseMessage:
-        return self.__llm.invoke(message)
+        key = self.__cache_key(message) if self.__cache is not None else ""
+        if self.__cache is not None and not self.bypass_cache:
+            blob = self.__cache.get(key)
+            Tracer.count("llm_cache_hits" if blob is not None else "llm_cache_misses")
+            if blob is not None:
+                return AIMessage(**json.loads(blob))
+
+        with ConcurrencyLimits.acquire(ConcurrencyLimits.LLM), Tracer.span("llm"):
+            response = self.__llm.invoke(message)
+
+        usage = getattr(response, "usage_metadata", None) or {}
+        Tracer.count("llm_calls")
+        Tracer.count("prompt_tokens", usage.get("input_tokens", 0))
+        Tracer.count("completion_tokens", usage.get("output_tokens", 0))
+
+        if self.__cache is not None:
+            self.__cache.put(key, json.dumps({
+                "content": response.content,
+                "response_metadata": response.response_metadata,
+                "usage_metadata": getattr(response, "usage_metadata", None)
+            }, default=str).encode("utf-8"))
+        return response
+
+    def count_tokens(self, text: str) -> int:
+        """Estimates the number of prompt tokens of a text for this model."""
+        return len(_get_encoding(TOKENIZER_ENCODING).encode(text, disallowed_special=()))
+
+    def cache_stats(self) -> Dict[str, int]:
+        return self.__cache.stats() if self.__cache is not None else {}
 
     def debug_chat_prompt(self) -> None:
         print("(DEBUG) Chat Prompt:\n")
@@ -0,0 +1,170 @@
+import re
+
+# Local Imports
+from tcm.helper.helper_trace import Tracer
+
+# Global Imports
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROMPT_TOKEN_BUDGET = 12_000
+
+Part = Dict[str, Any]
+
+class PromptPacker:
+    """
+    Fits the user prompt into a token budget, filling it by priority.
+
+    1. The system prompt, question and taxonomy are always kept.
+    2. Parts, closest first (ascending "distance"). Example code already shown in an earlier part
+       is replaced by a reference to that part. A part that does not fit keeps only its closest
+       example, then has its user code truncated at a syntactic boundary; parts that still do not
+       fit are dropped.
+    3. Documentation pages, in retrieval order, while they fit.
+
+    Tokens are measured on the fully rendered prompt with the given counter, so template text and
+    separators are accounted for.
+    """
+    budget: int
+    min_part_tokens: int
+
+    __TRUNCATED = "// ... (truncated)"
+
+    def __init__(
+            self,
+            count_tokens: Callable[[str], int],
+            budget: int=PROMPT_TOKEN_BUDGET,
+            min_part_tokens: int=32
+    ) -> None:
+        """
+        Args:
+            count_tokens (Callable[[str], int]): tokenizer of the model, see
+                LargeLanguageModel.count_tokens
+            budget (int): max tokens of the rendered prompt (default PROMPT_TOKEN_BUDGET)
+            min_part_tokens (int): user code truncated below this many tokens is not worth sending
+                and drops the part instead (default 32)
+        """
+        self.budget = budget
+        self.min_part_tokens = min_part_tokens
+        self.__count_tokens = count_tokens
+
+    def truncate_code(self, code: str, max_tokens: int) -> str:
+        """
+        Keeps the longest prefix of `code` within `max_tokens` that ends at a syntactic boundary:
+        preferably where every brace opened in the prefix is closed again, else after a statement
+        or block (a line ending with ";", "{" or "}"), else at a line end.
+        """
+        if self.__count_tokens(code) <= max_tokens:
+            return code
+
+        max_tokens -= self.__count_tokens(PromptPacker.__TRUNCATED)
+        lines = code.splitlines(keepends=True)
+        tokens, depth = 0, 0
+        balanced, statement, line_end = 0, 0, 0
+        for i, line in enumerate(lines):
+            tokens += self.__count_tokens(line)
+            if tokens > max_tokens:
+                break
+            # Braces inside strings or comments are rare enough in chunks to ignore
+            depth += line.count("{") - line.count("}")
+            line_end = i + 1
+            if re.search(r"[;{}]\s*$", line):
+                statement = i + 1
+                if depth <= 0:
+                    balanced = i + 1
+
+        cut = balanced or statement or line_end
+        return "".join(lines[:cut]).rstrip() + "\n" + PromptPacker.__TRUNCATED
+
+    def __fit(
+            self,
+            packed: List[Part],
+            part: Part,
+            snippets: List[str],
+            render: Callable[[List[Part], str], str]
+    ) -> Optional[Tuple[Part, List[str]]]:
+        def __tokens(candidate: Part) -> int:
+            return self.__count_tokens(render(packed + [candidate], ""))
+
+        candidate = {**part, "context_code": "\n\n".join(snippets)}
+        if __tokens(candidate) <= self.budget:
+            return candidate, snippets
+
+        # Only the closest example, then less and less user code
+        snippets = snippets[:1]
+        candidate = {**part, "context_code": "\n\n".join(snippets)}
+        over = __tokens(candidate) - self.budget
+        allowed = self.__count_tokens(part["user_code"]) - max(over, 0)
+        while allowed >= self.min_part_tokens:
+            candidate["user_code"] = self.truncate_code(part["user_code"], allowed)
+            over = __tokens(candidate) - self.budget
+            if over <= 0:
+                Tracer.count("parts_truncated")
+                return candidate, snippets
+            # The counter is not additive across boundaries, shrink until it fits
+            allowed -= max(over, self.min_part_tokens // 2)
+        return None
+
+    def pack(
+            self,
+            parts: List[Part],
+            docs: List[str],
+            render: Callable[[List[Part], str], str],
+            first_ordinal: int=1
+    ) -> Tuple[List[Part], str, int]:
+        """
+        Args:
+            parts (List[Part]): parts from retrieve(), with their "distance" and
+                "context_snippets"; packed closest first, parts without a distance keep their order
+            docs (List[str]): documentation pages, most relevant first
+            render (Callable[[List[Part], str], str]): renders the whole prompt for the given parts
+                and documentation text
+            first_ordinal (int): number of the first packed part, parts are renumbered from it
+                (default 1)
+
+        Returns:
+            Tuple[List[Part], str, int]: the parts and documentation text that fit, and the tokens
+            of the rendered prompt
+        """
+        # Under budget pressure the closest parts must be the ones kept whole
+        parts = sorted(parts, key=lambda part: part.get("distance", 0.0))
+
+        packed: List[Part] = []
+        shown: Dict[str, int] = {}
+        references = set()
+        for part in parts:
+            snippets = []
+            for snippet in part.get("context_snippets", [part["context_code"]]):
+                if snippet in shown:
+                    snippet = f"(Same example code as in part No. {shown[snippet]})"
+                    references.add(snippet)
+                if snippet not in snippets:
+                    snippets.append(snippet)
+            Tracer.count("context_snippets_deduped",
+                         sum(1 for snippet in part.get("context_snippets", []) if snippet in shown))
+
+            fitted = self.__fit(
+                packed, {**part, "ordinal": first_ordinal + len(packed)}, snippets, render
+            )
+            if fitted is None:
+                Tracer.count("parts_dropped")
+                continue
+
+            candidate, kept = fitted
+            packed.append(candidate)
+            for snippet in kept:
+                if snippet not in references:
+                    shown.setdefault(snippet, candidate["ordinal"])
+
+        doc_pages: List[str] = []
+        for page in docs:
+            if self.__count_tokens(render(packed, "\n\n".join(doc_pages + [page]))) > self.budget:
+                Tracer.count("doc_pages_dropped")
+                continue
+            doc_pages.append(page)
+
+        doc_content = "\n\n".join(doc_pages)
+        tokens = self.__count_tokens(render(packed, doc_content))
+        Tracer.count("packed_prompt_tokens", tokens)
+        print(f"(DEBUG): Packed prompt: {tokens}/{self.budget} tokens, {len(packed)}/{len(parts)} "
+              f"parts, {len(doc_pages)}/{len(docs)} documentation pages")
+        return packed, doc_content, tokens
@@ -0,0 +1,216 @@
+import os
+import json
+import queue
+import itertools
+import threading
+
+# Local Imports
+from tcm.helper.helper_trace import Tracer
+from tcm.server.server_service import AnalysisService
+
+# Global Imports
+from typing import Any, Dict, Iterator, Optional, Tuple
+from socketserver import BaseServer, ThreadingMixIn, UnixStreamServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class AnalysisJob:
+    """One queued analyze request, its progress events are handed to the waiting HTTP handler."""
+    key: str
+    url: str
+    branch: str
+    folder: str
+    run_id: str
+
+    # Marks the end of a job's events
+    DONE: Dict[str, Any] = {"event": "done"}
+
+    def __init__(
+            self,
+            key: str,
+            url: str,
+            branch: str="main",
+            folder: str="",
+            run_id: str=""
+    ) -> None:
+        self.key = key
+        self.url = url
+        self.branch = branch
+        self.folder = folder
+        # Keys come from clients and may repeat, the trace of each job is recorded apart
+        self.run_id = run_id or key
+        self.events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+
+    def iter_events(self) -> Iterator[Dict[str, Any]]:
+        while True:
+            event = self.events.get()
+            if event is AnalysisJob.DONE:
+                return
+            yield event
+
+class AnalysisServer:
+    """
+    Long-running analysis service over local HTTP or a Unix socket.
+
+    The AnalysisService (Chroma handles, embeddings, LLM, templates, compiled graph and taxonomy) is
+    built once by the caller. Requests are put on a bounded queue served by a fixed number of
+    worker threads; when the queue is full new requests are rejected with 503 instead of piling up.
+
+    Endpoints:
+        POST /analyze   {"url": ..., "branch": "main", "folder": "", "key": ..., "stream": false}
+                        returns {"key", "answer", "duration", "error", "trace"}, or with
+                        "stream": true, one JSON event per line as each graph node finishes
+        GET  /health    {"status": "ok", "workers": ..., "queued": ..., "queue_size": ...}
+    """
+    service: AnalysisService
+    workers: int
+    queue_size: int
+
+    def __init__(self, service: AnalysisService, workers: int=2, queue_size: int=16) -> None:
+        self.service = service
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.__jobs: "queue.Queue[Optional[AnalysisJob]]" = queue.Queue(maxsize=self.queue_size)
+        self.__ids = itertools.count(1)
+        self.__threads = []
+        self.__httpd: Optional[BaseServer] = None
+
+    def submit(self, url: str, branch: str="main", folder: str="",
+               key: Optional[str]=None) -> Optional[AnalysisJob]:
+        """Queues an analysis, returns None when the queue is full."""
+        job_id = next(self.__ids)
+        job = AnalysisJob(
+            key or f"request-{job_id}", url, branch, folder, run_id=f"request-{job_id}"
+        )
+        job.events.put({"event": "queued", "key": job.key, "position": self.__jobs.qsize() + 1})
+        try:
+            self.__jobs.put_nowait(job)
+        except queue.Full:
+            return None
+        return job
+
+    def __work(self) -> None:
+        while True:
+            job = self.__jobs.get()
+            if job is None:
+                return
+
+            try:
+                job.events.put({"event": "started", "key": job.key})
+                for event in self.service.stream(
+                    job.key, job.url, job.branch, job.folder, run_id=job.run_id
+                ):
+                    if event["event"] in ("result", "error"):
+                        event["trace"] = Tracer.pop(job.run_id)
+                    job.events.put(event)
+            finally:
+                job.events.put(AnalysisJob.DONE)
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "queued": self.__jobs.qsize(),
+            "queue_size": self.queue_size
+        }
+
+    def __make_handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def address_string(self) -> str:
+                # Unix socket clients have no (host, port) address
+                return self.client_address[0] if self.client_address else "unix"
+
+            def __send_json(self, status: int, body: Dict[str, Any]) -> None:
+                payload = json.dumps(body, default=str).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self) -> None:
+                if self.path == "/health":
+                    self.__send_json(200, server.health())
+                else:
+                    self.__send_json(404, {"error": f"unknown path {self.path}"})
+
+            def do_POST(self) -> None:
+                if self.path != "/analyze":
+                    self.__send_json(404, {"error": f"unknown path {self.path}"})
+                    return
+
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                    url = request["url"]
+                except (ValueError, KeyError, TypeError) as e:
+                    self.__send_json(400, {"error": f"expected a JSON body with \"url\": {e!r}"})
+                    return
+
+                job = server.submit(
+                    url, request.get("branch", "main"), request.get("folder", ""),
+                    request.get("key")
+                )
+                if job is None:
+                    self.__send_json(503, {"error": "analysis queue is full, retry later"})
+                    return
+
+                if not request.get("stream", False):
+                    result = {"key": job.key, "answer": None, "error": None}
+                    for event in job.iter_events():
+                        if event["event"] in ("result", "error"):
+                            result.update({k: v for k, v in event.items() if k != "event"})
+                    self.__send_json(200, result)
+                    return
+
+                # HTTP/1.0 response without a length, so the connection close ends the stream
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                for event in job.iter_events():
+                    self.wfile.write((json.dumps(event, default=str) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+
+        return Handler
+
+    def __bind(self, host: str, port: int, socket_path: str) -> BaseServer:
+        handler = self.__make_handler()
+        if socket_path == "":
+            return ThreadingHTTPServer((host, port), handler)
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+        class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+            daemon_threads = True
+
+        return ThreadingUnixHTTPServer(socket_path, handler)
+
+    def start(self, host: str="127.0.0.1", port: int=8765, socket_path: str="") -> Tuple[str, Any]:
+        """Starts the workers and binds the listener, returns the bound address."""
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self.__work, daemon=True)
+            thread.start()
+            self.__threads.append(thread)
+
+        self.__httpd = self.__bind(host, port, socket_path)
+        address = self.__httpd.server_address
+        if isinstance(address, tuple):
+            return ("http", address)
+        return ("unix", address)
+
+    def serve_forever(self) -> None:
+        if self.__httpd is None:
+            raise RuntimeError("AnalysisServer.start() must be called before serve_forever()")
+        self.__httpd.serve_forever()
+
+    def shutdown(self) -> None:
+        """Stops accepting requests, lets the workers finish queued jobs, then stops them."""
+        if self.__httpd is not None:
+            self.__httpd.shutdown()
+            self.__httpd.server_close()
+        for _ in self.__threads:
+            self.__jobs.put(None)
+        for thread in self.__threads:
+            thread.join()
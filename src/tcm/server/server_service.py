@@ -0,0 +1,281 @@
+import json
+import time
+import hashlib
+
+# Local Imports
+from tcm.database.database_vector import VectorDB
+from tcm.database.database_lexical import LexicalIndex
+from tcm.database.database_retrieval_cache import RETRIEVAL_CACHE_DIR, RetrievalCache
+
+from tcm.helper.helper_constants import JINJA_PROMPT
+from tcm.helper.helper_checkpoint import make_checkpointer
+from tcm.helper.helper_state import ANALYSIS_MODES, RUNTIME_KEYS, init_app
+from tcm.helper.helper_taxonomy import TaxonomyProvider
+from tcm.helper.helper_trace import Tracer
+
+from tcm.rag.rag_llm import LLM_CACHE_PATH, LargeLanguageModel
+from tcm.rag.rag_prompt_packer import PROMPT_TOKEN_BUDGET
+
+from tcm.github.github_snapshot_loader import SnapshotLoader, make_loader
+
+# Global Imports
+from typing import Any, Dict, Iterator, Optional, Tuple
+from langchain_core.runnables import RunnableConfig
+
+QUESTION = "Tell me what tech credits does the repo possibly use?"
+
+class AnalysisService:
+    """
+    Holds everything an analysis needs that does not depend on the repository: the vector database,
+    the LLM with its compiled templates, the compiled graph and the taxonomy. In "fast" mode no LLM
+    is built: repositories are labelled by kNN votes over the training metadata, see KnnVoter.
+
+    Built once, then shared by every analysis of a batch run or of the long-running server. Safe to
+    call from several threads at once.
+
+    With a checkpoint file, the graph state of each repository is saved after every node under a
+    thread ID derived from the repository, its commit and the analysis settings, and `analyze(...,
+    resume=True)` continues an interrupted analysis from its last finished node.
+    """
+    vector_db: VectorDB
+    llm: Optional[LargeLanguageModel]
+    retrieval_cache: Optional[RetrievalCache]
+    loader_backend: str
+    k: int
+    dedup: bool
+    max_queries: int
+    time_budget: float
+    mode: str
+    prompt_budget: int
+    group_size: int
+    lexical_index: Optional[LexicalIndex]
+    min_lexical_score: float
+
+    def __init__(
+            self,
+            vector_db: VectorDB,
+            loader_backend: str="tarball",
+            taxonomy_source: str="local",
+            k: int=3,
+            dedup: bool=True,
+            max_queries: int=0,
+            time_budget: float=0.0,
+            mode: str="llm",
+            prompt_budget: int=PROMPT_TOKEN_BUDGET,
+            group_size: int=3,
+            lexical_index: Optional[LexicalIndex]=None,
+            min_lexical_score: float=0.25,
+            llm: Optional[LargeLanguageModel]=None,
+            llm_cache_path: str=LLM_CACHE_PATH,
+            refresh_llm_cache: bool=False,
+            retrieval_cache_dir: str=RETRIEVAL_CACHE_DIR,
+            checkpoint_path: str=""
+    ) -> None:
+        """
+        Args:
+            vector_db (VectorDB): collection of labelled tech credit examples
+            loader_backend (str): how repositories are fetched, see LOADER_BACKENDS
+                (default "tarball")
+            taxonomy_source (str): "local" or "remote" tech credit patterns (default "local")
+            k (int): number of most similar user code snippets sent to the LLM (default 3)
+            dedup (bool): collapse (near-)duplicate chunks before retrieval (default True)
+            max_queries (int): max chunks of a repository sent to the vector store, the rest are
+                sampled, see QueryBudget (default 0, no limit)
+            time_budget (float): seconds after which retrieval stops querying new chunks
+                (default 0, no limit)
+            mode (str): one of ANALYSIS_MODES, "fast" skips the LLM entirely (default "llm")
+            prompt_budget (int): max tokens of the prompt, see PromptPacker, 0 sends everything
+                retrieved (default PROMPT_TOKEN_BUDGET)
+            group_size (int): parts per prompt in "map-reduce" mode (default 3)
+            lexical_index (Optional[LexicalIndex]): BM25 index of the training chunks, only
+                chunks scoring at least `min_lexical_score` against it are embedded and searched
+                (default None, every chunk is)
+            min_lexical_score (float): normalized BM25 score needed to pass the prefilter
+                (default 0.25)
+            llm (Optional[LargeLanguageModel]): already built model, e.g. an offline stand-in
+                (default None builds Claude)
+            llm_cache_path (str): SQLite file for the LLM response cache, "" disables it
+            refresh_llm_cache (bool): always call the LLM, but still store its responses
+            retrieval_cache_dir (str): directory keeping the last retrieval results of each
+                repository for incremental re-analysis, "" always retrieves every file
+            checkpoint_path (str): SQLite file keeping the graph state of unfinished analyses, ""
+                disables checkpointing (default "")
+        """
+        if mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode {mode!r}, expected one of {ANALYSIS_MODES}")
+
+        self.vector_db = vector_db
+        self.mode = mode
+        self.prompt_budget = prompt_budget
+        self.group_size = group_size
+        self.lexical_index = lexical_index
+        self.min_lexical_score = min_lexical_score
+        self.loader_backend = loader_backend
+        self.k = k
+        self.dedup = dedup
+        self.max_queries = max_queries
+        self.time_budget = time_budget
+        self.retrieval_cache = RetrievalCache(retrieval_cache_dir) \
+            if retrieval_cache_dir != "" else None
+
+        self.llm = llm
+        self.__user_tmp = None
+        self.__prompt = None
+        self.__reduce_prompt = None
+        if mode != "fast":
+            if self.llm is None:
+                self.llm = LargeLanguageModel(
+                    "claude-3-5-sonnet-latest",
+                    "anthropic",
+                    "CLAUDE_API_KEY",
+                    temperature=0,
+                    cache_path=llm_cache_path,
+                    bypass_cache=refresh_llm_cache
+                )
+            self.__user_tmp = self.llm.generate_jinja_prompt_template(JINJA_PROMPT)
+            self.__prompt = self.llm.generate_chat_prompt()
+            self.__reduce_prompt = self.llm.generate_reduce_prompt()
+
+        # llm.debug_chat_prompt()
+
+        self.__tech_credit_list = TaxonomyProvider.categories(taxonomy_source)
+        self.__checkpointer = None
+        if checkpoint_path != "":
+            resources = self.make_state("")
+            self.__checkpointer = make_checkpointer(
+                checkpoint_path, {key: resources[key] for key in RUNTIME_KEYS}
+            )
+        self.__graph = init_app(mode, self.__checkpointer)
+
+    def make_state(self, url: str, branch: str="main", folder: str="") -> Dict[str, Any]:
+        return {
+            "question": QUESTION,
+            "url": url,
+            "branch": branch,
+            "folder": folder,
+            "loader_backend": self.loader_backend,
+            "tech_credit_list": self.__tech_credit_list,
+            "k": self.k,
+            "dedup": self.dedup,
+            "max_queries": self.max_queries,
+            "time_budget": self.time_budget,
+            "mode": self.mode,
+            "prompt_budget": self.prompt_budget,
+            "group_size": self.group_size,
+            "vector_db": self.vector_db,
+            "lexical_index": self.lexical_index,
+            "min_lexical_score": self.min_lexical_score,
+            "retrieval_cache": self.retrieval_cache,
+            "user_prompt_template": self.__user_tmp,
+            "prompt": self.__prompt,
+            "reduce_prompt": self.__reduce_prompt,
+            "llm": self.llm
+        }
+
+    def resolve_commit(self, url: str, branch: str="main") -> str:
+        """Returns the commit SHA the branch points to, or "" if the loader cannot tell."""
+        loader = make_loader(url, branch, self.loader_backend)
+        return loader.resolve_commit() if isinstance(loader, SnapshotLoader) else ""
+
+    def __thread_id(self, state: Dict[str, Any], commit: str) -> str:
+        settings = {key: value for key, value in state.items() if key not in RUNTIME_KEYS}
+        return hashlib.sha256(
+            json.dumps([settings, commit], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def __run_config(self, thread_id: str) -> Optional[RunnableConfig]:
+        if self.__checkpointer is None:
+            return None
+        return RunnableConfig(configurable={"thread_id": thread_id})
+
+    def analyze(
+            self,
+            key: str,
+            url: str,
+            branch: str="main",
+            folder: str="",
+            commit: str="",
+            resume: bool=False
+    ) -> Tuple[str, Optional[str], float, Optional[Exception]]:
+        """
+        Runs the graph for one repository, isolating failures from the rest of the batch.
+
+        Args:
+            commit (str): commit SHA the branch resolved to, keys the checkpoints (default "")
+            resume (bool): continue from the last checkpoint of an interrupted analysis of the
+                same repository, commit and settings, if there is one; repositories without a
+                commit are analyzed from the start (default False)
+
+        Returns:
+            Tuple[str, Optional[str], float, Optional[Exception]]: the repo key, the LLM answer
+            (None on failure), the wall-clock duration and the exception raised, if any
+        """
+        start_repo = time.time()
+        state = self.make_state(url, branch, folder)
+        thread_id = self.__thread_id(state, commit)
+        config = self.__run_config(thread_id)
+        try:
+            with Tracer.run(key):
+                # Without a commit, the repository may have changed since the checkpoint was saved
+                pending = self.__graph.get_state(config).next \
+                    if resume and commit and config is not None else ()
+                if pending:
+                    print(f"(DEBUG): Resuming {key} at {', '.join(pending)}")
+                    Tracer.count("resumed_runs")
+                    response = self.__graph.invoke(None, config)
+                else:
+                    response = self.__graph.invoke(state, config)
+
+            # The answer is stored by the caller, the intermediate states are not needed anymore
+            if self.__checkpointer is not None:
+                self.__checkpointer.delete_thread(thread_id)
+            return key, response["answer"], time.time() - start_repo, None
+        except Exception as e:
+            return key, None, time.time() - start_repo, e
+
+    def stream(
+            self,
+            key: str,
+            url: str,
+            branch: str="main",
+            folder: str="",
+            run_id: str=""
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Runs the graph for one repository, yielding a progress event as each node finishes and a
+        final "result" (or "error") event. Exceptions never escape the iterator.
+
+        Args:
+            run_id (str): trace run the spans and counters are recorded under (default: the key)
+        """
+        start_repo = time.time()
+        answer = None
+        state = self.make_state(url, branch, folder)
+        try:
+            with Tracer.run(run_id or key):
+                for update in self.__graph.stream(
+                    state, self.__run_config(self.__thread_id(state, "")), stream_mode="updates"
+                ):
+                    for node, values in update.items():
+                        answer = (values or {}).get("answer", answer)
+                        yield {
+                            "event": "node",
+                            "key": key,
+                            "node": node,
+                            "elapsed": time.time() - start_repo
+                        }
+        except Exception as e:
+            yield {
+                "event": "error",
+                "key": key,
+                "error": repr(e),
+                "duration": time.time() - start_repo
+            }
+            return
+
+        yield {
+            "event": "result",
+            "key": key,
+            "answer": answer,
+            "duration": time.time() - start_repo
+        }
@@ -0,0 +1,162 @@
+import re
+import hashlib
+
+import numpy as np
+
+# Local Imports
+from tcm.helper.helper_trace import Tracer
+
+# Global Imports
+from langchain_core.documents import Document
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+Results = List[Tuple[Document, float]]
+
+class ChunkDeduplicator:
+    """
+    Collapses duplicate code chunks into clusters before they are sent to the vector store.
+
+    Exact duplicates (after whitespace normalization) are found by hash. Near-duplicates, such as
+    getters/setters that only differ by a field name, are found with a 64-bit SimHash over
+    shingles of normalized tokens: two chunks belong to the same cluster when their SimHashes differ
+    in at most `max_distance` bits. The SimHash is indexed by 4 bands of 16 bits, so any match
+    within 3 bits shares at least one band with its cluster representative.
+
+    Only the first chunk of each cluster (its representative) is queried; the other members reuse
+    its neighbors and only add to the cluster count.
+    """
+    max_distance: int
+    min_tokens: int
+
+    __BANDS = 4
+    __BAND_BITS = 16
+    __SHINGLE = 3
+
+    def __init__(self, max_distance: int=3, min_tokens: int=8) -> None:
+        """
+        Args:
+            max_distance (int): max differing SimHash bits for near-duplicates, at most 3 so that
+                banding finds every match (default 3)
+            min_tokens (int): chunks with fewer tokens are only collapsed when identical
+                (default 8)
+        """
+        self.max_distance = min(max_distance, ChunkDeduplicator.__BANDS - 1)
+        self.min_tokens = min_tokens
+
+        self.__exact: Dict[str, int] = {}
+        self.__bands: List[Dict[int, List[int]]] = [{} for _ in range(ChunkDeduplicator.__BANDS)]
+        self.__simhashes: List[Optional[int]] = []
+        self.__results: Dict[int, Results] = {}
+
+        # Filled by collapse()
+        self.__representatives: Dict[int, Tuple[str, Results]] = {}
+        self.__counts: Dict[int, int] = {}
+        self.counts: Dict[str, int] = {}
+
+    @staticmethod
+    def __tokens(text: str) -> List[str]:
+        # Numbers are dropped so that e.g. value1/value2 style fields still collapse
+        return [
+            token.lower() for token in re.findall(r"[A-Za-z_][A-Za-z_]*|[^\sA-Za-z_0-9]", text)
+        ]
+
+    @staticmethod
+    def __simhash(tokens: List[str]) -> int:
+        size = ChunkDeduplicator.__SHINGLE
+        digests = np.frombuffer(b"".join(
+            hashlib.blake2b(" ".join(tokens[i:i + size]).encode("utf-8"), digest_size=8).digest()
+            for i in range(max(1, len(tokens) - size + 1))
+        ), dtype=np.uint8).reshape(-1, 8)
+
+        # Each bit is set when most shingle hashes have it set
+        bits = np.unpackbits(digests, axis=1, bitorder="little")
+        majority = bits.sum(axis=0) * 2 > len(digests)
+        return int.from_bytes(np.packbits(majority, bitorder="little").tobytes(), "little")
+
+    def __band_keys(self, simhash: int) -> Iterator[Tuple[int, int]]:
+        mask = (1 << ChunkDeduplicator.__BAND_BITS) - 1
+        for band in range(ChunkDeduplicator.__BANDS):
+            yield band, simhash >> (band * ChunkDeduplicator.__BAND_BITS) & mask
+
+    def assign(self, text: str) -> Tuple[int, bool]:
+        """
+        Finds the cluster of a chunk, creating a new one if it matches none.
+
+        Returns:
+            Tuple[int, bool]: the cluster id and whether the chunk started a new cluster
+        """
+        normalized = " ".join(text.split())
+        exact_key = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        if exact_key in self.__exact:
+            return self.__exact[exact_key], False
+
+        tokens = ChunkDeduplicator.__tokens(normalized)
+        simhash = ChunkDeduplicator.__simhash(tokens) if len(tokens) >= self.min_tokens else None
+
+        if simhash is not None:
+            for band, key in self.__band_keys(simhash):
+                for cluster in self.__bands[band].get(key, []):
+                    other = self.__simhashes[cluster]
+                    if other is not None and bin(simhash ^ other).count("1") <= self.max_distance:
+                        self.__exact[exact_key] = cluster
+                        return cluster, False
+
+        cluster = len(self.__simhashes)
+        self.__simhashes.append(simhash)
+        self.__exact[exact_key] = cluster
+        if simhash is not None:
+            for band, key in self.__band_keys(simhash):
+                self.__bands[band].setdefault(key, []).append(cluster)
+        return cluster, True
+
+    def query(
+            self,
+            texts: List[str],
+            query_fn: Callable[[List[str]], List[Results]]
+    ) -> List[Results]:
+        """
+        Resolves the neighbors of a batch of chunks, querying only chunks that start a new cluster
+        (in a single call) and reusing the neighbors of their cluster for every other chunk.
+        """
+        clusters = [self.assign(text)[0] for text in texts]
+
+        new_texts = {}
+        for cluster, text in zip(clusters, texts):
+            if cluster not in self.__results and cluster not in new_texts:
+                new_texts[cluster] = text
+
+        if new_texts:
+            for cluster, results in zip(new_texts, query_fn(list(new_texts.values()))):
+                self.__results[cluster] = results
+
+        return [self.__results[cluster] for cluster in clusters]
+
+    def collapse(self, retrieved: Iterable[Tuple[str, Results]]) -> Iterator[Tuple[str, Results]]:
+        """
+        Consumes every retrieved chunk and yields one (text, neighbors) per cluster, once all chunks
+        are counted. Cluster sizes are then available in `counts`, by representative text.
+        """
+        chunks = 0
+        for text, results in retrieved:
+            chunks += 1
+            cluster, _ = self.assign(text)
+            if cluster not in self.__representatives:
+                self.__representatives[cluster] = (text, results)
+            self.__counts[cluster] = self.__counts.get(cluster, 0) + 1
+
+        # Filled in place, callers may hold on to the dict before consuming the iterator
+        self.counts.update({
+            text: self.__counts[cluster] for cluster, (text, _) in self.__representatives.items()
+        })
+        Tracer.count("unique_chunks", len(self.__representatives))
+        Tracer.count("duplicate_chunks", chunks - len(self.__representatives))
+
+        yield from self.__representatives.values()
+
+    def stats(self) -> Dict[str, Any]:
+        chunks = sum(self.__counts.values())
+        return {
+            "chunks": chunks,
+            "clusters": len(self.__representatives),
+            "dedup_ratio": 1 - len(self.__representatives) / chunks if chunks else 0.0
+        }
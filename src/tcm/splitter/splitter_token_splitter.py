@@ -1,44 +1,196 @@
+import os
+import json
+import atexit
+import hashlib
+import threading
+import multiprocessing
+
+# Local Imports
+from tcm.helper.helper_stream import batched
+from tcm.helper.helper_sqlite_cache import SqliteCache
+from tcm.helper.helper_trace import Tracer
+
 # Global Imports
-from typing import List, Dict, Any
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from langchain_core.documents import Document
 from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
 
+SPLIT_CACHE_PATH = ".cache/tcm/splits.sqlite"
+
+@lru_cache(maxsize=None)
+def _get_splitter(
+        language: Optional[Language],
+        chunk_size: int,
+        chunk_overlap: int
+) -> RecursiveCharacterTextSplitter:
+    """Builds the splitter (and its tiktoken encoder) once per process and configuration."""
+    # from_tiktoken_encoder is a classmethod, so the language separators and sizes have to be
+    # passed to it directly rather than set on a from_language() instance first
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=RecursiveCharacterTextSplitter.get_separators_for_language(language)
+            if language is not None else None,
+        is_separator_regex=language is not None
+    )
+
+def _split_text(job: Tuple[str, Optional[Language], int, int]) -> List[str]:
+    """Process pool entry point, must stay importable at module level."""
+    text, language, chunk_size, chunk_overlap = job
+    return _get_splitter(language, chunk_size, chunk_overlap).split_text(text)
+
 class TokenSplitter:
+    # The tiktoken splitter defaults the analysis has always run with: paragraph, line and word
+    # separators, 4000-token chunks overlapping by 200 tokens. Set LANGUAGE for code separators
+    LANGUAGE: Optional[Language] = None
+    CHUNK_SIZE = 4000
+    CHUNK_OVERLAP = 200
+
+    # Files are split in windows of this many documents, in parallel once a window holds at least
+    # PARALLEL_MIN_CHARS characters that are not in the split cache
+    WINDOW = 64
+    PARALLEL_MIN_CHARS = 200_000
+    WORKERS = os.cpu_count() or 1
+
+    __pool: Optional[ProcessPoolExecutor] = None
+    __pool_lock = threading.Lock()
+    __cache: Optional[SqliteCache] = None
+
+    @staticmethod
+    def config() -> Dict[str, Any]:
+        """Returns the settings that determine how documents get split."""
+        return {
+            "language": TokenSplitter.__language(),
+            "chunk_size": TokenSplitter.CHUNK_SIZE,
+            "chunk_overlap": TokenSplitter.CHUNK_OVERLAP,
+            "encoder": "tiktoken"
+        }
+
+    @staticmethod
+    def __language() -> str:
+        return TokenSplitter.LANGUAGE.value if TokenSplitter.LANGUAGE is not None else "text"
+
+    @staticmethod
+    def configure_cache(path: str=SPLIT_CACHE_PATH, max_entries: int=200_000) -> None:
+        """Memoizes splits by (content hash, chunk size, language) on disk, "" disables it."""
+        TokenSplitter.__cache = SqliteCache(path, "splits", max_entries=max_entries) \
+            if path != "" else None
+
+    @staticmethod
+    def __get_pool() -> ProcessPoolExecutor:
+        if TokenSplitter.__pool is not None:
+            return TokenSplitter.__pool
+
+        # Concurrent analyses may split at the same time, only one of them creates the pool
+        with TokenSplitter.__pool_lock:
+            if TokenSplitter.__pool is None:
+                # Forking a process already running the prefetch thread, thread pools and SQLite
+                # connections can deadlock the child, spawned workers start from a clean
+                # interpreter
+                pool = ProcessPoolExecutor(
+                    max_workers=TokenSplitter.WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                atexit.register(pool.shutdown)
+                TokenSplitter.__pool = pool
+            return TokenSplitter.__pool
+
     @staticmethod
-    def split_documents(documents: List[Document], 
-                        metadata_map: Dict[Any, Any]={}) -> List[Document]:
+    def __cache_key(text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{TokenSplitter.__language()}:{TokenSplitter.CHUNK_SIZE}:" \
+            f"{TokenSplitter.CHUNK_OVERLAP}:{digest}"
+
+    @staticmethod
+    def __split_texts(texts: List[str]) -> List[List[str]]:
+        """Splits texts in order, reusing memoized splits and fanning misses out to processes."""
+        keys = [TokenSplitter.__cache_key(text) for text in texts]
+        cached = TokenSplitter.__cache.get_many(keys) if TokenSplitter.__cache is not None else {}
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing[key] = text
+
+        splits = {key: json.loads(value) for key, value in cached.items()}
+        Tracer.count("split_cache_hits", len(cached))
+        if missing:
+            jobs = [
+                (text, TokenSplitter.LANGUAGE, TokenSplitter.CHUNK_SIZE, TokenSplitter.CHUNK_OVERLAP)
+                for text in missing.values()
+            ]
+            if TokenSplitter.WORKERS > 1 and \
+                    sum(len(text) for text in missing.values()) >= TokenSplitter.PARALLEL_MIN_CHARS:
+                results = list(TokenSplitter.__get_pool().map(_split_text, jobs))
+            else:
+                results = [_split_text(job) for job in jobs]
+
+            new_splits = dict(zip(missing.keys(), results))
+            if TokenSplitter.__cache is not None:
+                TokenSplitter.__cache.put_many({
+                    key: json.dumps(value).encode("utf-8") for key, value in new_splits.items()
+                })
+            splits.update(new_splits)
+
+        return [splits[key] for key in keys]
+
+    @staticmethod
+    def split_documents(documents: List[Document],
+                        metadata_map: Dict[Any, Any]={},
+                        keep_path: bool=False) -> List[Document]:
         """
         Splits Java code documents into code snippets and prepends the code structure as a comment
         header.
 
         Args:
             documents (List[Document]): List of Document objects containing Java code.
+            metadata_map (Dict[Any, Any]): metadata to attach to the snippets, by document path.
+            keep_path (bool): also copy the document path into each snippet's metadata.
 
         Returns:
             List[Document]: List of new strings, each with a code structure comment followed by the
             code snippet.
         """
-        java_splitter = RecursiveCharacterTextSplitter.from_language(
-            language=Language.JAVA, chunk_size=200).from_tiktoken_encoder()
+        return list(TokenSplitter.iter_split_documents(documents, metadata_map, keep_path))
 
-        all_splits = []
-        for doc in documents:
+    @staticmethod
+    def iter_split_documents(documents: Iterable[Document],
+                             metadata_map: Dict[Any, Any]={},
+                             keep_path: bool=False) -> Iterator[Document]:
+        """
+        Lazily splits documents, yielding the snippets of each window of documents as soon as it is
+        split. Output order always follows the input order.
+
+        Args:
+            documents (Iterable[Document]): Documents containing Java code, possibly a generator.
+            metadata_map (Dict[Any, Any]): metadata to attach to the snippets, by document path.
+            keep_path (bool): also copy the document path into each snippet's metadata.
+
+        Returns:
+            Iterator[Document]: the code snippets, in document order.
+        """
+        for window in batched(documents, TokenSplitter.WINDOW):
             #print("(DEBUG) Document Text: ", doc.page_content.encode("utf-8"))
             #print("(DEBUG) Document Metadata: ", doc.metadata)
-            splits = java_splitter.split_text(doc.page_content)
-            for snippet in splits:
-                # delete the header for now, only splitting the literal source code
-                # header = (
-                #    "# ===== code structure =====\n" +
-                #    "\n".join(f"# {line}" for line in snippet.subtree.splitlines()) +
-                #    "\n\n"
-                #)
-                all_splits.append(Document(
-                    page_content=(
-                        snippet
-                    ),
-                    metadata=metadata_map.get(doc.metadata.get('path'), {})
-                ))
-
-        return all_splits
-
+            with Tracer.span("split", files=len(window)):
+                window_splits = TokenSplitter.__split_texts([doc.page_content for doc in window])
+            Tracer.count("chunks", sum(len(splits) for splits in window_splits))
+            for doc, splits in zip(window, window_splits):
+                metadata = metadata_map.get(doc.metadata.get('path'), {})
+                if keep_path:
+                    metadata = {**metadata, "path": doc.metadata.get('path', "")}
+                for snippet in splits:
+                    # delete the header for now, only splitting the literal source code
+                    # header = (
+                    #    "# ===== code structure =====\n" +
+                    #    "\n".join(f"# {line}" for line in snippet.subtree.splitlines()) +
+                    #    "\n\n"
+                    #)
+                    yield Document(
+                        page_content=(
+                            snippet
+                        ),
+                        metadata=metadata
+                    )
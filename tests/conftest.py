@@ -0,0 +1,15 @@
+import os
+
+# Chroma would otherwise try to send telemetry from every test
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+import pytest
+
+# Local Imports
+from bench_support import HashEmbeddings
+from tcm.rag.rag_embeddings import TCMEmbeddings
+
+@pytest.fixture
+def embeddings() -> TCMEmbeddings:
+    """Offline embedding model, texts sharing identifiers are close together."""
+    return TCMEmbeddings("hash-64", cache_path="", embeddings=HashEmbeddings(64))
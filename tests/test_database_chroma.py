@@ -0,0 +1,34 @@
+# Local Imports
+from tcm.database.database_chroma import ChromaDB
+
+# Global Imports
+from langchain_core.documents import Document
+
+def test_upsert_vectors_round_trip_keeps_metadata(tmp_path, embeddings):
+    db = ChromaDB("code", embeddings, str(tmp_path))
+    documents = [
+        Document(page_content="class ConcreteStrategy implements Strategy {}",
+                 metadata={"path": "Strategy.java"}),
+        # Chroma rejects empty metadata dicts
+        Document(page_content="class Builder { Builder name(String name) {} }", metadata={}),
+    ]
+    vectors = embeddings.get_embeddings().embed_documents([doc.page_content for doc in documents])
+    db.upsert_vectors(documents, ["a", "b"], vectors)
+
+    ids, exported, exported_vectors = db.export_entries()
+    by_id = dict(zip(ids, exported))
+    assert sorted(ids) == ["a", "b"] == sorted(db.ids())
+    assert by_id["a"].metadata == {"path": "Strategy.java"}
+    assert by_id["b"].metadata == {}
+    assert len(exported_vectors[0]) == 64
+
+def test_query_batch_returns_closest_first(tmp_path, embeddings):
+    db = ChromaDB("code", embeddings, str(tmp_path))
+    db.upsert([
+        Document(page_content="class ConcreteStrategy implements Strategy {}", metadata={"i": 0}),
+        Document(page_content="class PizzaBuilder extends Builder {}", metadata={"i": 1}),
+    ], ["strategy", "builder"])
+
+    (results,) = db.query_batch(["interface Strategy { void execute(); }"], 2)
+    assert [doc.id for doc, _ in results] == ["strategy", "builder"]
+    assert results[0][1] <= results[1][1]
@@ -0,0 +1,84 @@
+import io
+import json
+import pytest
+import tarfile
+
+# Local Imports
+from tcm.database.database_chroma import ChromaDB
+from tcm.database.database_index_pack import IndexPack
+from tcm.database.database_numpy import NumpyFlatDB
+
+# Global Imports
+from langchain_core.documents import Document
+
+DOCUMENTS = [
+    Document(page_content="class ConcreteStrategy implements Strategy {}",
+             metadata={"tech_credit": "Strategy"}),
+    Document(page_content="class PizzaBuilder { Pizza build(); }", metadata={"tech_credit": "Builder"}),
+    Document(page_content="abstract class Shape { abstract double area(); }", metadata={}),
+]
+
+@pytest.fixture(params=[NumpyFlatDB, ChromaDB], ids=["numpy", "chroma"])
+def backend(request):
+    return request.param
+
+def __pack(tmp_path, backend, embeddings) -> str:
+    db = backend("code", embeddings, str(tmp_path / "source"))
+    db.upsert(DOCUMENTS, ["a", "b", "c"])
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text('{"config_hash": "x"}')
+
+    path = str(tmp_path / "index.tcmpack")
+    IndexPack.export(path, {"code": db}, "hash-64", {"chunk_size": 4000},
+                     {"manifest.json": str(manifest)})
+    return path
+
+def test_round_trip_replaces_stale_entries(tmp_path, backend, embeddings):
+    path = __pack(tmp_path, backend, embeddings)
+    target = backend("code", embeddings, str(tmp_path / "target"))
+    target.upsert([Document(page_content="stale", metadata={"x": 1})], ["stale"])
+
+    header = IndexPack.load(path, {"code": target}, "hash-64",
+                            {"manifest.json": str(tmp_path / "restored.json")})
+
+    assert header["collections"]["code"]["count"] == 3
+    assert sorted(target.ids()) == ["a", "b", "c"]
+    assert (tmp_path / "restored.json").read_text() == '{"config_hash": "x"}'
+    (results,) = target.query_batch(["interface Strategy { void run(); }"], 1)
+    assert results[0][0].metadata == {"tech_credit": "Strategy"}
+
+def test_other_embedding_model_is_rejected(tmp_path, embeddings):
+    path = __pack(tmp_path, NumpyFlatDB, embeddings)
+    target = NumpyFlatDB("code", embeddings)
+    with pytest.raises(ValueError, match="embedded with"):
+        IndexPack.load(path, {"code": target}, "another-model", {})
+    assert target.ids() == []
+
+def test_corrupted_member_is_rejected(tmp_path, embeddings):
+    path = __pack(tmp_path, NumpyFlatDB, embeddings)
+    with tarfile.open(path, "r:gz") as tar:
+        members = [(info, tar.extractfile(info).read()) for info in tar]  # type: ignore[union-attr]
+
+    corrupted = str(tmp_path / "corrupted.tcmpack")
+    with tarfile.open(corrupted, "w:gz") as tar:
+        for info, data in members:
+            if info.name == "code.json":
+                data = data.replace(b"PizzaBuilder", b"PastaBuilder")
+            tar.addfile(info, io.BytesIO(data))
+
+    with pytest.raises(ValueError, match="checksum mismatch"):
+        IndexPack.load(corrupted, {"code": NumpyFlatDB("code", embeddings)}, "hash-64", {})
+
+def test_non_regular_member_is_rejected(tmp_path, embeddings):
+    path = str(tmp_path / "malformed.tcmpack")
+    with tarfile.open(path, "w:gz") as tar:
+        header = json.dumps({"version": 1, "embedding_model": "hash-64", "files": {}}).encode()
+        info = tarfile.TarInfo("pack.json")
+        info.size = len(header)
+        tar.addfile(info, io.BytesIO(header))
+        directory = tarfile.TarInfo("code.npy")
+        directory.type = tarfile.DIRTYPE
+        tar.addfile(directory)
+
+    with pytest.raises(ValueError, match="malformed"):
+        IndexPack.load(path, {"code": NumpyFlatDB("code", embeddings)}, "hash-64", {})
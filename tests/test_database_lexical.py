@@ -0,0 +1,41 @@
+# Local Imports
+from tcm.database.database_lexical import LexicalIndex
+
+# Global Imports
+from langchain_core.documents import Document
+
+TRAINING = [
+    Document(page_content="interface Strategy { int execute(int a); }\n"
+                          "class ConcreteStrategyAdd implements Strategy {}"),
+    Document(page_content="class PizzaBuilder { PizzaBuilder cheese(); Pizza build(); }"),
+    Document(page_content="abstract class Shape { abstract double area(); }"),
+]
+
+def test_identifiers_are_split_on_camel_case():
+    terms = LexicalIndex.terms("ConcreteStrategyA implements HTTPServer_config")
+    assert terms[:3] == ["concretestrategya", "concrete", "strategy"]
+    assert "http" in terms and "server" in terms and "implements" in terms
+
+def test_scores_are_normalized_against_the_closest_chunk():
+    index = LexicalIndex()
+    index.build(TRAINING)
+
+    assert 0.99 <= index.score(TRAINING[1].page_content) <= 1.01
+    assert index.score("class OrderStrategy implements Strategy {}") > \
+        index.score("class PizzaOven { void bake(); }") > 0
+    assert index.score("x = y + z") == 0.0
+    assert LexicalIndex().score("anything") == 0.0
+
+def test_saved_index_scores_and_fingerprints_the_same(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical_index.json"))
+    index.build(TRAINING)
+    index.save()
+
+    loaded = LexicalIndex(str(tmp_path / "lexical_index.json"))
+    assert len(loaded) == 3
+    assert loaded.fingerprint() == index.fingerprint()
+    query = "class Builder implements Strategy"
+    assert loaded.score(query) == index.score(query)
+
+    index.build(TRAINING[:2])
+    assert index.fingerprint() != loaded.fingerprint()
@@ -0,0 +1,63 @@
+# Local Imports
+from tcm.database.database_manifest import TrainingManifest
+from tcm.database.database_numpy import NumpyFlatDB
+
+# Global Imports
+from langchain_core.documents import Document
+
+CONFIG = {"chunk_size": 200, "model": "test"}
+
+def __sources(*texts: str):
+    return {"A.java": [Document(page_content=text) for text in texts]}
+
+def test_plan_embeds_only_new_chunks(tmp_path):
+    manifest = TrainingManifest(str(tmp_path / "manifest.json"), CONFIG)
+    new_docs, new_ids, stale_ids = manifest.plan("code", __sources("a", "b"))
+    assert [doc.page_content for doc in new_docs] == ["a", "b"]
+    assert stale_ids == []
+    manifest.save("fp")
+
+    reloaded = TrainingManifest(str(tmp_path / "manifest.json"), CONFIG)
+    new_docs, _, stale_ids = reloaded.plan("code", __sources("a", "c"))
+    assert [doc.page_content for doc in new_docs] == ["c"]
+    assert stale_ids == [new_ids[1]]
+
+def test_plan_sweeps_entries_unknown_to_a_new_manifest(tmp_path):
+    manifest = TrainingManifest(str(tmp_path / "manifest.json"), CONFIG)
+    kept = manifest.chunk_id("A.java", "a")
+    # Entries left by runs before the manifest existed, e.g. random UUID duplicates
+    existing = [kept, "3f1c-uuid-1", "3f1c-uuid-2"]
+
+    new_docs, new_ids, stale_ids = manifest.plan("code", __sources("a"), existing)
+    assert new_ids == [kept]
+    assert sorted(stale_ids) == ["3f1c-uuid-1", "3f1c-uuid-2"]
+
+def test_new_config_forgets_known_ids(tmp_path):
+    manifest = TrainingManifest(str(tmp_path / "manifest.json"), CONFIG)
+    _, old_ids, _ = manifest.plan("code", __sources("a"))
+    manifest.save("fp")
+
+    changed = TrainingManifest(str(tmp_path / "manifest.json"), {**CONFIG, "chunk_size": 400})
+    assert changed.collection_ids("code") == []
+    _, new_ids, stale_ids = changed.plan("code", __sources("a"), old_ids)
+    assert new_ids != old_ids
+    assert stale_ids == old_ids
+
+def test_relabelled_chunk_is_upserted_again(tmp_path, embeddings):
+    db = NumpyFlatDB("code", embeddings)
+    labelled = {"A.java": [Document(page_content="a", metadata={"tech_credit": "Old"})]}
+    manifest = TrainingManifest(str(tmp_path / "manifest.json"), CONFIG)
+    new_docs, new_ids, _ = manifest.plan("code", labelled)
+    db.upsert(new_docs, new_ids)
+    manifest.save("fp")
+
+    relabelled = {"A.java": [Document(page_content="a", metadata={"tech_credit": "New"})]}
+    reloaded = TrainingManifest(str(tmp_path / "manifest.json"), CONFIG)
+    new_docs, relabelled_ids, stale_ids = reloaded.plan("code", relabelled)
+    assert [doc.metadata["tech_credit"] for doc in new_docs] == ["New"]
+    assert stale_ids == new_ids
+
+    db.upsert(new_docs, relabelled_ids)
+    db.delete(stale_ids)
+    _, documents, _ = db.export_entries()
+    assert [doc.metadata["tech_credit"] for doc in documents] == ["New"]
@@ -0,0 +1,46 @@
+# Local Imports
+from tcm.database.database_retrieval_cache import RetrievalCache
+
+# Global Imports
+from langchain_core.documents import Document
+
+NEIGHBOR = Document(page_content="class ConcreteStrategy {}", metadata={"tech_credit": "Strategy"},
+                    id="strategy")
+
+def __first_run(cache: RetrievalCache) -> None:
+    run = cache.open("https://github.com/org/project", "main", "", "fp")
+    for path, sha in (("A.java", "sha-a"), ("B.java", "sha-b")):
+        assert not run.reuse(path, sha)
+        run.record(path, f"code of {path}", [(NEIGHBOR, 0.25)])
+    run.save()
+
+def test_unchanged_files_reuse_their_neighbors(tmp_path):
+    cache = RetrievalCache(str(tmp_path))
+    __first_run(cache)
+
+    run = cache.open("https://github.com/org/project", "main", "", "fp")
+    assert run.reuse("A.java", "sha-a")
+    assert not run.reuse("B.java", "sha-b2")
+
+    ((path, text, results),) = list(run.iter_reused())
+    assert (path, text) == ("A.java", "code of A.java")
+    assert results[0][0].metadata == {"tech_credit": "Strategy"}
+    assert results[0][1] == 0.25
+
+def test_another_fingerprint_ignores_previous_results(tmp_path):
+    cache = RetrievalCache(str(tmp_path))
+    __first_run(cache)
+
+    run = cache.open("https://github.com/org/project", "main", "", "other collection")
+    assert not run.reuse("A.java", "sha-a")
+
+def test_files_missing_from_the_next_run_are_dropped(tmp_path):
+    cache = RetrievalCache(str(tmp_path))
+    __first_run(cache)
+
+    run = cache.open("https://github.com/org/project", "main", "", "fp")
+    assert run.reuse("A.java", "sha-a")
+    run.save()
+
+    run = cache.open("https://github.com/org/project", "main", "", "fp")
+    assert not run.reuse("B.java", "sha-b")
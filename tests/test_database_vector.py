@@ -0,0 +1,39 @@
+import pytest
+
+# Local Imports
+from tcm.database.database_vector import VectorDB
+
+# Global Imports
+from langchain_core.documents import Document
+
+def __results(*distances: float):
+    return [
+        (f"code {distance}", [(Document(page_content="example"), distance)])
+        for distance in distances
+    ]
+
+def test_top_k_returns_the_closest_query_first():
+    top = VectorDB.top_k(__results(0.5, 0.1, 0.9, 0.3, 0.7), k=3)
+    assert [score for _, _, score in top] == [0.1, 0.3, 0.5]
+    assert [query for query, _, _ in top] == ["code 0.1", "code 0.3", "code 0.5"]
+
+def test_top_k_ranks_by_the_closest_neighbor():
+    results = [
+        ("a", [(Document(page_content="x"), 0.8), (Document(page_content="y"), 0.2)]),
+        ("b", [(Document(page_content="x"), 0.3)]),
+        ("c", []),
+    ]
+    assert [query for query, _, _ in VectorDB.top_k(results, k=5)] == ["a", "b"]
+
+def test_duplicate_counts_shrink_the_distance():
+    counts = {"code 0.3": 100}
+    top = VectorDB.top_k(__results(0.2, 0.3), k=1, counts=counts, count_weight=0.5)
+    assert top[0][0] == "code 0.3"
+
+def test_backend_missing_a_method_cannot_be_constructed():
+    class Incomplete(VectorDB):
+        def query_batch(self, queries, top_docs_per_query=4):
+            return [[] for _ in queries]
+
+    with pytest.raises(TypeError, match="abstract"):
+        Incomplete()  # type: ignore[abstract]
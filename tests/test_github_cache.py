@@ -0,0 +1,32 @@
+import os
+
+# Local Imports
+from tcm.github.github_cache import RepoCache
+
+def __fetch(dest: str) -> None:
+    with open(os.path.join(dest, "A.java"), 'w', encoding='utf-8') as f:
+        f.write("class A {}" * 100)
+
+def test_snapshot_being_read_is_not_evicted(tmp_path):
+    cache = RepoCache(str(tmp_path), max_bytes=1)
+    with cache.snapshot_dir("org/reading", "1" * 40, __fetch) as reading:
+        # Another analysis fetches a snapshot and prunes the cache past its cap
+        with cache.snapshot_dir("org/other", "2" * 40, __fetch) as other:
+            assert os.path.isfile(os.path.join(reading, "A.java"))
+        assert os.path.isdir(other)
+
+    assert cache.prune() > 0
+    assert not os.path.isdir(reading)
+    assert not os.path.isdir(other)
+
+def test_cached_snapshot_is_not_fetched_again(tmp_path):
+    cache = RepoCache(str(tmp_path))
+    fetched = []
+    def fetch(dest: str) -> None:
+        fetched.append(dest)
+        __fetch(dest)
+
+    for _ in range(2):
+        with cache.snapshot_dir("org/cached", "3" * 40, fetch) as path:
+            assert os.listdir(path) != []
+    assert len(fetched) == 1
@@ -0,0 +1,83 @@
+import time
+import pytest
+import threading
+
+# Local Imports
+from tcm.github.github_client import GithubClient, TokenBucket
+
+# Global Imports
+from typing import Any, Dict, List, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class ScriptedApi(ThreadingHTTPServer):
+    """Answers each GET with the next scripted (status, headers, body), recording the requests."""
+    def __init__(self, replies: List[Tuple[int, Dict[str, str], bytes]]) -> None:
+        super().__init__(("127.0.0.1", 0), ScriptedHandler)
+        self.replies = replies
+        self.requests: List[Dict[str, str]] = []
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    server: ScriptedApi
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.server.requests.append(dict(self.headers))
+        status, headers, body = self.server.replies.pop(0)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def api(request):
+    server = ScriptedApi(list(request.param))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+def __client(api: ScriptedApi, cache_path: str="") -> GithubClient:
+    return GithubClient(base_url=f"http://127.0.0.1:{api.server_address[1]}", cache_path=cache_path)
+
+@pytest.mark.parametrize("api", [[
+    (200, {"ETag": '"v1"'}, b'{"sha": "1"}'),
+    (304, {"ETag": '"v1"'}, b""),
+]], indirect=True)
+def test_not_modified_is_served_from_the_cache(api, tmp_path):
+    client = __client(api, str(tmp_path / "responses.sqlite"))
+    first = client.get("/repos/o/r/contents/A.java")
+    second = client.get("/repos/o/r/contents/A.java")
+
+    assert "If-None-Match" not in api.requests[0]
+    assert api.requests[1]["If-None-Match"] == '"v1"'
+    assert second.status_code == 200
+    assert second.json() == first.json() == {"sha": "1"}
+
+@pytest.mark.parametrize("api", [[
+    (429, {"Retry-After": "0"}, b"{}"),
+    (200, {}, b'{"ok": true}'),
+]], indirect=True)
+def test_rate_limited_request_is_retried(api):
+    response = __client(api).get("/repos/o/r")
+    assert response.status_code == 200
+    assert len(api.requests) == 2
+
+@pytest.mark.parametrize("api", [[
+    (403, {}, b'{"message": "Resource not accessible"}'),
+]], indirect=True)
+def test_forbidden_without_rate_limit_is_not_retried(api):
+    response = __client(api).get("/repos/o/r")
+    assert response.status_code == 403
+    assert len(api.requests) == 1
+
+def test_bucket_is_unpaced_until_the_quota_runs_low():
+    bucket = TokenBucket(burst=2)
+    assert sum(bucket.acquire() for _ in range(50)) == 0.0
+
+    # 3 requests left for the next 0.5s, below the 10% reserve: 2 in a burst, then paced
+    bucket.update(limit=100, remaining=3, reset=time.time() + 0.5)
+    assert bucket.acquire() == bucket.acquire() == 0.0
+    assert bucket.acquire() > 0.0
@@ -0,0 +1,42 @@
+import pytest
+import requests
+import threading
+
+# Local Imports
+from bench_github import REPO, MockGithubApi
+from bench_support import make_fixture_repo
+
+from tcm.github.github_client import GithubClient
+from tcm.github.github_loader import GithubLoader
+from tcm.helper.helper_filters import FileFilters
+
+@pytest.fixture
+def api(tmp_path):
+    server = MockGithubApi(make_fixture_repo(str(tmp_path / "repo"), 20), quota=5000, window=60)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    GithubClient.configure(base_url=f"http://127.0.0.1:{server.server_address[1]}", cache_path="")
+    yield server
+    server.shutdown()
+    GithubClient.configure()
+
+def test_only_blobs_are_fetched(api):
+    # Every folder entry passes a filter without an extension
+    loader = GithubLoader(f"https://github.com/{REPO}", "main")
+    documents = list(loader.iter_repo(FileFilters.FOLDER_ONLY("src")))
+
+    assert sorted(document.metadata["path"] for document in documents) == sorted(api.files)
+    # One tree listing and one request per file, none for the folders
+    assert api.spent == 1 + len(api.files)
+
+def test_missing_folder_of_an_existing_branch_is_empty(api):
+    loader = GithubLoader(f"https://github.com/{REPO}", "main")
+    assert list(loader.iter_repo(FileFilters.FOLDER_ONLY("docs"))) == []
+
+@pytest.mark.parametrize("url, branch", [
+    (f"https://github.com/{REPO}", "mian"),
+    ("https://github.com/bench/missing", "main"),
+])
+def test_missing_branch_or_repository_fails(api, url, branch):
+    loader = GithubLoader(url, branch)
+    with pytest.raises(requests.HTTPError):
+        list(loader.iter_repo(FileFilters.FOLDER_ONLY("src")))
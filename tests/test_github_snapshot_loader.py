@@ -0,0 +1,30 @@
+import subprocess
+
+# Local Imports
+from tcm.github.github_cache import RepoCache
+from tcm.github.github_snapshot_loader import SnapshotLoader
+
+def test_git_token_stays_out_of_the_command_line(tmp_path, monkeypatch):
+    monkeypatch.setenv("GITHUB_PA_TOKEN", "ghp_secret")
+    calls = []
+
+    def __run(command, **kwargs):
+        calls.append((command, kwargs["env"]))
+        return subprocess.CompletedProcess(command, 0, stdout="0123abcd\trefs/heads/main\n")
+
+    monkeypatch.setattr(subprocess, "run", __run)
+    loader = SnapshotLoader("https://github.com/org/project", "main", method="git",
+                            cache=RepoCache(str(tmp_path)))
+    loader.resolve_commit()
+
+    (command, env), = calls
+    assert not any("ghp_secret" in arg for arg in command)
+    assert "https://github.com/org/project.git" in command
+    assert env["GIT_CONFIG_KEY_0"] == "http.https://github.com/.extraHeader"
+    assert env["GIT_CONFIG_VALUE_0"].startswith("Authorization: Basic ")
+
+def test_git_env_without_token(monkeypatch):
+    monkeypatch.delenv("GITHUB_PA_TOKEN", raising=False)
+    env = SnapshotLoader.git_env()
+    assert "GIT_CONFIG_COUNT" not in env
+    assert env["GIT_TERMINAL_PROMPT"] == "0"
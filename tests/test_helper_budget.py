@@ -0,0 +1,61 @@
+import gc
+import weakref
+
+# Local Imports
+from tcm.helper.helper_budget import QueryBudget
+
+# Global Imports
+from langchain_core.documents import Document
+
+def __splits(packages: int, files: int, chunks: int):
+    for package in range(packages):
+        for file in range(files):
+            for chunk in range(chunks):
+                yield Document(
+                    page_content=f"pkg{package} file{file} chunk{chunk}",
+                    metadata={"path": f"src/pkg{package}/File{file}.java"}
+                )
+
+def __resolve(budget: QueryBudget):
+    def __query(texts):
+        budget.spend(len(texts))
+        # Package 3 holds the closest chunks
+        return [[(Document(page_content="example"), 0.1 if "pkg3 " in text else 0.9)]
+                for text in texts]
+    return __query
+
+def test_budget_bounds_queries_and_samples_every_package():
+    budget = QueryBudget(max_queries=40)
+    selected = list(budget.select(__splits(8, 4, 25), __resolve(budget), k=3, batch_size=10))
+
+    assert len(selected) <= 40
+    packages = {split.metadata["path"].split("/")[1] for split, _ in selected}
+    assert packages == {f"pkg{i}" for i in range(8)}
+    # The closest package gets escalated
+    assert sum(1 for split, _ in selected if "/pkg3/" in split.metadata["path"]) > 40 // 8
+    assert "src/pkg0/File0.java" in budget.incomplete_paths
+
+def test_large_budget_queries_every_chunk():
+    budget = QueryBudget(max_queries=1000)
+    selected = list(budget.select(__splits(3, 2, 5), __resolve(budget), k=3))
+    assert len(selected) == 30
+    assert budget.incomplete_paths == set()
+
+def test_only_a_reservoir_per_package_is_held():
+    alive = []
+
+    def __tracked():
+        for split in __splits(1, 50, 100):
+            alive.append(weakref.ref(split))
+            yield split
+
+    budget = QueryBudget(max_queries=20)
+    selection = budget.select(__tracked(), __resolve(budget), k=3, batch_size=5)
+    next(selection)
+    gc.collect()
+
+    # 5000 chunks went through, at most the budget of them is still referenced
+    assert len(alive) == 5000
+    assert sum(1 for ref in alive if ref() is not None) <= 20
+    assert len(list(selection)) + 1 <= 20
+    assert len(budget.incomplete_paths) > 0
@@ -0,0 +1,37 @@
+import json
+
+# Local Imports
+from tcm.helper.helper_checkpoint import ResourceSerializer, ResultsStore
+
+def __entry(answer: str, commit: str="abc") -> dict:
+    return {
+        "key": "repo", "url": "https://github.com/o/r", "branch": "main", "folder": "",
+        "commit": commit, "answer": answer, "duration": 1.0
+    }
+
+def test_completed_skips_a_truncated_line_and_keeps_the_last_entry(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.jsonl"))
+    store.append(__entry("first"))
+    store.append(__entry("second"))
+    store.append(__entry("other commit", commit="def"))
+    with open(store.path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(__entry("cut short"))[:20])
+
+    completed = store.completed()
+    identity = ResultsStore.identity("https://github.com/o/r", "main", "", "abc")
+    assert len(completed) == 2
+    assert completed[identity]["answer"] == "second"
+
+def test_completed_of_a_missing_file_is_empty(tmp_path):
+    assert ResultsStore(str(tmp_path / "missing.jsonl")).completed() == {}
+
+def test_serializer_stores_resources_by_name():
+    resource = object()
+    serde = ResourceSerializer({"vector_db": resource, "llm": None})
+    state = {"url": "https://github.com/o/r", "nested": {"vector_db": resource}, "llm": None}
+
+    loaded = serde.loads_typed(serde.dumps_typed(state))
+    assert loaded["nested"]["vector_db"] is resource
+    assert loaded["url"] == state["url"]
+    assert loaded["llm"] is None
+    assert serde.loads_typed(serde.dumps_typed(resource)) is resource
@@ -0,0 +1,55 @@
+# Local Imports
+from tcm.helper.helper_filters import FileFilters, FilterSpec
+
+PATHS = [
+    "src/adapter/Client.java", "src/adapter/client.py", "src/core/Main.java",
+    "tests/TestMain.java", ".github/Workflow.java", "node_modules/lib/index.js", "Main.java"
+]
+
+def test_combined_spec_matches_the_lambdas_it_replaces():
+    spec = FileFilters.combine_filters(
+        FileFilters.JAVA_FILES, FileFilters.NOT_TESTS, FileFilters.NOT_HIDDEN,
+        FileFilters.NOT_NODE_MODULES
+    )
+    def legacy(path):
+        return path.endswith(".java") and not path.startswith(("tests/", "test/")) and \
+            not any(part.startswith(".") for part in path.split("/")) and "node_modules" not in path
+
+    assert [path for path in PATHS if spec(path)] == [path for path in PATHS if legacy(path)]
+
+def test_plain_functions_run_after_the_regex():
+    spec = FileFilters.combine_filters(FileFilters.JAVA_FILES, lambda path: "core" in path)
+    assert [path for path in PATHS if spec(path)] == ["src/core/Main.java"]
+
+def test_intersection_keeps_the_narrower_condition():
+    spec = FileFilters.FOLDER_ONLY("src") & FileFilters.FOLDER_ONLY("src/adapter")
+    assert spec.include_prefixes == ("src/adapter/",)
+    assert [path for path in PATHS if spec(path)] == [
+        "src/adapter/Client.java", "src/adapter/client.py"
+    ]
+
+    disjoint = FileFilters.PYTHON_FILES & FileFilters.JAVA_FILES
+    assert not any(disjoint(path) for path in PATHS)
+
+def test_prefixes_are_the_outermost_folders():
+    assert FilterSpec().prefixes() is None
+    assert FileFilters.FOLDERS_ONLY("src/adapter", "src", "lib").prefixes() == ["lib/", "src/"]
+    # A partial file name narrows down to its folder, a top-level one can be anywhere
+    assert FilterSpec(include_prefixes=["src/Ma"]).prefixes() == ["src/"]
+    assert FilterSpec(include_prefixes=["Ma"]).prefixes() is None
+
+def test_may_contain_skips_excluded_directories():
+    spec = FileFilters.combine_filters(
+        FileFilters.FOLDER_ONLY("src/adapter"), FileFilters.NOT_HIDDEN, FileFilters.NOT_CACHE
+    )
+    assert spec.may_contain("src/")
+    assert spec.may_contain("src/adapter/nested/")
+    assert not spec.may_contain("lib/")
+    assert not spec.may_contain("src/adapter/.git/")
+    assert not spec.may_contain("src/adapter/__pycache__/")
+
+def test_glob_star_crosses_folders():
+    spec = FileFilters.GLOB("src/*.java")
+    assert [path for path in PATHS if spec(path)] == [
+        "src/adapter/Client.java", "src/core/Main.java"
+    ]
@@ -0,0 +1,56 @@
+import pytest
+
+# Local Imports
+from tcm.helper.helper_state import generate_map_reduce
+
+# Global Imports
+from jinja2 import Template
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+class BlockAnsweringLLM:
+    """Answers with a list of content blocks, like Anthropic models can."""
+    def __init__(self) -> None:
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages.to_string())
+        return AIMessage(content=[
+            {"type": "text", "text": f"finding {len(self.prompts)}"},
+            {"type": "text", "text": "."},
+        ])
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "logs").mkdir()
+    return {
+        "question": "Which patterns are used?",
+        "context_doc": [],
+        "parts": [
+            {"ordinal": i + 1, "user_code": f"class A{i} {{}}", "tech_credit": "Strategy",
+             "context_code": "class Example {}", "occurrences": 1}
+            for i in range(4)
+        ],
+        "tech_credit_list": ["Strategy", "Builder"],
+        "group_size": 2,
+        "prompt_budget": 0,
+        "user_prompt_template": Template(
+            "{% for part in parts %}Part No. {{ part.ordinal }}: {{ part.user_code }}\n{% endfor %}"
+        ),
+        "prompt": ChatPromptTemplate.from_messages([
+            ("system", "{tech_credit_list}\n{context_doc}"), ("human", "{question}\n{rendered}")
+        ]),
+        "reduce_prompt": ChatPromptTemplate.from_messages([
+            ("system", "{tech_credit_list}"), ("human", "{question}\n{findings}")
+        ]),
+        "llm": BlockAnsweringLLM(),
+    }
+
+def test_map_findings_are_text(state):
+    result = generate_map_reduce(state)
+
+    assert sorted(result["findings"]) == ["finding 1.", "finding 2."]
+    reduce_prompt = state["llm"].prompts[-1]
+    assert "Parts No. 1 to 2:\nfinding" in reduce_prompt
+    assert "Parts No. 3 to 4:\nfinding" in reduce_prompt
@@ -0,0 +1,41 @@
+import json
+import pytest
+
+# Local Imports
+from tcm.helper.helper_taxonomy import TaxonomyProvider
+
+@pytest.fixture(autouse=True)
+def fresh_provider(monkeypatch):
+    monkeypatch.setattr(TaxonomyProvider, "_TaxonomyProvider__patterns", {})
+
+def test_local_taxonomy_is_loaded_once(tmp_path):
+    path = tmp_path / "patterns.json"
+    path.write_text(json.dumps([{"pattern_name": "Strategy"}, {"pattern_name": "Builder"}]))
+
+    TaxonomyProvider.load(path=str(path))
+    assert TaxonomyProvider.categories() == ["Strategy", "Builder"]
+
+    path.write_text(json.dumps([{"pattern_name": "Changed"}]))
+    assert [entry["pattern_name"] for entry in TaxonomyProvider.load(path=str(path))] == \
+        ["Strategy", "Builder"]
+
+def test_each_source_is_loaded_on_its_own(tmp_path, monkeypatch):
+    path = tmp_path / "patterns.json"
+    path.write_text(json.dumps([{"pattern_name": "Strategy"}]))
+    monkeypatch.setattr(TaxonomyProvider, "_TaxonomyProvider__fetch_remote",
+                        lambda: [{"pattern_name": "Remote"}])
+
+    assert TaxonomyProvider.categories("remote") == ["Remote"]
+    assert [entry["pattern_name"] for entry in TaxonomyProvider.load(path=str(path))] == \
+        ["Strategy"]
+    assert TaxonomyProvider.categories("remote") == ["Remote"]
+
+def test_malformed_taxonomy_is_rejected(tmp_path):
+    path = tmp_path / "patterns.json"
+    path.write_text("null")
+    with pytest.raises(ValueError):
+        TaxonomyProvider.load(path=str(path))
+
+def test_unknown_source_is_rejected():
+    with pytest.raises(ValueError):
+        TaxonomyProvider.load(source="ftp")
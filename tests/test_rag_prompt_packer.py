@@ -0,0 +1,62 @@
+# Local Imports
+from tcm.database.database_vector import VectorDB
+from tcm.rag.rag_prompt_packer import PromptPacker
+
+# Global Imports
+from langchain_core.documents import Document
+
+def __count_tokens(text: str) -> int:
+    return len(text.split())
+
+def __render(parts, doc_content: str) -> str:
+    rendered = "\n".join(
+        f"Part No. {part['ordinal']}:\n{part['user_code']}\nExample:\n{part['context_code']}"
+        for part in parts
+    )
+    return f"System prompt and question\n{rendered}\n{doc_content}"
+
+def __part(name: str, distance: float, lines: int=30):
+    code = "\n".join(f"int {name}{i} = compute{name}({i});" for i in range(lines))
+    return {
+        "ordinal": 0,
+        "user_code": code,
+        "distance": distance,
+        "context_code": f"class {name}Example {{}}",
+        "context_snippets": [f"class {name}Example {{}}"],
+    }
+
+def test_closest_part_survives_a_tight_budget():
+    # Worst first, as the vector store used to return them
+    parts = [__part("worst", 0.9), __part("middle", 0.5), __part("best", 0.1)]
+    packer = PromptPacker(__count_tokens, budget=140)
+    packed, _, tokens = packer.pack(parts, [], __render)
+
+    assert tokens <= 140
+    assert packed[0]["user_code"] == __part("best", 0.1)["user_code"]
+    assert packed[0]["ordinal"] == 1
+    assert all("worst" not in part["user_code"] for part in packed)
+
+def test_retrieved_parts_pack_closest_first():
+    results = [
+        (__part(name, distance)["user_code"], [(Document(page_content=name), distance)])
+        for name, distance in (("worst", 0.9), ("best", 0.1), ("middle", 0.5))
+    ]
+    parts = [
+        {**__part("", 0.0), "user_code": code, "distance": distance}
+        for code, _, distance in VectorDB.top_k(results, k=3)
+    ]
+    packed, _, _ = PromptPacker(__count_tokens, budget=140).pack(parts, [], __render)
+    assert [part["distance"] for part in packed][:1] == [0.1]
+
+def test_documentation_fills_what_is_left():
+    packer = PromptPacker(__count_tokens, budget=1000)
+    packed, doc_content, _ = packer.pack([__part("best", 0.1)], ["page one", "x " * 2000], __render)
+    assert len(packed) == 1
+    assert doc_content == "page one"
+
+def test_truncated_code_ends_at_a_statement():
+    packer = PromptPacker(__count_tokens)
+    code = "class A {\n    int a = 1;\n    int b = 2;\n    void run() {\n        a++;\n    }\n}\n"
+    truncated = packer.truncate_code(code, 12)
+    assert truncated.endswith("// ... (truncated)")
+    assert truncated.splitlines()[-2].rstrip().endswith((";", "{", "}"))
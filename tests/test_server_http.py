@@ -0,0 +1,54 @@
+import json
+import pytest
+import threading
+import urllib.request
+
+# Local Imports
+from tcm.helper.helper_trace import Tracer
+from tcm.server.server_http import AnalysisServer
+
+class FakeService:
+    """Records one counter per analysis, after every job has started."""
+    def __init__(self, jobs: int) -> None:
+        self.started = threading.Barrier(jobs)
+
+    def stream(self, key, url, branch="main", folder="", run_id=""):
+        with Tracer.run(run_id or key):
+            self.started.wait(timeout=5)
+            Tracer.count("analyzed", 1 if url.endswith("one") else 10)
+        yield {"event": "result", "key": key, "answer": url, "duration": 0.0}
+
+def __post(address, body):
+    request = urllib.request.Request(
+        f"http://{address[0]}:{address[1]}/analyze", data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+def test_concurrent_jobs_with_the_same_key_keep_their_own_trace():
+    server = AnalysisServer(FakeService(2), workers=2)  # type: ignore[arg-type]
+    _, address = server.start(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = {}
+    threads = [
+        threading.Thread(target=lambda url=url: results.update(
+            {url: __post(address, {"url": url, "key": "same"})}
+        ))
+        for url in ("repo/one", "repo/ten")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+
+    assert results["repo/one"]["key"] == results["repo/ten"]["key"] == "same"
+    assert results["repo/one"]["trace"]["counters"]["analyzed"] == 1
+    assert results["repo/ten"]["trace"]["counters"]["analyzed"] == 10
+
+def test_serve_forever_requires_start():
+    server = AnalysisServer(FakeService(1))  # type: ignore[arg-type]
+    with pytest.raises(RuntimeError):
+        server.serve_forever()
@@ -0,0 +1,63 @@
+# Local Imports
+from tcm.splitter.splitter_dedup import ChunkDeduplicator
+
+GETTER = """
+public String getName() {
+    // Returns the current value of the field, never null once the builder has run
+    if (this.name == null) {
+        throw new IllegalStateException("name is not set yet, call the builder first");
+    }
+    return this.name;
+}
+"""
+
+ORDER = "public class Order {\n" + "".join(
+    f"    private String {field};\n"
+    f"    public String get{field.title()}() {{ return this.{field}; }}\n"
+    f"    public void set{field.title()}(String {field}) {{ this.{field} = {field}; }}\n"
+    for field in ("id", "customer", "address", "status", "currency", "notes", "carrier", "reference")
+) + "}\n"
+
+def test_whitespace_only_differences_are_exact_duplicates():
+    dedup = ChunkDeduplicator()
+    first, created = dedup.assign(GETTER)
+    assert created
+    assert dedup.assign("  ".join(GETTER.split())) == (first, False)
+
+def test_near_duplicates_share_a_cluster():
+    dedup = ChunkDeduplicator()
+    first, _ = dedup.assign(ORDER)
+    # Renamed identifiers only flip a few SimHash bits
+    assert dedup.assign(ORDER.replace("Order", "Invoice")) == (first, False)
+    assert dedup.assign(ORDER.replace("notes", "remarks")) == (first, False)
+    assert dedup.assign(GETTER)[1]
+
+def test_unrelated_and_short_chunks_stay_apart():
+    dedup = ChunkDeduplicator()
+    dedup.assign(GETTER)
+    _, created = dedup.assign(
+        "for (int i = 0; i < items.size(); i++) { total += items.get(i).price() * rate; }"
+    )
+    assert created
+    # Under min_tokens, chunks only collapse when identical
+    assert dedup.assign("return a;")[1]
+    assert dedup.assign("return b;")[1]
+
+def test_query_only_sends_cluster_representatives():
+    dedup = ChunkDeduplicator()
+    sent = []
+
+    def __query(texts):
+        sent.append(texts)
+        return [[(None, float(len(text)))] for text in texts]
+
+    results = dedup.query([GETTER, " ".join(GETTER.split()), "return a;"], __query)
+    assert sent == [[GETTER, "return a;"]]
+    assert results[0] is results[1]
+
+def test_collapse_counts_cluster_members():
+    dedup = ChunkDeduplicator()
+    collapsed = list(dedup.collapse([(GETTER, []), (" ".join(GETTER.split()), []), ("x;", [])]))
+    assert [text for text, _ in collapsed] == [GETTER, "x;"]
+    assert dedup.counts == {GETTER: 2, "x;": 1}
+    assert dedup.stats()["clusters"] == 2
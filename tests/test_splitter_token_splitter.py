@@ -0,0 +1,81 @@
+import pytest
+import tiktoken
+import threading
+
+# Local Imports
+from tcm.splitter.splitter_token_splitter import TokenSplitter
+
+# Global Imports
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+def __java_file(classes: int) -> str:
+    return "\n\n".join(
+        f"public class Widget{i} {{\n    private int value{i};\n\n"
+        f"    public int getValue{i}() {{\n        return value{i};\n    }}\n}}"
+        for i in range(classes)
+    )
+
+def __has_encoding() -> bool:
+    try:
+        tiktoken.get_encoding("gpt2")
+        return True
+    except Exception:
+        return False
+
+def test_worker_pool_is_spawned():
+    pool = TokenSplitter._TokenSplitter__get_pool()
+    assert pool._mp_context.get_start_method() == "spawn"
+
+def test_concurrent_callers_share_one_pool(monkeypatch):
+    monkeypatch.setattr(TokenSplitter, "_TokenSplitter__pool", None)
+    barrier = threading.Barrier(8)
+    pools = []
+    def __get():
+        barrier.wait(timeout=5)
+        pools.append(TokenSplitter._TokenSplitter__get_pool())
+
+    threads = [threading.Thread(target=__get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(pools) == 8 and all(pool is pools[0] for pool in pools)
+
+@pytest.mark.skipif(not __has_encoding(), reason="the tiktoken encoding cannot be downloaded")
+def test_parallel_split_matches_serial_split(monkeypatch):
+    documents = [Document(page_content=__java_file(40), metadata={"path": f"W{i}.java"})
+                 for i in range(4)]
+    TokenSplitter.configure_cache("")
+
+    monkeypatch.setattr(TokenSplitter, "WORKERS", 1)
+    serial = [doc.page_content for doc in TokenSplitter.split_documents(documents)]
+
+    # Spawned workers split the window in separate processes
+    monkeypatch.setattr(TokenSplitter, "WORKERS", 2)
+    monkeypatch.setattr(TokenSplitter, "PARALLEL_MIN_CHARS", 1)
+    parallel = [doc.page_content for doc in TokenSplitter.split_documents(documents)]
+
+    assert parallel == serial
+    assert len(serial) >= len(documents)
+
+@pytest.mark.skipif(not __has_encoding(), reason="the tiktoken encoding cannot be downloaded")
+def test_default_split_matches_the_tiktoken_defaults():
+    text = __java_file(400)
+    TokenSplitter.configure_cache("")
+    expected = RecursiveCharacterTextSplitter.from_tiktoken_encoder().split_text(text)
+
+    assert TokenSplitter.config()["chunk_size"] == 4000
+    assert [doc.page_content for doc in TokenSplitter.split_documents([Document(text)])] == expected
+
+@pytest.mark.skipif(not __has_encoding(), reason="the tiktoken encoding cannot be downloaded")
+def test_training_chunks_keep_their_path_and_labels():
+    TokenSplitter.configure_cache("")
+    labels = {"src/Widget.java": {"tech_credit": "Getter"}}
+    chunks = TokenSplitter.split_documents(
+        [Document(page_content=__java_file(2), metadata={"path": "src/Widget.java"})],
+        metadata_map=labels, keep_path=True
+    )
+    assert chunks and all(
+        chunk.metadata == {"tech_credit": "Getter", "path": "src/Widget.java"} for chunk in chunks
+    )